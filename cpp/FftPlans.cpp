@@ -0,0 +1,304 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+
+#include "FftPlans.h"
+#include <algorithm>
+#include <cmath>
+#include <cstdio>
+#include <time.h>
+
+//the lock is defined first so that it outlives the plans at static destruction
+boost::mutex FftPlans::plannerLock_;
+FftPlans::Statistics FftPlans::statistics_;
+FftPlans::map_type FftPlans::plans_;
+
+namespace {
+	double getTime()
+	{
+		struct timespec ts;
+		clock_gettime(CLOCK_MONOTONIC, &ts);
+		return ts.tv_sec + 1e-9*ts.tv_nsec;
+	}
+}
+
+FftPlans::FftPlans(size_t fftSize) :
+	fftSize_(fftSize)
+{
+	//plan on scratch buffers - FFTW_MEASURE scribbles on the arrays it is given
+	float* realBuf = static_cast<float*>(fftwf_malloc(sizeof(float)*fftSize));
+	fftwf_complex* cxIn = static_cast<fftwf_complex*>(fftwf_malloc(sizeof(fftwf_complex)*fftSize));
+	fftwf_complex* cxOut = static_cast<fftwf_complex*>(fftwf_malloc(sizeof(fftwf_complex)*fftSize));
+	int n = static_cast<int>(fftSize);
+	r2c_ = fftwf_plan_dft_r2c_1d(n, realBuf, cxOut, FFTW_MEASURE);
+	c2r_ = fftwf_plan_dft_c2r_1d(n, cxIn, realBuf, FFTW_MEASURE);
+	c2cForward_ = fftwf_plan_dft_1d(n, cxIn, cxOut, FFTW_FORWARD, FFTW_MEASURE);
+	c2cInverse_ = fftwf_plan_dft_1d(n, cxIn, cxOut, FFTW_BACKWARD, FFTW_MEASURE);
+	fftwf_free(realBuf);
+	fftwf_free(cxIn);
+	fftwf_free(cxOut);
+}
+
+FftPlans::~FftPlans()
+{
+	{
+		boost::mutex::scoped_lock lock(plannerLock_);
+		fftwf_destroy_plan(r2c_);
+		fftwf_destroy_plan(c2r_);
+		fftwf_destroy_plan(c2cForward_);
+		fftwf_destroy_plan(c2cInverse_);
+	}
+	//the batches take the lock themselves
+	batches_.clear();
+}
+
+FftPlans::Batch::Batch(size_t fftSize, size_t count) :
+	count_(count)
+{
+	size_t total = fftSize*count;
+	float* realBuf = static_cast<float*>(fftwf_malloc(sizeof(float)*total));
+	fftwf_complex* cxIn = static_cast<fftwf_complex*>(fftwf_malloc(sizeof(fftwf_complex)*total));
+	fftwf_complex* cxOut = static_cast<fftwf_complex*>(fftwf_malloc(sizeof(fftwf_complex)*total));
+	int n = static_cast<int>(fftSize);
+	int howMany = static_cast<int>(count);
+	c2r_ = fftwf_plan_many_dft_c2r(1, &n, howMany, cxIn, NULL, 1, n, realBuf, NULL, 1, n, FFTW_MEASURE);
+	c2cInverse_ = fftwf_plan_many_dft(1, &n, howMany, cxIn, NULL, 1, n, cxOut, NULL, 1, n, FFTW_BACKWARD, FFTW_MEASURE);
+	fftwf_free(realBuf);
+	fftwf_free(cxIn);
+	fftwf_free(cxOut);
+}
+
+FftPlans::Batch::~Batch()
+{
+	boost::mutex::scoped_lock lock(plannerLock_);
+	fftwf_destroy_plan(c2r_);
+	fftwf_destroy_plan(c2cInverse_);
+}
+
+void FftPlans::Batch::inverse(std::complex<float>* in, float* out) const
+{
+	fftwf_execute_dft_c2r(c2r_, reinterpret_cast<fftwf_complex*>(in), out);
+}
+
+void FftPlans::Batch::inverse(std::complex<float>* in, std::complex<float>* out) const
+{
+	fftwf_execute_dft(c2cInverse_, reinterpret_cast<fftwf_complex*>(in), reinterpret_cast<fftwf_complex*>(out));
+}
+
+FftPlans::BatchPtr FftPlans::getBatch(size_t count) const
+{
+	boost::mutex::scoped_lock lock(plannerLock_);
+	BatchPtr& batch = batches_[count];
+	if (!batch)
+	{
+		double start = getTime();
+		batch.reset(new Batch(fftSize_, count));
+		addPlanningTime(getTime()-start);
+	}
+	return batch;
+}
+
+FftPlans::Ptr FftPlans::get(size_t fftSize)
+{
+	boost::mutex::scoped_lock lock(plannerLock_);
+	map_type::iterator i = plans_.find(fftSize);
+	if (i==plans_.end())
+	{
+		double start = getTime();
+		i = plans_.insert(map_type::value_type(fftSize, Ptr(new FftPlans(fftSize)))).first;
+		addPlanningTime(getTime()-start);
+	}
+	return i->second;
+}
+
+void FftPlans::addPlanningTime(double time)
+{
+	statistics_.plans++;
+	statistics_.planningTime += time;
+	statistics_.lastPlanningTime = time;
+}
+
+FftPlans::Statistics FftPlans::getStatistics()
+{
+	boost::mutex::scoped_lock lock(plannerLock_);
+	return statistics_;
+}
+
+bool FftPlans::loadWisdom(const std::string& filename)
+{
+	boost::mutex::scoped_lock lock(plannerLock_);
+	return fftwf_import_wisdom_from_filename(filename.c_str())!=0;
+}
+
+bool FftPlans::saveWisdom(const std::string& filename)
+{
+	//write it alongside and move it into place so nobody loads a half written file
+	std::string temp = filename+".tmp";
+	boost::mutex::scoped_lock lock(plannerLock_);
+	if (!fftwf_export_wisdom_to_filename(temp.c_str()))
+		return false;
+	if (std::rename(temp.c_str(), filename.c_str())!=0)
+	{
+		std::remove(temp.c_str());
+		return false;
+	}
+	return true;
+}
+
+void FftPlans::forward(float* in, std::complex<float>* out) const
+{
+	fftwf_execute_dft_r2c(r2c_, in, reinterpret_cast<fftwf_complex*>(out));
+}
+
+void FftPlans::inverse(std::complex<float>* in, float* out) const
+{
+	fftwf_execute_dft_c2r(c2r_, reinterpret_cast<fftwf_complex*>(in), out);
+}
+
+void FftPlans::forward(std::complex<float>* in, std::complex<float>* out) const
+{
+	fftwf_execute_dft(c2cForward_, reinterpret_cast<fftwf_complex*>(in), reinterpret_cast<fftwf_complex*>(out));
+}
+
+void FftPlans::inverse(std::complex<float>* in, std::complex<float>* out) const
+{
+	fftwf_execute_dft(c2cInverse_, reinterpret_cast<fftwf_complex*>(in), reinterpret_cast<fftwf_complex*>(out));
+}
+
+const double FftPlans::LATENCY_COST_FACTOR = 2.0;
+
+namespace {
+	//relative cost of one pass of each radix per point - fftw's codelets for larger radices
+	//do more work per point than log2 of the radix suggests
+	const size_t RADICES[] = {2, 3, 5, 7};
+	const double RADIX_COST[] = {1.0, 1.9, 2.8, 3.5};
+	const size_t NUM_RADICES = sizeof(RADICES)/sizeof(RADICES[0]);
+	//butterfly flops per point per radix-2 pass and flops for a complex multiply
+	const double FFT_FLOPS = 5.0;
+	const double MULTIPLY_FLOPS = 6.0;
+	//never look past this many times the filter length
+	const size_t MAX_SIZE_MULTIPLE = 64;
+	//below this the per-block overhead outweighs anything the model accounts for
+	const size_t MIN_SIZE = 64;
+	//bigger ffts than this no longer fit in cache and every pass costs more
+	const size_t CACHE_SIZE = 16384;
+	const double OUT_OF_CACHE_COST = 1.5;
+
+	//all the even sizes in [low, high] with no prime factors bigger than 7
+	void smoothSizes(size_t low, size_t high, std::vector<size_t>& sizes)
+	{
+		for (size_t a=2; a<=high; a*=2)
+			for (size_t b=a; b<=high; b*=3)
+				for (size_t c=b; c<=high; c*=5)
+					for (size_t d=c; d<=high; d*=7)
+						if (d>=low)
+							sizes.push_back(d);
+		std::sort(sizes.begin(), sizes.end());
+	}
+
+	double fftCost(size_t fftSize)
+	{
+		bool inCache = fftSize<=CACHE_SIZE;
+		double passes=0;
+		for (size_t i=0; i!=NUM_RADICES; i++)
+		{
+			while (fftSize%RADICES[i]==0)
+			{
+				fftSize/=RADICES[i];
+				passes+=RADIX_COST[i];
+			}
+		}
+		//anything left over is a prime fftw has to handle the slow way
+		if (fftSize>1)
+			passes+=fftSize;
+		if (!inCache)
+			passes*=OUT_OF_CACHE_COST;
+		return FFT_FLOPS*passes;
+	}
+}
+
+double FftPlans::filterCost(size_t fftSize, size_t numTaps)
+{
+	if (numTaps==0 || fftSize<numTaps)
+		return HUGE_VAL;
+	//forward fft, multiply and inverse fft per block, spread over the samples the block produces
+	size_t blockSize = fftSize-numTaps+1;
+	return fftSize*(2*fftCost(fftSize)+MULTIPLY_FLOPS)/blockSize;
+}
+
+double FftPlans::partitionedFilterCost(size_t fftSize, size_t numTaps)
+{
+	size_t blockSize = fftSize/2;
+	if (numTaps==0 || blockSize==0)
+		return HUGE_VAL;
+	//two ffts per block as before but one multiply-accumulate per partition
+	size_t numPartitions = (numTaps+blockSize-1)/blockSize;
+	return fftSize*(2*fftCost(fftSize)+numPartitions*MULTIPLY_FLOPS)/blockSize;
+}
+
+double FftPlans::directFilterCost(size_t numTaps)
+{
+	//a complex multiply-accumulate per tap
+	return numTaps*(MULTIPLY_FLOPS+2);
+}
+
+size_t FftPlans::chooseSize(size_t numTaps, bool lowLatency, bool partitioned, size_t maxBlockSize)
+{
+	numTaps = std::max(numTaps, size_t(1));
+	std::vector<size_t> sizes;
+	double (*filterCost)(size_t, size_t) = &FftPlans::filterCost;
+	if (partitioned)
+	{
+		filterCost = &FftPlans::partitionedFilterCost;
+		size_t high = std::max(2*numTaps, MIN_SIZE);
+		if (maxBlockSize!=0)
+			high = std::min(high, 2*maxBlockSize);
+		smoothSizes(MIN_SIZE, high, sizes);
+	}
+	else
+	{
+		size_t low = std::max(numTaps+1, MIN_SIZE);
+		size_t high = std::max(MAX_SIZE_MULTIPLE*numTaps, low);
+		if (maxBlockSize!=0)
+			high = std::min(high, numTaps-1+maxBlockSize);
+		smoothSizes(low, high, sizes);
+	}
+	if (sizes.empty())
+		return 0;
+
+	size_t best = sizes.front();
+	double bestCost = HUGE_VAL;
+	for (std::vector<size_t>::iterator i = sizes.begin(); i!=sizes.end(); i++)
+	{
+		double cost = filterCost(*i, numTaps);
+		if (cost<bestCost)
+		{
+			best=*i;
+			bestCost=cost;
+		}
+	}
+	if (lowLatency)
+	{
+		//the sizes are sorted so the first one that is cheap enough has the smallest block
+		for (std::vector<size_t>::iterator i = sizes.begin(); i!=sizes.end(); i++)
+		{
+			if (filterCost(*i, numTaps) <= LATENCY_COST_FACTOR*bestCost)
+				return *i;
+		}
+	}
+	return best;
+}
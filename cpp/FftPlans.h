@@ -0,0 +1,164 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+#ifndef FFTPLANS_H
+#define FFTPLANS_H
+
+#include <complex>
+#include <map>
+#include <string>
+#include <vector>
+#include <fftw3.h>
+#include <boost/shared_ptr.hpp>
+#include <boost/thread/mutex.hpp>
+
+/**
+ * The set of fftw plans needed to run an fft-based filter of a single size.
+ *
+ * Plans are created once per fftSize and shared by every filter in the process -
+ * use FftPlans::get() to look them up.  All plans are out-of-place and are run with
+ * the fftw "new-array" execute functions, so callers must pass fftw-aligned buffers
+ * (ie - RealFFTWVector/ComplexFFTWVector).  Running a plan is thread safe but the fftw
+ * planner is not, so all plan creation is serialized through a global lock.
+ *
+ * Plans are measured, which can take a long time for large sizes.  Wisdom saved from an
+ * earlier run lets fftw skip the measurements for any size it has seen before.
+ */
+class FftPlans
+{
+	public:
+		typedef boost::shared_ptr<FftPlans> Ptr;
+
+		/**
+		 * Inverse ffts of several spectra in one call.
+		 *
+		 * The spectra are laid out back to back fftSize bins apart (only the first
+		 * fftSize/2+1 of each are used by the complex to real transform) and so are the
+		 * outputs.  Running them together lets fftw share the twiddle factors and vectorize
+		 * across transforms.
+		 */
+		class Batch
+		{
+			public:
+				~Batch();
+				size_t count() const
+				{
+					return count_;
+				}
+				//complex to real - the spectra are destroyed
+				void inverse(std::complex<float>* in, float* out) const;
+				void inverse(std::complex<float>* in, std::complex<float>* out) const;
+
+			private:
+				friend class FftPlans;
+				Batch(size_t fftSize, size_t count);
+				Batch(const Batch&);
+				Batch& operator=(const Batch&);
+
+				size_t count_;
+				fftwf_plan c2r_;
+				fftwf_plan c2cInverse_;
+		};
+		typedef boost::shared_ptr<Batch> BatchPtr;
+
+		//plans made since the process started and the time spent making them
+		struct Statistics
+		{
+			Statistics() :
+				plans(0),
+				planningTime(0),
+				lastPlanningTime(0)
+			{
+			}
+			//a set of plans for one fftSize or one batch counts as one
+			unsigned long plans;
+			double planningTime;
+			double lastPlanningTime;
+		};
+
+		~FftPlans();
+
+		//get (creating if necessary) the plans for this fftSize
+		static Ptr get(size_t fftSize);
+
+		/**
+		 * Pick the fftSize for an overlap-add filter with numTaps taps.
+		 *
+		 * Candidates are the even sizes made up of factors of 2, 3, 5 and 7, which fftw
+		 * handles efficiently.  For throughput we take the size with the lowest estimated cost
+		 * per output sample.  For latency we take the smallest size (and therefore the smallest
+		 * block of input the filter waits for) within LATENCY_COST_FACTOR of that cost.
+		 * A partitioned filter can use any size up to twice the filter length.
+		 *
+		 * With maxBlockSize only the sizes whose block of input is no bigger are considered,
+		 * and 0 is returned if there aren't any.
+		 */
+		static size_t chooseSize(size_t numTaps, bool lowLatency, bool partitioned=false, size_t maxBlockSize=0);
+		//estimated cost per output sample of filtering complex data in blocks of fftSize
+		static double filterCost(size_t fftSize, size_t numTaps);
+		//the same for a filter split into partitions of fftSize/2 taps
+		static double partitionedFilterCost(size_t fftSize, size_t numTaps);
+		//the same for direct convolution in the time domain
+		static double directFilterCost(size_t numTaps);
+
+		static const double LATENCY_COST_FACTOR;
+
+		static Statistics getStatistics();
+		//merge in the wisdom saved in filename - false if it can't be read
+		static bool loadWisdom(const std::string& filename);
+		//save everything fftw has learned so far, replacing filename - false on failure
+		static bool saveWisdom(const std::string& filename);
+
+		size_t size() const
+		{
+			return fftSize_;
+		}
+
+		//real to complex forward fft - out has fftSize/2+1 bins
+		void forward(float* in, std::complex<float>* out) const;
+		//complex to real inverse fft - in has fftSize/2+1 bins and is destroyed
+		void inverse(std::complex<float>* in, float* out) const;
+		//complex to complex forward fft
+		void forward(std::complex<float>* in, std::complex<float>* out) const;
+		//complex to complex inverse fft
+		void inverse(std::complex<float>* in, std::complex<float>* out) const;
+
+		//get (creating if necessary) the plans to run count inverse ffts of this size at once
+		BatchPtr getBatch(size_t count) const;
+
+	private:
+		FftPlans(size_t fftSize);
+		FftPlans(const FftPlans&);
+		FftPlans& operator=(const FftPlans&);
+
+		size_t fftSize_;
+		fftwf_plan r2c_;
+		fftwf_plan c2r_;
+		fftwf_plan c2cForward_;
+		fftwf_plan c2cInverse_;
+		//batches by count - guarded by the planner lock
+		mutable std::map<size_t, BatchPtr> batches_;
+
+		typedef std::map<size_t, Ptr> map_type;
+		static map_type plans_;
+		static boost::mutex plannerLock_;
+		//guarded by the planner lock
+		static Statistics statistics_;
+		static void addPlanningTime(double time);
+};
+
+#endif
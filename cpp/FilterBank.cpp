@@ -0,0 +1,366 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+
+#include "FilterBank.h"
+#include "SampleConversion.h"
+#include <algorithm>
+#include <stdexcept>
+
+namespace {
+	//add the tail from the last block to the start of this one, take numOut samples of
+	//output and keep the end of the block as the tail for the next one
+	template<typename T, typename Tail, typename Out>
+	void overlapAdd(T* block, size_t fftSize, size_t blockSize, size_t numOut, Tail& tail, Out& out)
+	{
+		size_t tailSize = fftSize-blockSize;
+		for (size_t i=0; i!=tailSize; i++)
+			block[i]+=tail[i];
+		out.insert(out.end(), block, block+numOut);
+		std::copy(block+blockSize, block+fftSize, tail.begin());
+	}
+}
+
+FilterBank::FilterBank(const FilterSpectrumList& spectra, FilterScratch* scratch) :
+	scratch_(scratch),
+	fftSize_(0),
+	blockSize_(0),
+	allComplex_(false),
+	complexState_(false),
+	times_(NULL)
+{
+	if (!scratch_)
+	{
+		ownScratch_.reset(new FilterScratch());
+		scratch_ = ownScratch_.get();
+	}
+	setSpectra(spectra);
+}
+
+void FilterBank::setSpectra(const FilterSpectrumList& spectra)
+{
+	if (spectra.empty())
+		throw std::invalid_argument("FilterBank: need at least one filter");
+	size_t fftSize = spectra[0]->getFftSize();
+	size_t blockSize = spectra[0]->getBlockSize();
+	for (FilterSpectrumList::const_iterator i = spectra.begin(); i!=spectra.end(); i++)
+	{
+		if ((*i)->getMethod()!=FilterSpectrum::OVERLAP_ADD || (*i)->getFftSize()!=fftSize || (*i)->getBlockSize()!=blockSize)
+			throw std::invalid_argument("FilterBank: filters must all be overlap-add with the same fftSize and number of taps");
+	}
+	std::vector<size_t> realBranches, complexBranches;
+	for (size_t i=0; i!=spectra.size(); i++)
+	{
+		if (spectra[i]->isComplex())
+			complexBranches.push_back(i);
+		else
+			realBranches.push_back(i);
+	}
+	bool restart = fftSize!=fftSize_ || blockSize!=blockSize_ || spectra.size()!=branches_.size() || complexBranches!=complexBranches_;
+	allComplex_ = realBranches.empty();
+	fftSize_ = fftSize;
+	blockSize_ = blockSize;
+	if (restart)
+	{
+		plans_ = FftPlans::get(fftSize_);
+		realBranches_.swap(realBranches);
+		complexBranches_.swap(complexBranches);
+		realBatch_.reset();
+		complexBatch_.reset();
+		if (!realBranches_.empty())
+			realBatch_ = plans_->getBatch(realBranches_.size());
+		if (!complexBranches_.empty())
+			complexBatch_ = plans_->getBatch(complexBranches_.size());
+		bankBatch_ = plans_->getBatch(spectra.size());
+		branches_.assign(spectra.size(), Branch());
+	}
+	for (size_t i=0; i!=spectra.size(); i++)
+		branches_[i].spectrum = spectra[i];
+	if (restart)
+		flush();
+}
+
+void FilterBank::preparePlans(const FilterSpectrumList& spectra)
+{
+	if (spectra.empty())
+		return;
+	size_t numComplex = 0;
+	for (FilterSpectrumList::const_iterator i = spectra.begin(); i!=spectra.end(); i++)
+	{
+		if ((*i)->isComplex())
+			numComplex++;
+	}
+	//the same batches setSpectra asks for
+	FftPlans::Ptr plans = FftPlans::get(spectra[0]->getFftSize());
+	if (numComplex!=spectra.size())
+		plans->getBatch(spectra.size()-numComplex);
+	if (numComplex!=0)
+		plans->getBatch(numComplex);
+	plans->getBatch(spectra.size());
+}
+
+void FilterBank::reserveScratch()
+{
+	//the spectrum of the block through each filter and its inverse fft go fftSize apart
+	scratch_->reserve(fftSize_);
+	size_t bankSize = fftSize_*branches_.size();
+	if (scratch_->bankFreq.size()<bankSize)
+	{
+		scratch_->bankFreq.resize(bankSize);
+		scratch_->realOutTime.resize(bankSize);
+		scratch_->complexOutTime.resize(bankSize);
+	}
+}
+
+void FilterBank::flush()
+{
+	size_t tailSize = fftSize_-blockSize_;
+	RealFFTWVector().swap(realPending_);
+	ComplexFFTWVector().swap(complexPending_);
+	for (std::vector<Branch>::iterator i = branches_.begin(); i!=branches_.end(); i++)
+	{
+		i->realTail.assign(tailSize, 0);
+		i->complexTail.assign(tailSize, std::complex<float>(0,0));
+	}
+	complexState_ = allComplex_;
+}
+
+void FilterBank::drain()
+{
+	clearOutput();
+	reserveScratch();
+	if (complexState_)
+		flushComplexFrame();
+	else
+	{
+		//one last zero padded block takes the pending input and the tail with it
+		size_t numPending = realPending_.size();
+		float* time = &scratch_->realTime[0];
+		std::copy(realPending_.begin(), realPending_.end(), time);
+		std::fill(time+numPending, time+blockSize_, 0);
+		filterRealBlock(numPending+fftSize_-blockSize_);
+	}
+	flush();
+}
+
+void FilterBank::clearOutput()
+{
+	for (std::vector<Branch>::iterator i = branches_.begin(); i!=branches_.end(); i++)
+	{
+		i->realOut.clear();
+		i->complexOut.clear();
+	}
+}
+
+void FilterBank::newRealData(const float* in, size_t size)
+{
+	newRealSamples(in, size);
+}
+
+void FilterBank::newRealData(const short* in, size_t size)
+{
+	newRealSamples(in, size);
+}
+
+void FilterBank::newRealData(const double* in, size_t size)
+{
+	newRealSamples(in, size);
+}
+
+void FilterBank::newComplexData(const std::complex<float>* in, size_t size)
+{
+	newComplexSamples(reinterpret_cast<const float*>(in), size);
+}
+
+void FilterBank::newComplexData(const std::complex<short>* in, size_t size)
+{
+	newComplexSamples(reinterpret_cast<const short*>(in), size);
+}
+
+void FilterBank::newComplexData(const std::complex<double>* in, size_t size)
+{
+	newComplexSamples(reinterpret_cast<const double*>(in), size);
+}
+
+template<typename T>
+void FilterBank::newRealSamples(const T* in, size_t size)
+{
+	if (allComplex_)
+	{
+		//complex taps only - run the real data through the complex path
+		ComplexFFTWVector promoted(in, in+size);
+		newComplexSamples(promoted.empty() ? NULL : reinterpret_cast<const float*>(&promoted[0]), promoted.size());
+		return;
+	}
+	clearOutput();
+	reserveScratch();
+	if (complexState_)
+		flushComplexFrame();
+	float* time = &scratch_->realTime[0];
+	size_t pos=0;
+	while (pos!=size)
+	{
+		size_t num = std::min(blockSize_-realPending_.size(), size-pos);
+		if (realPending_.empty() && num==blockSize_)
+		{
+			//the input is converted to float as it is loaded
+			std::copy(in+pos, in+pos+num, time);
+		}
+		else
+		{
+			realPending_.insert(realPending_.end(), in+pos, in+pos+num);
+			if (realPending_.size()<blockSize_)
+				break;
+			std::copy(realPending_.begin(), realPending_.end(), time);
+			realPending_.clear();
+		}
+		pos+=num;
+		filterRealBlock(blockSize_);
+	}
+}
+
+template<typename T>
+void FilterBank::newComplexSamples(const T* in, size_t size)
+{
+	clearOutput();
+	if (!complexState_)
+	{
+		//carry on from where the real data left off
+		complexPending_.assign(realPending_.begin(), realPending_.end());
+		realPending_.clear();
+		for (std::vector<Branch>::iterator i = branches_.begin(); i!=branches_.end(); i++)
+		{
+			if (!i->spectrum->isComplex())
+			{
+				i->complexTail.assign(i->realTail.begin(), i->realTail.end());
+				std::fill(i->realTail.begin(), i->realTail.end(), 0);
+			}
+		}
+		complexState_ = true;
+	}
+	reserveScratch();
+	std::complex<float>* time = &scratch_->complexTime[0];
+	size_t pos=0;
+	while (pos!=size)
+	{
+		size_t num = std::min(blockSize_-complexPending_.size(), size-pos);
+		if (complexPending_.empty() && num==blockSize_)
+			loadComplex(in+2*pos, num, time);
+		else
+		{
+			appendComplex(complexPending_, in+2*pos, num);
+			if (complexPending_.size()<blockSize_)
+				break;
+			std::copy(complexPending_.begin(), complexPending_.end(), time);
+			complexPending_.clear();
+		}
+		pos+=num;
+		filterComplexBlock(blockSize_);
+	}
+}
+
+void FilterBank::flushComplexFrame()
+{
+	//finish the convolution of the complex data so far in one last zero padded block
+	size_t numPending = complexPending_.size();
+	std::complex<float>* time = &scratch_->complexTime[0];
+	std::copy(complexPending_.begin(), complexPending_.end(), time);
+	std::fill(time+numPending, time+blockSize_, std::complex<float>(0,0));
+	filterComplexBlock(numPending+fftSize_-blockSize_);
+	complexPending_.clear();
+	for (std::vector<Branch>::iterator i = branches_.begin(); i!=branches_.end(); i++)
+		std::fill(i->complexTail.begin(), i->complexTail.end(), std::complex<float>(0,0));
+	complexState_ = false;
+}
+
+void FilterBank::filterRealBlock(size_t numOut)
+{
+	//one forward fft for the whole bank
+	size_t numBins = fftSize_/2+1;
+	float* time = &scratch_->realTime[0];
+	std::complex<float>* freq = &scratch_->freq[0];
+	std::complex<float>* bankFreq = &scratch_->bankFreq[0];
+	std::fill(time+blockSize_, time+fftSize_, 0);
+	BlockTimer timer(times_);
+	plans_->forward(time, freq);
+	timer.lap(&FilterTimes::forwardTime);
+
+	if (!realBranches_.empty())
+	{
+		for (size_t j=0; j!=realBranches_.size(); j++)
+		{
+			const std::complex<float>* spectrum = &branches_[realBranches_[j]].spectrum->getSpectrum()[0];
+			std::complex<float>* product = &bankFreq[j*fftSize_];
+			for (size_t k=0; k!=numBins; k++)
+				product[k] = freq[k]*spectrum[k];
+		}
+		timer.lap(&FilterTimes::multiplyTime);
+		realBatch_->inverse(bankFreq, &scratch_->realOutTime[0]);
+		for (size_t j=0; j!=realBranches_.size(); j++)
+		{
+			Branch& branch = branches_[realBranches_[j]];
+			overlapAdd(&scratch_->realOutTime[j*fftSize_], fftSize_, blockSize_, numOut, branch.realTail, branch.realOut);
+		}
+		timer.lap(&FilterTimes::inverseTime);
+	}
+
+	if (!complexBranches_.empty())
+	{
+		//complex taps need the whole spectrum - the upper half of a real signal's spectrum
+		//mirrors the lower half
+		for (size_t k=numBins; k<fftSize_; k++)
+			freq[k] = std::conj(freq[fftSize_-k]);
+		for (size_t j=0; j!=complexBranches_.size(); j++)
+		{
+			const std::complex<float>* spectrum = &branches_[complexBranches_[j]].spectrum->getSpectrum()[0];
+			std::complex<float>* product = &bankFreq[j*fftSize_];
+			for (size_t k=0; k!=fftSize_; k++)
+				product[k] = freq[k]*spectrum[k];
+		}
+		timer.lap(&FilterTimes::multiplyTime);
+		complexBatch_->inverse(bankFreq, &scratch_->complexOutTime[0]);
+		for (size_t j=0; j!=complexBranches_.size(); j++)
+		{
+			Branch& branch = branches_[complexBranches_[j]];
+			overlapAdd(&scratch_->complexOutTime[j*fftSize_], fftSize_, blockSize_, numOut, branch.complexTail, branch.complexOut);
+		}
+		timer.lap(&FilterTimes::inverseTime);
+	}
+}
+
+void FilterBank::filterComplexBlock(size_t numOut)
+{
+	std::complex<float>* time = &scratch_->complexTime[0];
+	std::complex<float>* freq = &scratch_->freq[0];
+	std::complex<float>* bankFreq = &scratch_->bankFreq[0];
+	std::fill(time+blockSize_, time+fftSize_, std::complex<float>(0,0));
+	BlockTimer timer(times_);
+	plans_->forward(time, freq);
+	timer.lap(&FilterTimes::forwardTime);
+	for (size_t n=0; n!=branches_.size(); n++)
+	{
+		const std::complex<float>* spectrum = &branches_[n].spectrum->getSpectrum()[0];
+		std::complex<float>* product = &bankFreq[n*fftSize_];
+		for (size_t k=0; k!=fftSize_; k++)
+			product[k] = freq[k]*spectrum[k];
+	}
+	timer.lap(&FilterTimes::multiplyTime);
+	bankBatch_->inverse(bankFreq, &scratch_->complexOutTime[0]);
+	for (size_t n=0; n!=branches_.size(); n++)
+		overlapAdd(&scratch_->complexOutTime[n*fftSize_], fftSize_, blockSize_, numOut, branches_[n].complexTail, branches_[n].complexOut);
+	timer.lap(&FilterTimes::inverseTime);
+}
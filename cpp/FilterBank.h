@@ -0,0 +1,143 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+#ifndef FILTERBANK_H
+#define FILTERBANK_H
+
+#include "OverlapAddFilter.h"
+#include <vector>
+
+typedef std::vector<FilterSpectrumPtr> FilterSpectrumList;
+
+/**
+ * Per stream bank of overlap-add filters which share the forward fft of the input.
+ *
+ * Every filter in the bank must be an OVERLAP_ADD spectrum with the same fftSize and number
+ * of taps (pad shorter filters with zeros), so each block of input is transformed once and
+ * only the multiply and inverse fft are done per filter.  The inverse ffts for the whole bank
+ * are run as a batch out of one set of work buffers.
+ *
+ * Each filter has its own overlap tail and output vectors.  Real data through real taps
+ * gives real output and anything else gives complex output, as with OverlapAddFilter.  When
+ * real data follows complex data every filter flushes its complex state as a single complex
+ * frame first, unless every filter in the bank has complex taps in which case real data
+ * just goes through the complex path.
+ *
+ * The work buffers for the whole bank come from the FilterScratch passed in, as with
+ * OverlapAddFilter, so only the tails and pending input are kept per stream.
+ */
+class FilterBank
+{
+	public:
+		typedef OverlapAddFilter::realVector realVector;
+		typedef OverlapAddFilter::complexVector complexVector;
+
+		FilterBank(const FilterSpectrumList& spectra, FilterScratch* scratch=NULL);
+
+		//change the filters - state is kept if the fftSize and number of taps are unchanged
+		//and the bank starts over otherwise
+		void setSpectra(const FilterSpectrumList& spectra);
+		size_t size() const
+		{
+			return branches_.size();
+		}
+		//output of filter i for the last data
+		realVector& getRealOut(size_t i)
+		{
+			return branches_[i].realOut;
+		}
+		complexVector& getComplexOut(size_t i)
+		{
+			return branches_[i].complexOut;
+		}
+		//input samples held back waiting for the rest of their block
+		size_t getLatency() const
+		{
+			return complexState_ ? complexPending_.size() : realPending_.size();
+		}
+		//time each block into times, or stop timing with NULL
+		void setTimes(FilterTimes* times)
+		{
+			times_ = times;
+		}
+
+		void newRealData(const float* in, size_t size);
+		void newRealData(const short* in, size_t size);
+		void newRealData(const double* in, size_t size);
+		void newComplexData(const std::complex<float>* in, size_t size);
+		void newComplexData(const std::complex<short>* in, size_t size);
+		void newComplexData(const std::complex<double>* in, size_t size);
+
+		//throw away all filter state
+		void flush();
+		//push out the rest of each filter's output for the input so far and then start over
+		//as with flush
+		void drain();
+
+		//make the fft plans a bank of these filters will need so the first stream to use
+		//it doesn't have to
+		static void preparePlans(const FilterSpectrumList& spectra);
+
+	private:
+		struct Branch
+		{
+			FilterSpectrumPtr spectrum;
+			RealFFTWVector realTail;
+			ComplexFFTWVector complexTail;
+			realVector realOut;
+			complexVector complexOut;
+		};
+
+		template<typename T>
+		void newRealSamples(const T* in, size_t size);
+		template<typename T>
+		void newComplexSamples(const T* in, size_t size);
+		void clearOutput();
+		void flushComplexFrame();
+		void filterRealBlock(size_t numOut);
+		void filterComplexBlock(size_t numOut);
+		void reserveScratch();
+
+		FilterScratch* scratch_;
+		//only set if we weren't given one to share
+		boost::shared_ptr<FilterScratch> ownScratch_;
+		std::vector<Branch> branches_;
+		FftPlans::Ptr plans_;
+		size_t fftSize_;
+		size_t blockSize_;
+		//every filter has complex taps
+		bool allComplex_;
+
+		//true if the input so far has been complex
+		bool complexState_;
+		//input samples which have not yet filled a block
+		RealFFTWVector realPending_;
+		ComplexFFTWVector complexPending_;
+
+		//indexes of the filters with real and complex taps - real data through real taps can
+		//use the cheaper complex to real inverse
+		std::vector<size_t> realBranches_;
+		std::vector<size_t> complexBranches_;
+		FftPlans::BatchPtr realBatch_;
+		FftPlans::BatchPtr complexBatch_;
+		//every filter at once for complex data
+		FftPlans::BatchPtr bankBatch_;
+		//NULL unless the blocks are being timed
+		FilterTimes* times_;
+};
+
+#endif
@@ -0,0 +1,126 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+
+#include "FilterDesign.h"
+#include <algorithm>
+#include <cmath>
+
+namespace
+{
+	bool getFilterType(const std::string& name, FIRFilter::filter_type& type)
+	{
+		if (name=="lowpass")
+			type = FIRFilter::lowpass;
+		else if (name=="highpass")
+			type = FIRFilter::highpass;
+		else if (name=="bandpass")
+			type = FIRFilter::bandpass;
+		else if (name=="bandstop")
+			type = FIRFilter::bandstop;
+		else
+			return false;
+		return true;
+	}
+}
+
+bool FilterDesign::isFilterType(const std::string& type)
+{
+	FIRFilter::filter_type unused;
+	return getFilterType(type, unused);
+}
+
+template<typename T>
+bool FilterDesign::designTaps(T& taps, const TapCacheKey& key)
+{
+	taps.clear();
+	FIRFilter::filter_type type;
+	if (!getFilterType(key.type, type))
+		return false;
+	//we can only design the filter if we have a valid sampling rate
+	//use the interal filter designer to calculate the taps
+	size_t fftSizeInt(key.fftSize);
+	//with an automatic fftSize the filter length is only limited by the largest fft we allow
+	if (fftSizeInt==0)
+		fftSizeInt = MAX_AUTO_FFT_SIZE;
+	size_t minTaps = key.fftSize==0 ? size_t(10) : std::max(fftSizeInt/16,size_t(10));
+	size_t maxTaps = getMaxTapsSize(fftSizeInt);
+
+	std::vector<typename T::value_type> tmp;
+	designer_.wdfirHz(tmp,type,key.ripple, key.transitionWidth, key.freq1, key.freq2, key.sampleRate,minTaps,maxTaps);
+	taps.assign(tmp.begin(), tmp.end());
+	return !taps.empty();
+}
+
+size_t FilterDesign::fitFftSize(size_t fftSize, size_t partitionThreshold, size_t numTaps)
+{
+	//nothing to do if we pick the fftSize to suit the taps or the taps don't have to fit
+	if (fftSize==0 || (partitionThreshold!=0 && numTaps>partitionThreshold))
+		return fftSize;
+	while (2*(numTaps-1)>fftSize)
+		fftSize*=2;
+	return fftSize;
+}
+
+template<typename T>
+FilterSpectrumPtr FilterDesign::makeSpectrum(const T& taps, size_t configuredSize, bool lowLatency, size_t partitionThreshold, size_t maxLatency, bool resampling, bool frequencyOutput)
+{
+	//the resampler works in the time domain and short filters are cheaper without an fft at
+	//all - unless it is the filtered spectrum we are after
+	if (resampling || (!frequencyOutput && taps.size()<=OverlapAddFilter::getDirectCrossover()))
+		return FilterSpectrumPtr(new FilterSpectrum(taps, configuredSize, FilterSpectrum::DIRECT));
+	//long filters are split into partitions so the block size doesn't grow with the filter
+	bool partitioned = partitionThreshold!=0 && taps.size()>partitionThreshold;
+	size_t size = configuredSize;
+	if (size==0 && maxLatency!=0)
+	{
+		//the filter holds back up to a block less one sample - take the cheaper of a whole
+		//or partitioned filter with a small enough block
+		size_t maxBlockSize = maxLatency+1;
+		size_t wholeSize = partitioned ? 0 : FftPlans::chooseSize(taps.size(), lowLatency, false, maxBlockSize);
+		size_t partitionedSize = FftPlans::chooseSize(taps.size(), lowLatency, true, maxBlockSize);
+		double wholeCost = wholeSize!=0 ? FftPlans::filterCost(wholeSize, taps.size()) : HUGE_VAL;
+		double partitionedCost = partitionedSize!=0 ? FftPlans::partitionedFilterCost(partitionedSize, taps.size()) : HUGE_VAL;
+		if (!frequencyOutput && FftPlans::directFilterCost(taps.size())<std::min(wholeCost, partitionedCost))
+		{
+			//the direct filter never holds anything back, and with blocks this small it is
+			//cheaper than an fft anyway
+			return FilterSpectrumPtr(new FilterSpectrum(taps, configuredSize, FilterSpectrum::DIRECT));
+		}
+		if (wholeCost<=partitionedCost && wholeSize!=0)
+		{
+			size = wholeSize;
+			partitioned = false;
+		}
+		else if (partitionedSize!=0)
+		{
+			size = partitionedSize;
+			partitioned = true;
+		}
+		//otherwise no size is small enough and we fall back on the usual choice
+	}
+	if (size==0)
+		size = FftPlans::chooseSize(taps.size(), lowLatency, partitioned);
+	if (partitioned)
+		return FilterSpectrumPtr(new FilterSpectrum(taps, size, FilterSpectrum::PARTITIONED));
+	return FilterSpectrumPtr(new FilterSpectrum(taps, size));
+}
+
+template bool FilterDesign::designTaps(RealFFTWVector& taps, const TapCacheKey& key);
+template bool FilterDesign::designTaps(ComplexFFTWVector& taps, const TapCacheKey& key);
+template FilterSpectrumPtr FilterDesign::makeSpectrum(const RealFFTWVector& taps, size_t configuredSize, bool lowLatency, size_t partitionThreshold, size_t maxLatency, bool resampling, bool frequencyOutput);
+template FilterSpectrumPtr FilterDesign::makeSpectrum(const ComplexFFTWVector& taps, size_t configuredSize, bool lowLatency, size_t partitionThreshold, size_t maxLatency, bool resampling, bool frequencyOutput);
@@ -0,0 +1,63 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+#ifndef FILTERDESIGN_H
+#define FILTERDESIGN_H
+
+#include "OverlapAddFilter.h"
+#include "TapCache.h"
+#include "FirFilterDesigner.h"
+#include <string>
+
+/**
+ * Turns filter settings into the FilterSpectrum to run.
+ *
+ * This is how the component designs taps from filterProps and picks the method and fftSize
+ * for a set of taps, kept apart from the component so the offline tools run exactly the same
+ * filter.  Nothing in here needs REDHAWK and nothing is logged - callers can tell what was
+ * picked from the FilterSpectrum they get back.
+ *
+ * The designer keeps state between calls so designTaps() must not be called from two
+ * threads at once.
+ */
+class FilterDesign
+{
+	public:
+		//limits the length of designed filters when fftSize is 0
+		static const size_t MAX_AUTO_FFT_SIZE = 65536;
+
+		//true for the filter types designTaps() knows - lowpass, highpass, bandpass and bandstop
+		static bool isFilterType(const std::string& type);
+
+		//design taps for the filterProps fields of key at key.sampleRate - false if the type
+		//isn't known or no taps came out
+		template<typename T>
+		bool designTaps(T& taps, const TapCacheKey& key);
+
+		//the fftSize to use with numTaps manual taps - a configured fftSize is doubled until
+		//the taps fit unless it is chosen automatically (0) or the taps will be partitioned
+		static size_t fitFftSize(size_t fftSize, size_t partitionThreshold, size_t numTaps);
+
+		//the filter for a set of taps, with the fftSize chosen if configuredSize is 0
+		template<typename T>
+		static FilterSpectrumPtr makeSpectrum(const T& taps, size_t configuredSize, bool lowLatency, size_t partitionThreshold, size_t maxLatency, bool resampling, bool frequencyOutput);
+
+	private:
+		FirFilterDesigner designer_;
+};
+
+#endif
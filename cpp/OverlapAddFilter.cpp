@@ -0,0 +1,640 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+
+#include "OverlapAddFilter.h"
+#include "SampleConversion.h"
+#include <algorithm>
+#include <cmath>
+#include <cstdlib>
+#include <stdexcept>
+#include <time.h>
+
+namespace {
+	double getTime()
+	{
+		struct timespec ts;
+		clock_gettime(CLOCK_MONOTONIC, &ts);
+		return ts.tv_sec + 1e-9*ts.tv_nsec;
+	}
+}
+
+FilterSpectrum::FilterSpectrum(const RealFFTWVector& taps, size_t fftSize, Method method) :
+	complex_(false),
+	method_(method),
+	fftSize_(fftSize),
+	numPartitions_(1),
+	blockSize_(0),
+	realTaps_(taps)
+{
+	computeSpectrum();
+}
+
+FilterSpectrum::FilterSpectrum(const ComplexFFTWVector& taps, size_t fftSize, Method method) :
+	complex_(true),
+	method_(method),
+	fftSize_(fftSize),
+	numPartitions_(1),
+	blockSize_(0),
+	complexTaps_(taps)
+{
+	computeSpectrum();
+}
+
+void FilterSpectrum::computeSpectrum()
+{
+	size_t numTaps = getNumTaps();
+	size_t partitionSize = numTaps;
+	if (method_==DIRECT)
+	{
+		//the taps are all we need
+		if (numTaps==0)
+			throw std::invalid_argument("FilterSpectrum: direct filters need at least 1 tap");
+		fftSize_ = 0;
+		blockSize_ = 1;
+		return;
+	}
+	else if (method_==PARTITIONED)
+	{
+		if (numTaps==0 || fftSize_<2)
+			throw std::invalid_argument("FilterSpectrum: partitioned filters need at least 1 tap and an fftSize of at least 2");
+		//each block of input is convolved with a partition in a single fft
+		partitionSize = fftSize_/2;
+		numPartitions_ = (numTaps+partitionSize-1)/partitionSize;
+		blockSize_ = partitionSize;
+	}
+	else
+	{
+		if (numTaps==0 || numTaps>fftSize_)
+			throw std::invalid_argument("FilterSpectrum: number of taps must be between 1 and fftSize");
+		blockSize_ = fftSize_-numTaps+1;
+	}
+
+	ComplexFFTWVector time(fftSize_);
+	spectrum_.resize(numPartitions_*fftSize_);
+	FftPlans::Ptr plans = FftPlans::get(fftSize_);
+	for (size_t i=0; i!=numPartitions_; i++)
+	{
+		size_t first = i*partitionSize;
+		size_t last = std::min(first+partitionSize, numTaps);
+		std::fill(time.begin(), time.end(), std::complex<float>(0,0));
+		if (complex_)
+			std::copy(complexTaps_.begin()+first, complexTaps_.begin()+last, time.begin());
+		else
+			std::copy(realTaps_.begin()+first, realTaps_.begin()+last, time.begin());
+		plans->forward(&time[0], &spectrum_[i*fftSize_]);
+	}
+
+	//fold the inverse fft normalization into the spectrum
+	float scale = 1.0/fftSize_;
+	for (ComplexFFTWVector::iterator i = spectrum_.begin(); i!=spectrum_.end(); i++)
+		*i*=scale;
+}
+
+OverlapAddFilter::OverlapAddFilter(realVector& realOut, complexVector& complexOut, const FilterSpectrumPtr& spectrum, bool frequencyOutput, FilterScratch* scratch) :
+	realOut_(realOut),
+	complexOut_(complexOut),
+	scratch_(scratch),
+	spectrum_(spectrum),
+	frequencyOutput_(frequencyOutput),
+	complexState_(spectrum->isComplex()),
+	fdlPos_(0),
+	times_(NULL)
+{
+	if (!scratch_)
+	{
+		ownScratch_.reset(new FilterScratch());
+		scratch_ = ownScratch_.get();
+	}
+	resizeState();
+}
+
+void OverlapAddFilter::setSpectrum(const FilterSpectrumPtr& spectrum)
+{
+	spectrum_ = spectrum;
+	resizeState();
+}
+
+void OverlapAddFilter::resizeState()
+{
+	if (frequencyOutput_ && spectrum_->getMethod()==FilterSpectrum::DIRECT)
+		throw std::invalid_argument("OverlapAddFilter: frequency output needs an fft filter");
+	size_t fftSize = spectrum_->getFftSize();
+	size_t tailSize;
+	if (spectrum_->getMethod()==FilterSpectrum::DIRECT)
+		tailSize = spectrum_->getNumTaps()-1;
+	else
+	{
+		tailSize = fftSize-spectrum_->getBlockSize();
+		if (!plans_ || plans_->size()!=fftSize)
+			plans_ = FftPlans::get(fftSize);
+	}
+	realTail_.resize(tailSize, 0);
+	complexTail_.resize(tailSize, std::complex<float>(0,0));
+	size_t fdlSize = spectrum_->getNumPartitions()>1 ? spectrum_->getNumPartitions()*fftSize : 0;
+	if (fdl_.size()!=fdlSize)
+	{
+		//past spectra are only meaningful for the partitioning they were computed with
+		fdl_.assign(fdlSize, std::complex<float>(0,0));
+		fdlPos_ = 0;
+	}
+	if (spectrum_->isComplex())
+		promoteToComplex();
+}
+
+void OverlapAddFilter::flush()
+{
+	//give back the pending buffers too - they can grow to a whole block
+	RealFFTWVector().swap(realPending_);
+	ComplexFFTWVector().swap(complexPending_);
+	std::fill(realTail_.begin(), realTail_.end(), 0);
+	std::fill(complexTail_.begin(), complexTail_.end(), std::complex<float>(0,0));
+	std::fill(fdl_.begin(), fdl_.end(), std::complex<float>(0,0));
+	complexState_ = spectrum_->isComplex();
+}
+
+void OverlapAddFilter::newRealData(const float* in, size_t size)
+{
+	newRealSamples(in, size);
+}
+
+void OverlapAddFilter::newRealData(const short* in, size_t size)
+{
+	newRealSamples(in, size);
+}
+
+void OverlapAddFilter::newRealData(const double* in, size_t size)
+{
+	newRealSamples(in, size);
+}
+
+void OverlapAddFilter::newComplexData(const std::complex<float>* in, size_t size)
+{
+	newComplexSamples(reinterpret_cast<const float*>(in), size);
+}
+
+void OverlapAddFilter::newComplexData(const std::complex<short>* in, size_t size)
+{
+	newComplexSamples(reinterpret_cast<const short*>(in), size);
+}
+
+void OverlapAddFilter::newComplexData(const std::complex<double>* in, size_t size)
+{
+	newComplexSamples(reinterpret_cast<const double*>(in), size);
+}
+
+template<typename T>
+void OverlapAddFilter::newRealSamples(const T* in, size_t size)
+{
+	realOut_.clear();
+	complexOut_.clear();
+	if (spectrum_->isComplex() || (frequencyOutput_ && complexState_))
+	{
+		//complex taps - run the real data through the complex path.  The frames are
+		//complex either way so frequency output never needs to go back to real processing
+		ComplexFFTWVector promoted(in, in+size);
+		filterComplex(promoted.empty() ? NULL : reinterpret_cast<const float*>(&promoted[0]), promoted.size());
+	}
+	else
+	{
+		if (complexState_)
+			flushComplexFrame();
+		filterReal(in, size);
+	}
+}
+
+template<typename T>
+void OverlapAddFilter::newComplexSamples(const T* in, size_t size)
+{
+	realOut_.clear();
+	complexOut_.clear();
+	promoteToComplex();
+	filterComplex(in, size);
+}
+
+void OverlapAddFilter::promoteToComplex()
+{
+	if (!complexState_)
+	{
+		complexPending_.assign(realPending_.begin(), realPending_.end());
+		complexTail_.assign(realTail_.begin(), realTail_.end());
+		realPending_.clear();
+		std::fill(realTail_.begin(), realTail_.end(), 0);
+		//the delay line only holds the r2c half of each spectrum - fill in the rest
+		//from the symmetry of a real signal's spectrum
+		size_t fftSize = spectrum_->getFftSize();
+		for (size_t slot=0; slot < fdl_.size(); slot+=fftSize)
+		{
+			for (size_t k=fftSize/2+1; k<fftSize; k++)
+				fdl_[slot+k] = std::conj(fdl_[slot+fftSize-k]);
+		}
+		complexState_ = true;
+	}
+}
+
+void OverlapAddFilter::drain()
+{
+	realOut_.clear();
+	complexOut_.clear();
+	if (complexState_)
+		flushComplexFrame();
+	else
+		flushRealFrame();
+	flush();
+}
+
+void OverlapAddFilter::flushComplexFrame()
+{
+	//finish the convolution of the complex data we have seen so far and push it out
+	//so we can go back to real processing
+	filterComplex(static_cast<const float*>(NULL), 0);
+	size_t numPending = complexPending_.size();
+	bool haveState = numPending > 0;
+	for (size_t i=0; i!=complexTail_.size() && !haveState; i++)
+		haveState = complexTail_[i]!=std::complex<float>(0,0);
+	for (size_t i=0; i!=fdl_.size() && !haveState; i++)
+		haveState = fdl_[i]!=std::complex<float>(0,0);
+	if (haveState && spectrum_->getMethod()==FilterSpectrum::DIRECT)
+	{
+		//nothing is pending so the tail is the rest of the output
+		complexOut_.insert(complexOut_.end(), complexTail_.begin(), complexTail_.end());
+	}
+	else if (haveState)
+	{
+		//run zeros through the filter until the pending input has been convolved with every tap
+		size_t blockSize = spectrum_->getBlockSize();
+		ComplexFFTWVector zeros(blockSize, std::complex<float>(0,0));
+		const float* zero = reinterpret_cast<const float*>(&zeros[0]);
+		if (frequencyOutput_)
+		{
+			//each frame holds everything its block contributes so all that is left is the
+			//frame for the pending input and the rest of the delay line
+			if (numPending)
+				filterComplex(zero, blockSize-numPending);
+			for (size_t p=1; p<spectrum_->getNumPartitions(); p++)
+				filterComplex(zero, blockSize);
+		}
+		else
+		{
+			size_t numOut = complexOut_.size()+numPending+spectrum_->getNumTaps()-1;
+			filterComplex(zero, blockSize-numPending);
+			while (complexOut_.size() < numOut)
+				filterComplex(zero, blockSize);
+			complexOut_.resize(numOut);
+		}
+	}
+	complexPending_.clear();
+	std::fill(complexTail_.begin(), complexTail_.end(), std::complex<float>(0,0));
+	std::fill(fdl_.begin(), fdl_.end(), std::complex<float>(0,0));
+	complexState_ = false;
+}
+
+void OverlapAddFilter::flushRealFrame()
+{
+	//the same for real data - only needed to drain the filter
+	size_t numPending = realPending_.size();
+	bool haveState = numPending > 0;
+	for (size_t i=0; i!=realTail_.size() && !haveState; i++)
+		haveState = realTail_[i]!=0;
+	for (size_t i=0; i!=fdl_.size() && !haveState; i++)
+		haveState = fdl_[i]!=std::complex<float>(0,0);
+	if (haveState && spectrum_->getMethod()==FilterSpectrum::DIRECT)
+		realOut_.insert(realOut_.end(), realTail_.begin(), realTail_.end());
+	else if (haveState)
+	{
+		size_t blockSize = spectrum_->getBlockSize();
+		RealFFTWVector zeros(blockSize, 0);
+		if (frequencyOutput_)
+		{
+			if (numPending)
+				filterReal(&zeros[0], blockSize-numPending);
+			for (size_t p=1; p<spectrum_->getNumPartitions(); p++)
+				filterReal(&zeros[0], blockSize);
+		}
+		else
+		{
+			size_t numOut = realOut_.size()+numPending+spectrum_->getNumTaps()-1;
+			filterReal(&zeros[0], blockSize-numPending);
+			while (realOut_.size() < numOut)
+				filterReal(&zeros[0], blockSize);
+			realOut_.resize(numOut);
+		}
+	}
+	realPending_.clear();
+	std::fill(realTail_.begin(), realTail_.end(), 0);
+	std::fill(fdl_.begin(), fdl_.end(), std::complex<float>(0,0));
+}
+
+void OverlapAddFilter::multiplySpectrum(size_t numBins)
+{
+	//apply the filter to the block in the scratch spectrum - numBins is fftSize/2+1 for r2c spectra
+	size_t fftSize = spectrum_->getFftSize();
+	size_t numPartitions = spectrum_->getNumPartitions();
+	const std::complex<float>* spectrum = &spectrum_->getSpectrum()[0];
+	std::complex<float>* freq = &scratch_->freq[0];
+	if (numPartitions==1)
+	{
+		for (size_t k=0; k!=numBins; k++)
+			freq[k]*=spectrum[k];
+		return;
+	}
+	//push the new block onto the delay line and convolve the last numPartitions blocks
+	//with one partition each
+	fdlPos_ = (fdlPos_+numPartitions-1)%numPartitions;
+	std::copy(freq, freq+numBins, fdl_.begin()+fdlPos_*fftSize);
+	std::fill(freq, freq+numBins, std::complex<float>(0,0));
+	for (size_t p=0; p!=numPartitions; p++)
+	{
+		const std::complex<float>* block = &fdl_[((fdlPos_+p)%numPartitions)*fftSize];
+		const std::complex<float>* partition = spectrum+p*fftSize;
+		for (size_t k=0; k!=numBins; k++)
+			freq[k]+=block[k]*partition[k];
+	}
+}
+
+void OverlapAddFilter::appendFrame(size_t numBins)
+{
+	//the spectrum carries the 1/fftSize of the inverse fft we are skipping - take it back
+	//out so the frame is the fft of the block's output
+	size_t fftSize = spectrum_->getFftSize();
+	std::complex<float>* freq = &scratch_->freq[0];
+	float scale = fftSize;
+	for (size_t k=0; k!=numBins; k++)
+		freq[k]*=scale;
+	//fill in the negative frequencies of an r2c spectrum
+	for (size_t k=numBins; k<fftSize; k++)
+		freq[k] = std::conj(freq[fftSize-k]);
+	complexOut_.insert(complexOut_.end(), freq, freq+fftSize);
+}
+
+template<typename T>
+void OverlapAddFilter::filterReal(const T* in, size_t size)
+{
+	if (spectrum_->getMethod()==FilterSpectrum::DIRECT)
+	{
+		//anything left over from an fft filter goes first
+		if (!realPending_.empty())
+		{
+			RealFFTWVector pending;
+			pending.swap(realPending_);
+			directReal(&pending[0], pending.size());
+		}
+		directReal(in, size);
+		return;
+	}
+	size_t fftSize = spectrum_->getFftSize();
+	size_t tailSize = realTail_.size();
+	size_t blockSize = fftSize-tailSize;
+	size_t numBins = fftSize/2+1;
+	scratch_->reserve(fftSize);
+	float* time = &scratch_->realTime[0];
+	std::complex<float>* freq = &scratch_->freq[0];
+
+	//gather whole blocks - straight from the input when we can and via the pending buffer otherwise
+	size_t pos=0;
+	size_t pendingPos=0;
+	while (true)
+	{
+		if (realPending_.size()-pendingPos >= blockSize)
+		{
+			//left over from a shrinking fftSize
+			std::copy(realPending_.begin()+pendingPos, realPending_.begin()+pendingPos+blockSize, time);
+			pendingPos+=blockSize;
+		}
+		else if (realPending_.size()==pendingPos && size-pos >= blockSize)
+		{
+			//the input is converted to float as it is loaded
+			std::copy(in+pos, in+pos+blockSize, time);
+			pos+=blockSize;
+		}
+		else if (pos!=size)
+		{
+			size_t num = std::min(blockSize-(realPending_.size()-pendingPos), size-pos);
+			realPending_.insert(realPending_.end(), in+pos, in+pos+num);
+			pos+=num;
+			continue;
+		}
+		else
+			break;
+
+		std::fill(time+blockSize, time+fftSize, 0);
+		BlockTimer timer(times_);
+		plans_->forward(time, freq);
+		timer.lap(&FilterTimes::forwardTime);
+		multiplySpectrum(numBins);
+		timer.lap(&FilterTimes::multiplyTime);
+		if (frequencyOutput_)
+		{
+			appendFrame(numBins);
+			continue;
+		}
+		plans_->inverse(freq, time);
+		for (size_t i=0; i!=tailSize; i++)
+			time[i]+=realTail_[i];
+		realOut_.insert(realOut_.end(), time, time+blockSize);
+		std::copy(time+blockSize, time+fftSize, realTail_.begin());
+		timer.lap(&FilterTimes::inverseTime);
+	}
+	realPending_.erase(realPending_.begin(), realPending_.begin()+pendingPos);
+}
+
+template<typename T>
+void OverlapAddFilter::filterComplex(const T* in, size_t size)
+{
+	if (spectrum_->getMethod()==FilterSpectrum::DIRECT)
+	{
+		if (!complexPending_.empty())
+		{
+			ComplexFFTWVector pending;
+			pending.swap(complexPending_);
+			directComplex(reinterpret_cast<const float*>(&pending[0]), pending.size());
+		}
+		directComplex(in, size);
+		return;
+	}
+	size_t fftSize = spectrum_->getFftSize();
+	size_t tailSize = complexTail_.size();
+	size_t blockSize = fftSize-tailSize;
+	scratch_->reserve(fftSize);
+	std::complex<float>* time = &scratch_->complexTime[0];
+	std::complex<float>* freq = &scratch_->freq[0];
+
+	size_t pos=0;
+	size_t pendingPos=0;
+	while (true)
+	{
+		if (complexPending_.size()-pendingPos >= blockSize)
+		{
+			std::copy(complexPending_.begin()+pendingPos, complexPending_.begin()+pendingPos+blockSize, time);
+			pendingPos+=blockSize;
+		}
+		else if (complexPending_.size()==pendingPos && size-pos >= blockSize)
+		{
+			loadComplex(in+2*pos, blockSize, time);
+			pos+=blockSize;
+		}
+		else if (pos!=size)
+		{
+			size_t num = std::min(blockSize-(complexPending_.size()-pendingPos), size-pos);
+			appendComplex(complexPending_, in+2*pos, num);
+			pos+=num;
+			continue;
+		}
+		else
+			break;
+
+		std::fill(time+blockSize, time+fftSize, std::complex<float>(0,0));
+		BlockTimer timer(times_);
+		plans_->forward(time, freq);
+		timer.lap(&FilterTimes::forwardTime);
+		multiplySpectrum(fftSize);
+		timer.lap(&FilterTimes::multiplyTime);
+		if (frequencyOutput_)
+		{
+			appendFrame(fftSize);
+			continue;
+		}
+		plans_->inverse(freq, time);
+		for (size_t i=0; i!=tailSize; i++)
+			time[i]+=complexTail_[i];
+		complexOut_.insert(complexOut_.end(), time, time+blockSize);
+		std::copy(time+blockSize, time+fftSize, complexTail_.begin());
+		timer.lap(&FilterTimes::inverseTime);
+	}
+	complexPending_.erase(complexPending_.begin(), complexPending_.begin()+pendingPos);
+}
+
+template<typename T>
+void OverlapAddFilter::directReal(const T* in, size_t size)
+{
+	const float* taps = &spectrum_->getRealTaps()[0];
+	size_t numTaps = spectrum_->getNumTaps();
+	size_t tailSize = realTail_.size();
+	scratch_->reserve(DIRECT_CHUNK_SIZE+tailSize);
+	float* acc = &scratch_->realTime[0];
+	for (size_t pos=0; pos<size; pos+=DIRECT_CHUNK_SIZE)
+	{
+		BlockTimer timer(times_);
+		size_t num = std::min(DIRECT_CHUNK_SIZE, size-pos);
+		//every sample is read once per tap so convert the chunk up front
+		const float* x = asFloat(in+pos, num, scratch_->convert);
+		std::copy(realTail_.begin(), realTail_.end(), acc);
+		std::fill(acc+tailSize, acc+tailSize+num, 0);
+		//scatter each tap over the whole chunk - the inner loop is a plain multiply-add over
+		//contiguous memory which the compiler turns into simd instructions
+		for (size_t k=0; k!=numTaps; k++)
+		{
+			float h = taps[k];
+			float* y = acc+k;
+			for (size_t i=0; i!=num; i++)
+				y[i]+=h*x[i];
+		}
+		realOut_.insert(realOut_.end(), acc, acc+num);
+		std::copy(acc+num, acc+num+tailSize, realTail_.begin());
+		timer.lap(&FilterTimes::multiplyTime);
+	}
+}
+
+template<typename T>
+void OverlapAddFilter::directComplex(const T* in, size_t size)
+{
+	size_t numTaps = spectrum_->getNumTaps();
+	size_t tailSize = complexTail_.size();
+	scratch_->reserve(DIRECT_CHUNK_SIZE+tailSize);
+	std::complex<float>* acc = &scratch_->complexTime[0];
+	for (size_t pos=0; pos<size; pos+=DIRECT_CHUNK_SIZE)
+	{
+		BlockTimer timer(times_);
+		size_t num = std::min(DIRECT_CHUNK_SIZE, size-pos);
+		std::copy(complexTail_.begin(), complexTail_.end(), acc);
+		std::fill(acc+tailSize, acc+tailSize+num, std::complex<float>(0,0));
+		//work on the interleaved floats so the compiler doesn't have to deal with std::complex
+		const float* x = asFloat(in+2*pos, 2*num, scratch_->convert);
+		if (spectrum_->isComplex())
+		{
+			const float* taps = reinterpret_cast<const float*>(&spectrum_->getComplexTaps()[0]);
+			for (size_t k=0; k!=numTaps; k++)
+			{
+				float hr = taps[2*k];
+				float hi = taps[2*k+1];
+				float* y = reinterpret_cast<float*>(acc+k);
+				for (size_t i=0; i!=2*num; i+=2)
+				{
+					y[i]+=hr*x[i]-hi*x[i+1];
+					y[i+1]+=hr*x[i+1]+hi*x[i];
+				}
+			}
+		}
+		else
+		{
+			//real taps scale the real and imaginary parts alike
+			const float* taps = &spectrum_->getRealTaps()[0];
+			for (size_t k=0; k!=numTaps; k++)
+			{
+				float h = taps[k];
+				float* y = reinterpret_cast<float*>(acc+k);
+				for (size_t i=0; i!=2*num; i++)
+					y[i]+=h*x[i];
+			}
+		}
+		complexOut_.insert(complexOut_.end(), acc, acc+num);
+		std::copy(acc+num, acc+num+tailSize, complexTail_.begin());
+		timer.lap(&FilterTimes::multiplyTime);
+	}
+}
+
+size_t OverlapAddFilter::getDirectCrossover()
+{
+	static boost::mutex lock;
+	static size_t crossover = 0;
+	boost::mutex::scoped_lock scopedLock(lock);
+	if (crossover!=0)
+		return crossover;
+
+	//time both methods on the same noise and stop at the first filter length where the fft wins
+	const size_t numSamples = 16*DIRECT_CHUNK_SIZE;
+	const size_t taps[] = {4, 8, 12, 16, 24, 32, 48, 64, 96, 128, 192, 256};
+	RealFFTWVector data(numSamples);
+	for (size_t i=0; i!=numSamples; i++)
+		data[i] = float(rand())/RAND_MAX-0.5;
+	realVector realOut;
+	complexVector complexOut;
+	crossover = 1;
+	for (size_t i=0; i!=sizeof(taps)/sizeof(taps[0]); i++)
+	{
+		RealFFTWVector h(data.begin(), data.begin()+taps[i]);
+		double time[2];
+		FilterSpectrum::Method methods[2] = {FilterSpectrum::DIRECT, FilterSpectrum::OVERLAP_ADD};
+		for (size_t m=0; m!=2; m++)
+		{
+			FilterSpectrumPtr spectrum(new FilterSpectrum(h, FftPlans::chooseSize(taps[i], false), methods[m]));
+			OverlapAddFilter filter(realOut, complexOut, spectrum);
+			//best of a few runs to keep scheduling noise out of it
+			time[m] = HUGE_VAL;
+			for (size_t run=0; run!=3; run++)
+			{
+				double start = getTime();
+				filter.newRealData(data);
+				time[m] = std::min(time[m], getTime()-start);
+			}
+		}
+		if (time[0] > time[1])
+			break;
+		crossover = taps[i];
+	}
+	return crossover;
+}
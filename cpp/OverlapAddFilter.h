@@ -0,0 +1,350 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+#ifndef OVERLAPADDFILTER_H
+#define OVERLAPADDFILTER_H
+
+#include "firfilter.h"
+#include "FftPlans.h"
+#include <boost/shared_ptr.hpp>
+#include <time.h>
+
+/**
+ * An immutable set of filter taps together with their frequency response for one fftSize.
+ *
+ * The spectrum is the fft of the zero padded taps scaled by 1/fftSize so the inverse
+ * fft in the filter does not need a separate normalization pass.  Once built a
+ * FilterSpectrum is never modified, so a single instance can be shared by every stream
+ * which uses the same filter.
+ *
+ * A partitioned spectrum splits the taps into partitions of fftSize/2 taps and holds the
+ * spectrum of each one back to back.  The filter then works in blocks of fftSize/2 samples
+ * regardless of the number of taps, so the taps no longer need to fit in the fft.
+ *
+ * A direct filter has no spectrum at all - short filters are cheaper to convolve in the
+ * time domain than to run through an fft.
+ */
+class FilterSpectrum
+{
+	public:
+		enum Method
+		{
+			OVERLAP_ADD,
+			PARTITIONED,
+			DIRECT
+		};
+
+		FilterSpectrum(const RealFFTWVector& taps, size_t fftSize, Method method=OVERLAP_ADD);
+		FilterSpectrum(const ComplexFFTWVector& taps, size_t fftSize, Method method=OVERLAP_ADD);
+
+		bool isComplex() const
+		{
+			return complex_;
+		}
+		Method getMethod() const
+		{
+			return method_;
+		}
+		size_t getNumTaps() const
+		{
+			return complex_ ? complexTaps_.size() : realTaps_.size();
+		}
+		size_t getFftSize() const
+		{
+			return fftSize_;
+		}
+		size_t getNumPartitions() const
+		{
+			return numPartitions_;
+		}
+		//number of new input samples which go into each fft
+		size_t getBlockSize() const
+		{
+			return blockSize_;
+		}
+		const RealFFTWVector& getRealTaps() const
+		{
+			return realTaps_;
+		}
+		const ComplexFFTWVector& getComplexTaps() const
+		{
+			return complexTaps_;
+		}
+		//full fftSize spectrum of each partition - for real taps the first fftSize/2+1 bins
+		//of each are the r2c spectrum
+		const ComplexFFTWVector& getSpectrum() const
+		{
+			return spectrum_;
+		}
+
+	private:
+		void computeSpectrum();
+
+		bool complex_;
+		Method method_;
+		size_t fftSize_;
+		size_t numPartitions_;
+		size_t blockSize_;
+		RealFFTWVector realTaps_;
+		ComplexFFTWVector complexTaps_;
+		ComplexFFTWVector spectrum_;
+};
+
+typedef boost::shared_ptr<const FilterSpectrum> FilterSpectrumPtr;
+
+/**
+ * Work buffers for filtering a block of samples.
+ *
+ * Nothing in here carries over from one call to the next, so every filter run by the same
+ * thread can share a single FilterScratch and a stream's own memory is just its filter state.
+ * The buffers grow to fit the largest filter they have been used with and are never shrunk.
+ */
+struct FilterScratch
+{
+	//make sure the fft buffers hold at least size samples
+	void reserve(size_t size)
+	{
+		if (realTime.size()<size)
+		{
+			realTime.resize(size);
+			complexTime.resize(size);
+			freq.resize(size);
+		}
+	}
+
+	//the block being filtered and its spectrum - the direct filter accumulates into the time buffers
+	RealFFTWVector realTime;
+	ComplexFFTWVector complexTime;
+	ComplexFFTWVector freq;
+	//input converted to float for the direct filter
+	RealFFTWVector convert;
+	//the filtered spectra of a filter bank and their inverse ffts
+	ComplexFFTWVector bankFreq;
+	RealFFTWVector realOutTime;
+	ComplexFFTWVector complexOutTime;
+	//history followed by the new input for a polyphase filter
+	RealFFTWVector realWork;
+	ComplexFFTWVector complexWork;
+};
+
+/**
+ * Where a filter's time goes, block by block, for the component's statistics.
+ */
+struct FilterTimes
+{
+	FilterTimes() :
+		blocks(0),
+		forwardTime(0),
+		multiplyTime(0),
+		inverseTime(0)
+	{
+	}
+
+	unsigned long long blocks;
+	//seconds in the forward fft, multiplying by the spectrum (or convolving for a direct
+	//filter or resampling for a polyphase one) and in the inverse fft and overlap-add
+	double forwardTime;
+	double multiplyTime;
+	double inverseTime;
+};
+
+/**
+ * Times one block of a filter into a FilterTimes.  Each lap adds the time since the last
+ * one to a stage's total.  Without a FilterTimes it never reads the clock, so timing can
+ * be turned off for free.
+ */
+class BlockTimer
+{
+	public:
+		BlockTimer(FilterTimes* times) :
+			times_(times),
+			last_(0)
+		{
+			if (times_)
+			{
+				times_->blocks++;
+				last_ = now();
+			}
+		}
+		void lap(double FilterTimes::*total)
+		{
+			if (times_)
+			{
+				double t = now();
+				times_->*total += t-last_;
+				last_ = t;
+			}
+		}
+		//seconds on a clock which never jumps and is cheap to read
+		static double now()
+		{
+			struct timespec ts;
+			clock_gettime(CLOCK_MONOTONIC, &ts);
+			return ts.tv_sec+1e-9*ts.tv_nsec;
+		}
+
+	private:
+		FilterTimes* times_;
+		double last_;
+};
+
+/**
+ * Per stream overlap-add fir filter.
+ *
+ * This is a drop in replacement for the fftlib firfilter except that it does not own its
+ * taps - it filters with a shared FilterSpectrum so designing and transforming a filter
+ * is done once regardless of how many streams use it.  The only per stream state is the
+ * partial input block and the overlap tail, plus the spectra of the last few input blocks
+ * (the frequency domain delay line) for a partitioned filter.
+ *
+ * Outputs are written to the realOut/complexOut vectors supplied at construction.  Real
+ * data filtered with real taps produces real output, anything else produces complex
+ * output.  If real data arrives while the filter still holds complex state, that state
+ * is flushed out as a single complex frame before the real data is processed.
+ *
+ * With frequency output the filter stops short of the inverse fft - each block's filtered
+ * spectrum is appended to complexOut as a frame of fftSize bins in fft order, the fft of
+ * the fftSize output samples that block contributes.  Inverse transforming the frames and
+ * overlap-adding them getBlockSize() samples apart gives the time domain output.  Frames
+ * are always complex and full length, even for real data through real taps, and the
+ * filter needs a spectrum so the DIRECT method can't be used.
+ *
+ * The fft work buffers come from the FilterScratch passed in, which may be shared with other
+ * filters used by the same thread.  Without one the filter makes its own.
+ */
+class OverlapAddFilter
+{
+	public:
+		typedef firfilter::realVector realVector;
+		typedef firfilter::complexVector complexVector;
+
+		OverlapAddFilter(realVector& realOut, complexVector& complexOut, const FilterSpectrumPtr& spectrum, bool frequencyOutput=false, FilterScratch* scratch=NULL);
+
+		//change the filter - state is carried over so there is no discontinuity in the output
+		//unless the partitioning changes, which starts the delay line over
+		void setSpectrum(const FilterSpectrumPtr& spectrum);
+		const FilterSpectrumPtr& getSpectrum() const
+		{
+			return spectrum_;
+		}
+		size_t getNumTaps() const
+		{
+			return spectrum_->getNumTaps();
+		}
+		size_t getFftSize() const
+		{
+			return spectrum_->getFftSize();
+		}
+		bool isFrequencyOutput() const
+		{
+			return frequencyOutput_;
+		}
+		//input samples held back waiting for the rest of their block - the output is this
+		//far behind the input
+		size_t getLatency() const
+		{
+			return complexState_ ? complexPending_.size() : realPending_.size();
+		}
+		//time each block into times, or stop timing with NULL
+		void setTimes(FilterTimes* times)
+		{
+			times_ = times;
+		}
+
+		template<typename T>
+		void newRealData(const std::vector<float, T>& in)
+		{
+			newRealData(in.empty() ? NULL : &in[0], in.size());
+		}
+		template<typename T>
+		void newComplexData(const std::vector<std::complex<float>, T>& in)
+		{
+			newComplexData(in.empty() ? NULL : &in[0], in.size());
+		}
+		//short and double samples are converted as they are loaded into the filter
+		void newRealData(const float* in, size_t size);
+		void newRealData(const short* in, size_t size);
+		void newRealData(const double* in, size_t size);
+		void newComplexData(const std::complex<float>* in, size_t size);
+		void newComplexData(const std::complex<short>* in, size_t size);
+		void newComplexData(const std::complex<double>* in, size_t size);
+
+		//throw away all filter state
+		void flush();
+		//push out the rest of the convolution of the input so far - the pending input and the
+		//overlap tail - and then start over as with flush
+		void drain();
+
+		/**
+		 * The longest filter which is cheaper to run directly than through an fft.
+		 *
+		 * This is measured the first time it is asked for by timing both methods on a
+		 * block of noise for increasing numbers of taps.
+		 */
+		static size_t getDirectCrossover();
+
+	private:
+		void promoteToComplex();
+		void flushComplexFrame();
+		void flushRealFrame();
+		void resizeState();
+		//complex input is passed as interleaved scalars so it can be of any sample type
+		template<typename T>
+		void newRealSamples(const T* in, size_t size);
+		template<typename T>
+		void newComplexSamples(const T* in, size_t size);
+		template<typename T>
+		void filterReal(const T* in, size_t size);
+		template<typename T>
+		void filterComplex(const T* in, size_t size);
+		void multiplySpectrum(size_t numBins);
+		void appendFrame(size_t numBins);
+		template<typename T>
+		void directReal(const T* in, size_t size);
+		template<typename T>
+		void directComplex(const T* in, size_t size);
+
+		//samples convolved at a time by the direct filter - keeps the work buffer in cache
+		static const size_t DIRECT_CHUNK_SIZE = 2048;
+
+		realVector& realOut_;
+		complexVector& complexOut_;
+		FilterScratch* scratch_;
+		//only set if we weren't given one to share
+		boost::shared_ptr<FilterScratch> ownScratch_;
+		FilterSpectrumPtr spectrum_;
+		FftPlans::Ptr plans_;
+		//push filtered spectra rather than samples
+		bool frequencyOutput_;
+
+		//true if the filter state is complex
+		bool complexState_;
+		//input samples which have not yet filled a block
+		RealFFTWVector realPending_;
+		ComplexFFTWVector complexPending_;
+		//overlap from the previous block - numTaps-1 samples or a partition for a partitioned filter
+		//(the direct filter keeps the same numTaps-1 samples so it can take over from an fft)
+		RealFFTWVector realTail_;
+		ComplexFFTWVector complexTail_;
+		//input block spectra for a partitioned filter - slot fdlPos_ is the newest
+		ComplexFFTWVector fdl_;
+		size_t fdlPos_;
+		//NULL unless the blocks are being timed
+		FilterTimes* times_;
+};
+
+#endif
@@ -0,0 +1,91 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+
+#include "PeakDetector.h"
+#include <algorithm>
+#include <cmath>
+
+PeakDetector::PeakDetector(const Settings& settings) :
+	settings_(settings),
+	count_(0),
+	noise_(0),
+	havePeak_(false)
+{
+}
+
+void PeakDetector::setSettings(const Settings& settings)
+{
+	settings_ = settings;
+}
+
+void PeakDetector::newRealData(const float* in, size_t size, DetectionList& out)
+{
+	for (size_t i=0; i!=size; i++)
+		newSample(std::fabs(in[i]), in[i]<0 ? M_PI : 0, out);
+}
+
+void PeakDetector::newComplexData(const std::complex<float>* in, size_t size, DetectionList& out)
+{
+	for (size_t i=0; i!=size; i++)
+		newSample(std::abs(in[i]), std::arg(in[i]), out);
+}
+
+void PeakDetector::skip(size_t size)
+{
+	havePeak_ = false;
+	count_ += size;
+}
+
+void PeakDetector::flush(DetectionList& out)
+{
+	if (havePeak_)
+		out.push_back(peak_);
+	havePeak_ = false;
+}
+
+void PeakDetector::newSample(float magnitude, float phase, DetectionList& out)
+{
+	size_t minSeparation = std::max(settings_.minSeparation, size_t(1));
+	if (havePeak_ && count_ >= peak_.index+minSeparation)
+	{
+		//nothing bigger turned up close enough to replace it
+		out.push_back(peak_);
+		havePeak_ = false;
+	}
+
+	bool detected;
+	if (settings_.cfar)
+	{
+		//the sample under test is compared against the noise before it is added in
+		size_t window = std::max(settings_.noiseWindow, size_t(1));
+		detected = count_ >= window && magnitude > settings_.threshold*noise_;
+		//a plain average until the window fills, then an exponential one
+		noise_ += (magnitude-noise_)/std::min(double(count_+1), double(window));
+	}
+	else
+		detected = magnitude > settings_.threshold;
+
+	if (detected && (!havePeak_ || magnitude > peak_.magnitude))
+	{
+		peak_.index = count_;
+		peak_.magnitude = magnitude;
+		peak_.phase = phase;
+		havePeak_ = true;
+	}
+	count_++;
+}
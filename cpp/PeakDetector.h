@@ -0,0 +1,96 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+#ifndef PEAKDETECTOR_H
+#define PEAKDETECTOR_H
+
+#include <complex>
+#include <vector>
+#include <cstddef>
+
+/**
+ * Per stream peak picker for correlation output.
+ *
+ * A sample is a detection candidate when its magnitude is above the threshold - either an
+ * absolute level or, in cfar mode, a multiple of a running average of the magnitude which
+ * stands in for the noise floor.  Of the candidates within minSeparation samples of each
+ * other only the largest is reported, so a peak is only final once minSeparation samples
+ * have gone by without a larger one.
+ *
+ * Samples are numbered from the start of the stream so detections can be reported by index
+ * regardless of how the data was split into packets.
+ */
+class PeakDetector
+{
+	public:
+		struct Settings
+		{
+			Settings() :
+				cfar(false),
+				threshold(1.0),
+				noiseWindow(1024),
+				minSeparation(1)
+			{
+			}
+
+			//threshold is a multiple of the noise estimate rather than a magnitude
+			bool cfar;
+			float threshold;
+			//samples in the running noise average - no cfar detections until this many are seen
+			size_t noiseWindow;
+			size_t minSeparation;
+		};
+
+		struct Detection
+		{
+			unsigned long long index;
+			float magnitude;
+			float phase;
+		};
+		typedef std::vector<Detection> DetectionList;
+
+		PeakDetector(const Settings& settings=Settings());
+
+		//takes effect from the next sample - the noise estimate and any pending peak are kept
+		void setSettings(const Settings& settings);
+
+		//detections which become final are appended to out
+		void newRealData(const float* in, size_t size, DetectionList& out);
+		void newComplexData(const std::complex<float>* in, size_t size, DetectionList& out);
+		//count samples which were not looked at - any pending peak is dropped
+		void skip(size_t size);
+		//report the pending peak without waiting for minSeparation more samples - use at the
+		//end of a stream
+		void flush(DetectionList& out);
+
+		//number of samples seen so far - the index of the next sample
+		unsigned long long getCount() const
+		{
+			return count_;
+		}
+
+	private:
+		void newSample(float magnitude, float phase, DetectionList& out);
+
+		Settings settings_;
+		unsigned long long count_;
+		double noise_;
+		bool havePeak_;
+		Detection peak_;
+};
+
+#endif
@@ -0,0 +1,223 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+
+#include "PolyphaseFilter.h"
+#include "SampleConversion.h"
+#include <algorithm>
+#include <stdexcept>
+
+namespace {
+	//compute every output which falls inside the new input - work holds branchSize-1 samples of
+	//history followed by numIn new samples
+	template<typename Tap, typename Sample, typename Out>
+	void resample(const Tap* branches, size_t branchSize, const Sample* work, size_t numIn,
+	              size_t interpolation, size_t decimation, size_t& phase, Out& out)
+	{
+		size_t end = interpolation*numIn;
+		if (phase<end)
+			out.reserve(out.size()+(end-phase+decimation-1)/decimation);
+		for (; phase<end; phase+=decimation)
+		{
+			const Tap* h = branches+(phase%interpolation)*branchSize;
+			const Sample* x = work+phase/interpolation;
+			typename Out::value_type acc(0);
+			for (size_t j=0; j!=branchSize; j++)
+				acc+=h[j]*x[j];
+			out.push_back(acc);
+		}
+		phase-=end;
+	}
+
+	//keep the most recent history samples when the history length changes
+	template<typename T>
+	void resizeHistory(T& work, size_t size)
+	{
+		if (work.size()>size)
+			work.erase(work.begin(), work.end()-size);
+		else
+			work.insert(work.begin(), size-work.size(), typename T::value_type(0));
+	}
+}
+
+PolyphaseFilter::PolyphaseFilter(realVector& realOut, complexVector& complexOut, const FilterSpectrumPtr& spectrum, size_t interpolation, size_t decimation, FilterScratch* scratch) :
+	realOut_(realOut),
+	complexOut_(complexOut),
+	scratch_(scratch),
+	spectrum_(spectrum),
+	interpolation_(interpolation),
+	decimation_(decimation),
+	branchSize_(0),
+	complexState_(spectrum->isComplex()),
+	phase_(0),
+	times_(NULL)
+{
+	if (interpolation==0 || decimation==0)
+		throw std::invalid_argument("PolyphaseFilter: interpolation and decimation must be at least 1");
+	if (!scratch_)
+	{
+		ownScratch_.reset(new FilterScratch());
+		scratch_ = ownScratch_.get();
+	}
+	buildBranches();
+}
+
+void PolyphaseFilter::setSpectrum(const FilterSpectrumPtr& spectrum)
+{
+	spectrum_ = spectrum;
+	buildBranches();
+}
+
+void PolyphaseFilter::buildBranches()
+{
+	size_t numTaps = spectrum_->getNumTaps();
+	branchSize_ = (numTaps+interpolation_-1)/interpolation_;
+	//tap p+j*interpolation belongs to branch p - missing taps at the end are zero
+	if (spectrum_->isComplex())
+	{
+		const ComplexFFTWVector& taps = spectrum_->getComplexTaps();
+		complexBranches_.assign(interpolation_*branchSize_, std::complex<float>(0,0));
+		for (size_t k=0; k!=numTaps; k++)
+			complexBranches_[(k%interpolation_)*branchSize_+branchSize_-1-k/interpolation_] = taps[k]*float(interpolation_);
+		realBranches_.clear();
+	}
+	else
+	{
+		const RealFFTWVector& taps = spectrum_->getRealTaps();
+		realBranches_.assign(interpolation_*branchSize_, 0);
+		for (size_t k=0; k!=numTaps; k++)
+			realBranches_[(k%interpolation_)*branchSize_+branchSize_-1-k/interpolation_] = taps[k]*interpolation_;
+		complexBranches_.clear();
+	}
+	resizeHistory(realHistory_, branchSize_-1);
+	resizeHistory(complexHistory_, branchSize_-1);
+	if (spectrum_->isComplex() && !complexState_)
+	{
+		complexHistory_.assign(realHistory_.begin(), realHistory_.end());
+		complexState_ = true;
+	}
+}
+
+void PolyphaseFilter::flush()
+{
+	std::fill(realHistory_.begin(), realHistory_.end(), 0);
+	std::fill(complexHistory_.begin(), complexHistory_.end(), std::complex<float>(0,0));
+	complexState_ = spectrum_->isComplex();
+	phase_ = 0;
+}
+
+void PolyphaseFilter::drain()
+{
+	//run zeros in until the last input sample has gone past every tap
+	size_t numZeros = branchSize_-1;
+	if (complexState_)
+	{
+		ComplexFFTWVector zeros(numZeros, std::complex<float>(0,0));
+		newComplexData(zeros.empty() ? NULL : &zeros[0], numZeros);
+	}
+	else
+	{
+		RealFFTWVector zeros(numZeros, 0);
+		newRealData(zeros.empty() ? NULL : &zeros[0], numZeros);
+	}
+	flush();
+}
+
+void PolyphaseFilter::newRealData(const float* in, size_t size)
+{
+	newRealSamples(in, size);
+}
+
+void PolyphaseFilter::newRealData(const short* in, size_t size)
+{
+	newRealSamples(in, size);
+}
+
+void PolyphaseFilter::newRealData(const double* in, size_t size)
+{
+	newRealSamples(in, size);
+}
+
+void PolyphaseFilter::newComplexData(const std::complex<float>* in, size_t size)
+{
+	newComplexSamples(reinterpret_cast<const float*>(in), size);
+}
+
+void PolyphaseFilter::newComplexData(const std::complex<short>* in, size_t size)
+{
+	newComplexSamples(reinterpret_cast<const short*>(in), size);
+}
+
+void PolyphaseFilter::newComplexData(const std::complex<double>* in, size_t size)
+{
+	newComplexSamples(reinterpret_cast<const double*>(in), size);
+}
+
+template<typename T>
+void PolyphaseFilter::newRealSamples(const T* in, size_t size)
+{
+	if (spectrum_->isComplex())
+	{
+		//complex taps - run the real data through the complex path
+		ComplexFFTWVector promoted(in, in+size);
+		newComplexSamples(promoted.empty() ? NULL : reinterpret_cast<const float*>(&promoted[0]), promoted.size());
+		return;
+	}
+	realOut_.clear();
+	complexOut_.clear();
+	if (complexState_)
+	{
+		for (size_t i=0; i!=complexHistory_.size(); i++)
+			realHistory_[i] = complexHistory_[i].real();
+		complexState_ = false;
+	}
+	if (size==0)
+		return;
+	//each packet counts as one block, all of it multiplying
+	BlockTimer timer(times_);
+	//the input is converted to float as it is appended to the history
+	RealFFTWVector& work = scratch_->realWork;
+	work.assign(realHistory_.begin(), realHistory_.end());
+	work.insert(work.end(), in, in+size);
+	resample(&realBranches_[0], branchSize_, &work[0], size, interpolation_, decimation_, phase_, realOut_);
+	std::copy(work.end()-realHistory_.size(), work.end(), realHistory_.begin());
+	timer.lap(&FilterTimes::multiplyTime);
+}
+
+template<typename T>
+void PolyphaseFilter::newComplexSamples(const T* in, size_t size)
+{
+	realOut_.clear();
+	complexOut_.clear();
+	if (!complexState_)
+	{
+		complexHistory_.assign(realHistory_.begin(), realHistory_.end());
+		complexState_ = true;
+	}
+	if (size==0)
+		return;
+	BlockTimer timer(times_);
+	ComplexFFTWVector& work = scratch_->complexWork;
+	work.assign(complexHistory_.begin(), complexHistory_.end());
+	appendComplex(work, in, size);
+	if (spectrum_->isComplex())
+		resample(&complexBranches_[0], branchSize_, &work[0], size, interpolation_, decimation_, phase_, complexOut_);
+	else
+		resample(&realBranches_[0], branchSize_, &work[0], size, interpolation_, decimation_, phase_, complexOut_);
+	std::copy(work.end()-complexHistory_.size(), work.end(), complexHistory_.begin());
+	timer.lap(&FilterTimes::multiplyTime);
+}
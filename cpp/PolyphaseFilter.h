@@ -0,0 +1,118 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+#ifndef POLYPHASEFILTER_H
+#define POLYPHASEFILTER_H
+
+#include "OverlapAddFilter.h"
+
+/**
+ * Per stream resampling fir filter.
+ *
+ * Conceptually the input is upsampled by inserting interpolation-1 zeros between samples,
+ * filtered, and then every decimation'th sample is kept.  The filter is split into
+ * interpolation polyphase branches so only the kept outputs are computed and the zeros are
+ * never multiplied - each output costs numTaps/interpolation multiplies.  The taps are
+ * scaled by interpolation so the passband gain is the same as the plain filter.
+ *
+ * The per stream state is the last few input samples and the phase of the next output, so
+ * packets can be any size.  Like OverlapAddFilter the outputs are written to the supplied
+ * realOut/complexOut vectors.  If real data arrives after complex data the imaginary part of
+ * the history is dropped.  The history and each packet of input are put together in the
+ * FilterScratch passed in, which may be shared with other filters used by the same thread.
+ */
+class PolyphaseFilter
+{
+	public:
+		typedef OverlapAddFilter::realVector realVector;
+		typedef OverlapAddFilter::complexVector complexVector;
+
+		PolyphaseFilter(realVector& realOut, complexVector& complexOut, const FilterSpectrumPtr& spectrum, size_t interpolation, size_t decimation, FilterScratch* scratch=NULL);
+
+		//change the taps - the history and phase are kept
+		void setSpectrum(const FilterSpectrumPtr& spectrum);
+		size_t getInterpolation() const
+		{
+			return interpolation_;
+		}
+		size_t getDecimation() const
+		{
+			return decimation_;
+		}
+		//time each packet into times, or stop timing with NULL
+		void setTimes(FilterTimes* times)
+		{
+			times_ = times;
+		}
+
+		template<typename T>
+		void newRealData(const std::vector<float, T>& in)
+		{
+			newRealData(in.empty() ? NULL : &in[0], in.size());
+		}
+		template<typename T>
+		void newComplexData(const std::vector<std::complex<float>, T>& in)
+		{
+			newComplexData(in.empty() ? NULL : &in[0], in.size());
+		}
+		void newRealData(const float* in, size_t size);
+		void newRealData(const short* in, size_t size);
+		void newRealData(const double* in, size_t size);
+		void newComplexData(const std::complex<float>* in, size_t size);
+		void newComplexData(const std::complex<short>* in, size_t size);
+		void newComplexData(const std::complex<double>* in, size_t size);
+
+		//throw away all filter state
+		void flush();
+		//push out the outputs the history still contributes to and then start over as with flush
+		void drain();
+
+	private:
+		void buildBranches();
+		//complex input is passed as interleaved scalars
+		template<typename T>
+		void newRealSamples(const T* in, size_t size);
+		template<typename T>
+		void newComplexSamples(const T* in, size_t size);
+
+		realVector& realOut_;
+		complexVector& complexOut_;
+		FilterScratch* scratch_;
+		//only set if we weren't given one to share
+		boost::shared_ptr<FilterScratch> ownScratch_;
+		FilterSpectrumPtr spectrum_;
+		size_t interpolation_;
+		size_t decimation_;
+
+		//taps for each branch, reversed so they line up with the history - branch p is
+		//stored at p*branchSize_
+		size_t branchSize_;
+		RealFFTWVector realBranches_;
+		ComplexFFTWVector complexBranches_;
+
+		//true if the history is complex
+		bool complexState_;
+		//the last branchSize_-1 input samples
+		RealFFTWVector realHistory_;
+		ComplexFFTWVector complexHistory_;
+		//position of the next output in upsampled samples from the start of the next input
+		size_t phase_;
+		//NULL unless the filtering is being timed
+		FilterTimes* times_;
+};
+
+#endif
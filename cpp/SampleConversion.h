@@ -0,0 +1,95 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+#ifndef SAMPLECONVERSION_H
+#define SAMPLECONVERSION_H
+
+#include <algorithm>
+#include <complex>
+#include <limits>
+#include <cstddef>
+
+/**
+ * Conversions between the port sample types and the floats the filters work in.
+ *
+ * Complex samples of any type are passed around as interleaved scalars so a short or double
+ * packet can be loaded straight into a complex float buffer - the conversion happens in the
+ * same pass as the copy the filter makes anyway.
+ */
+
+//convert num interleaved complex samples into complex floats
+template<typename T>
+inline void loadComplex(const T* in, size_t num, std::complex<float>* out)
+{
+	std::copy(in, in+2*num, reinterpret_cast<float*>(out));
+}
+
+//append num interleaved complex samples to a vector of complex floats
+template<typename V, typename T>
+inline void appendComplex(V& vec, const T* in, size_t num)
+{
+	size_t size = vec.size();
+	vec.resize(size+num);
+	if (num)
+		loadComplex(in, num, &vec[size]);
+}
+
+//float samples are used where they are - anything else is converted into scratch first
+template<typename V>
+inline const float* asFloat(const float* in, size_t, V&)
+{
+	return in;
+}
+template<typename T, typename V>
+inline const float* asFloat(const T* in, size_t num, V& scratch)
+{
+	scratch.resize(num);
+	std::copy(in, in+num, scratch.begin());
+	return scratch.empty() ? NULL : &scratch[0];
+}
+
+/**
+ * Scale filter output and round it to an integer type.
+ *
+ * With saturate set anything out of range is clipped to the nearest limit.  Without it
+ * the values are assumed to fit, which saves the comparisons on every sample.
+ */
+template<typename T>
+void quantize(const float* in, size_t num, float scale, bool saturate, T* out)
+{
+	const float lo = std::numeric_limits<T>::min();
+	const float hi = std::numeric_limits<T>::max();
+	if (saturate)
+	{
+		for (size_t i=0; i!=num; i++)
+		{
+			float val = in[i]*scale;
+			val = std::min(std::max(val, lo), hi);
+			out[i] = T(val<0 ? val-0.5f : val+0.5f);
+		}
+	}
+	else
+	{
+		for (size_t i=0; i!=num; i++)
+		{
+			float val = in[i]*scale;
+			out[i] = T(val<0 ? val-0.5f : val+0.5f);
+		}
+	}
+}
+
+#endif
@@ -0,0 +1,121 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+
+#include "TapCache.h"
+
+bool operator< (const TapCacheKey& a, const TapCacheKey& b)
+{
+	if (a.sampleRate!=b.sampleRate)
+		return a.sampleRate<b.sampleRate;
+	if (a.fftSize!=b.fftSize)
+		return a.fftSize<b.fftSize;
+	if (a.lowLatency!=b.lowLatency)
+		return b.lowLatency;
+	if (a.partitionThreshold!=b.partitionThreshold)
+		return a.partitionThreshold<b.partitionThreshold;
+	if (a.maxLatency!=b.maxLatency)
+		return a.maxLatency<b.maxLatency;
+	if (a.resampling!=b.resampling)
+		return b.resampling;
+	if (a.frequencyOutput!=b.frequencyOutput)
+		return b.frequencyOutput;
+	if (a.correlationMode!=b.correlationMode)
+		return b.correlationMode;
+	if (a.complex!=b.complex)
+		return b.complex;
+	if (a.type!=b.type)
+		return a.type<b.type;
+	if (a.transitionWidth!=b.transitionWidth)
+		return a.transitionWidth<b.transitionWidth;
+	if (a.ripple!=b.ripple)
+		return a.ripple<b.ripple;
+	if (a.freq1!=b.freq1)
+		return a.freq1<b.freq1;
+	return a.freq2<b.freq2;
+}
+
+TapCache::TapCache(size_t capacity) :
+	capacity_(capacity)
+{
+}
+
+FilterSpectrumPtr TapCache::find(const TapCacheKey& key, bool countMiss)
+{
+	boost::mutex::scoped_lock lock(lock_);
+	map_type::iterator i = entries_.find(key);
+	if (i==entries_.end())
+	{
+		if (countMiss)
+			stats_.misses++;
+		return FilterSpectrumPtr();
+	}
+	stats_.hits++;
+	//move to the front of the lru list
+	lru_.splice(lru_.begin(), lru_, i->second);
+	return i->second->second;
+}
+
+void TapCache::insert(const TapCacheKey& key, const FilterSpectrumPtr& spectrum)
+{
+	boost::mutex::scoped_lock lock(lock_);
+	if (capacity_==0)
+		return;
+	map_type::iterator i = entries_.find(key);
+	if (i!=entries_.end())
+	{
+		//someone beat us to it - just refresh the entry
+		i->second->second = spectrum;
+		lru_.splice(lru_.begin(), lru_, i->second);
+		return;
+	}
+	lru_.push_front(entry_type(key, spectrum));
+	entries_.insert(map_type::value_type(key, lru_.begin()));
+	evict();
+}
+
+void TapCache::setCapacity(size_t capacity)
+{
+	boost::mutex::scoped_lock lock(lock_);
+	capacity_ = capacity;
+	evict();
+}
+
+void TapCache::clear()
+{
+	boost::mutex::scoped_lock lock(lock_);
+	entries_.clear();
+	lru_.clear();
+}
+
+TapCache::Statistics TapCache::getStatistics()
+{
+	boost::mutex::scoped_lock lock(lock_);
+	Statistics ret(stats_);
+	ret.entries = entries_.size();
+	return ret;
+}
+
+void TapCache::evict()
+{
+	while (entries_.size() > capacity_)
+	{
+		entries_.erase(lru_.back().first);
+		lru_.pop_back();
+		stats_.evictions++;
+	}
+}
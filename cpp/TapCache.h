@@ -0,0 +1,125 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+#ifndef TAPCACHE_H
+#define TAPCACHE_H
+
+#include "OverlapAddFilter.h"
+#include <list>
+#include <string>
+#include <map>
+#include <boost/thread/mutex.hpp>
+
+/**
+ * Everything which determines the output of designTaps() for a stream - the filterProps
+ * fields plus the stream sample rate and fftSize.
+ */
+struct TapCacheKey
+{
+	TapCacheKey() :
+		transitionWidth(0),
+		ripple(0),
+		freq1(0),
+		freq2(0),
+		complex(false),
+		sampleRate(0),
+		fftSize(0),
+		lowLatency(false),
+		partitionThreshold(0),
+		maxLatency(0),
+		resampling(false),
+		frequencyOutput(false),
+		correlationMode(false)
+	{
+	}
+
+	std::string type;
+	double transitionWidth;
+	double ripple;
+	double freq1;
+	double freq2;
+	bool complex;
+	float sampleRate;
+	//0 to pick the fftSize to suit the filter - lowLatency says how
+	size_t fftSize;
+	bool lowLatency;
+	//filters longer than this are partitioned - 0 for never
+	size_t partitionThreshold;
+	//most input samples the filter may hold back - 0 for no limit
+	size_t maxLatency;
+	//resampling filters only need the taps
+	bool resampling;
+	//frequency domain output needs an fft however short the filter
+	bool frequencyOutput;
+	bool correlationMode;
+};
+
+bool operator< (const TapCacheKey& a, const TapCacheKey& b);
+
+/**
+ * Bounded LRU cache of designed filters.
+ *
+ * Streams at the same sample rate share a single FilterSpectrum so the filter is only
+ * designed and transformed once.  When the cache is full the least recently used entry is
+ * dropped - streams still holding it keep their copy alive until they let it go.
+ * All methods are thread safe.
+ */
+class TapCache
+{
+	public:
+		struct Statistics
+		{
+			Statistics() :
+				hits(0),
+				misses(0),
+				evictions(0),
+				entries(0)
+			{
+			}
+			unsigned long long hits;
+			unsigned long long misses;
+			unsigned long long evictions;
+			size_t entries;
+		};
+
+		TapCache(size_t capacity);
+
+		//return the cached filter or an empty pointer if we don't have it.  A lookup which is
+		//about to be repeated before designing the filter can leave the miss to the second one
+		FilterSpectrumPtr find(const TapCacheKey& key, bool countMiss=true);
+		void insert(const TapCacheKey& key, const FilterSpectrumPtr& spectrum);
+
+		void setCapacity(size_t capacity);
+		void clear();
+		Statistics getStatistics();
+
+	private:
+		typedef std::pair<TapCacheKey, FilterSpectrumPtr> entry_type;
+		typedef std::list<entry_type> list_type;
+		typedef std::map<TapCacheKey, list_type::iterator> map_type;
+
+		void evict();
+
+		size_t capacity_;
+		//most recently used at the front
+		list_type lru_;
+		map_type entries_;
+		Statistics stats_;
+		boost::mutex lock_;
+};
+
+#endif
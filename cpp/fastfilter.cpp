@@ -26,22 +26,231 @@
 **************************************************************************/
 
 #include "fastfilter.h"
+#include "SampleConversion.h"
+#include <time.h>
+#include <cmath>
+#include <boost/lexical_cast.hpp>
 
 PREPARE_LOGGING(fastfilter_i)
 
+namespace {
+	//seconds the service thread waits when none of the inputs have data - most of it is spent
+	//blocked on the float input so its data is taken as soon as it arrives, and the rest
+	//sleeping before the short and double inputs are polled again
+	const float IDLE_WAIT = 0.009;
+	const float IDLE_DELAY = 0.001;
+	//times per streamIdleTimeout each shard looks for idle streams
+	const double IDLE_SWEEPS = 4;
+
+	//seconds on a clock which is not affected by changes to the system time
+	double getTime()
+	{
+		struct timespec ts;
+		clock_gettime(CLOCK_MONOTONIC, &ts);
+		return ts.tv_sec + 1e-9*ts.tv_nsec;
+	}
+
+#ifdef HAVE_BULKIO_STREAMS
+	//frees the vector a buffer was adopted from
+	template<typename V>
+	struct VectorDeleter
+	{
+		VectorDeleter(V* vec) :
+			vec_(vec)
+		{
+		}
+		void operator() (typename V::value_type*)
+		{
+			delete vec_;
+		}
+		V* vec_;
+	};
+
+	//hand the filter output to a buffer without copying it - the vector is left empty
+	template<typename V>
+	redhawk::buffer<typename V::value_type> adoptVector(V& vec)
+	{
+		V* storage = new V();
+		storage->swap(vec);
+		//the next output is usually the same size
+		vec.reserve(storage->size());
+		return redhawk::buffer<typename V::value_type>(&(*storage)[0], storage->size(), VectorDeleter<V>(storage));
+	}
+
+	//the next block from whichever stream on the port has data
+	template<typename T, typename Stream, typename Block>
+	FilterPacket* readBlock(Stream& stream, const Block& block)
+	{
+		SamplePacket<T>* packet = new SamplePacket<T>();
+		packet->streamID = stream.streamID();
+		if (block)
+		{
+			packet->SRI = block.sri();
+			packet->T = block.getStartTime();
+			packet->sriChanged = block.sriChanged();
+			packet->inputQueueFlushed = block.inputQueueFlushed();
+			//the block shares the samples it was sent with - nothing is copied
+			packet->buffer = block.buffer();
+		}
+		else if (stream.eos())
+		{
+			//the end of stream comes after the last block
+			packet->SRI = stream.sri();
+			packet->T = bulkio::time::utils::notSet();
+			packet->EOS = true;
+		}
+		else
+		{
+			delete packet;
+			return NULL;
+		}
+		return packet;
+	}
+
+	template<typename T, typename Port>
+	FilterPacket* readPort(Port* port, float timeout)
+	{
+		typename Port::StreamType stream = port->getCurrentStream(timeout);
+		if (!stream)
+			return NULL;
+		return readBlock<T>(stream, stream.tryread());
+	}
+#else
+	template<typename T, typename Port>
+	FilterPacket* readPort(Port* port, float timeout)
+	{
+		typename Port::dataTransfer *tmp = port->getPacket(timeout);
+		if (not tmp)
+			return NULL;
+		SamplePacket<T>* packet = new SamplePacket<T>();
+		packet->streamID = tmp->streamID;
+		packet->SRI = tmp->SRI;
+		packet->T = tmp->T;
+		packet->sriChanged = tmp->sriChanged;
+		packet->EOS = tmp->EOS;
+		packet->inputQueueFlushed = tmp->inputQueueFlushed;
+		//take the samples without copying them
+		packet->buffer.swap(tmp->dataBuffer);
+		delete tmp; // IMPORTANT: MUST RELEASE THE RECEIVED DATA BLOCK
+		return packet;
+	}
+#endif
+
+	//true if next carries straight on from the first numSamples samples of the stream in first,
+	//so the two can be filtered and pushed as one packet
+	bool continues(const FilterPacket& first, size_t numSamples, const FilterPacket& next)
+	{
+		if (next.streamID!=first.streamID || next.sriChanged || next.inputQueueFlushed)
+			return false;
+		//an eos on its own has no time to line up
+		if (next.size()==0)
+			return true;
+		if (first.T.tcstatus!=BULKIO::TCS_VALID || next.T.tcstatus!=BULKIO::TCS_VALID)
+			return first.T.tcstatus==next.T.tcstatus;
+		//anything further out than half a sample is a gap or an overlap in the data
+		double gap = (next.T.twsec-first.T.twsec) + (next.T.tfsec-first.T.tfsec) - numSamples*first.SRI.xdelta;
+		return std::fabs(gap) < 0.5*first.SRI.xdelta;
+	}
+
+	//count a packet which took latency seconds from being read to being pushed in the
+	//decade it falls in
+	void countLatency(statisticsEntry_struct& stats, double latency)
+	{
+		if (latency < 1e-5)
+			stats.latencyUnder10us++;
+		else if (latency < 1e-4)
+			stats.latencyUnder100us++;
+		else if (latency < 1e-3)
+			stats.latencyUnder1ms++;
+		else if (latency < 1e-2)
+			stats.latencyUnder10ms++;
+		else if (latency < 1e-1)
+			stats.latencyUnder100ms++;
+		else
+			stats.latencyOver100ms++;
+	}
+
+	//shorts are scaled and rounded to the nearest integer - doubles are just widened
+	void convertOutput(const float* in, size_t num, const FilterConfig& config, short* out)
+	{
+		quantize(in, num, config.outputScale, config.saturateOutput, out);
+	}
+	void convertOutput(const float* in, size_t num, const FilterConfig&, double* out)
+	{
+		std::copy(in, in+num, out);
+	}
+
+#ifdef HAVE_BULKIO_STREAMS
+	template<typename T>
+	redhawk::buffer<T> makeOutput(const float* in, size_t num, const FilterConfig& config)
+	{
+		redhawk::buffer<T> out(num);
+		if (num)
+			convertOutput(in, num, config, &out[0]);
+		return out;
+	}
+#endif
+}
+
 fastfilter_i::fastfilter_i(const char *uuid, const char *label) :
     fastfilter_base(uuid, label),
-    manualTaps_(false)
+    nextInput_(0),
+    manualTaps_(false),
+    tapCache_(tapCacheSize),
+    configGeneration_(0),
+    wisdomLoaded_(false),
+    wisdomPlanCount_(0),
+    liveStreams_(0),
+    pendingEvictions_(0),
+    evictedStreams_(0),
+    recreatedStreams_(0)
 {
+	std::fill(heldPackets_, heldPackets_+NUM_INPUTS, static_cast<FilterPacket*>(NULL));
 	addPropertyChangeListener("complexFilterCoefficients", this, &fastfilter_i::complexFilterCoefficientsChanged);
 	addPropertyChangeListener("correlationMode", this, &fastfilter_i::correlationModeChanged);
 	addPropertyChangeListener("fftSize", this, &fastfilter_i::fftSizeChanged);
+	addPropertyChangeListener("fftSizeObjective", this, &fastfilter_i::fftSizeObjectiveChanged);
+	addPropertyChangeListener("partitionThreshold", this, &fastfilter_i::partitionThresholdChanged);
+	addPropertyChangeListener("decimation", this, &fastfilter_i::resamplingChanged);
+	addPropertyChangeListener("interpolation", this, &fastfilter_i::resamplingChanged);
+	addPropertyChangeListener("outputScale", this, &fastfilter_i::outputScaleChanged);
+	addPropertyChangeListener("saturateOutput", this, &fastfilter_i::saturateOutputChanged);
+	addPropertyChangeListener("outputDomain", this, &fastfilter_i::outputDomainChanged);
+	addPropertyChangeListener("peakDetection", this, &fastfilter_i::peakDetectionChanged);
 	addPropertyChangeListener("filterProps", this, &fastfilter_i::filterPropsChanged);
 	addPropertyChangeListener("realFilterCoefficients", this, &fastfilter_i::realFilterCoefficientsChanged);
+	addPropertyChangeListener("filterBank", this, &fastfilter_i::filterBankChanged);
+	addPropertyChangeListener("streamFilters", this, &fastfilter_i::streamFiltersChanged);
+	addPropertyChangeListener("tapCacheSize", this, &fastfilter_i::tapCacheSizeChanged);
+	setPropertyQueryImpl(tapCacheStatistics, this, &fastfilter_i::getTapCacheStatistics);
+	setPropertyQueryImpl(configureStatistics, this, &fastfilter_i::getConfigureStatistics);
+	addPropertyChangeListener("fftwWisdomFile", this, &fastfilter_i::fftwWisdomFileChanged);
+	setPropertyQueryImpl(planStatistics, this, &fastfilter_i::getPlanStatistics);
+	addPropertyChangeListener("streamIdleTimeout", this, &fastfilter_i::streamIdleTimeoutChanged);
+	addPropertyChangeListener("maxStreams", this, &fastfilter_i::maxStreamsChanged);
+	addPropertyChangeListener("flushEvictedStreams", this, &fastfilter_i::flushEvictedStreamsChanged);
+	setPropertyQueryImpl(streamStatistics, this, &fastfilter_i::getStreamStatistics);
+	addPropertyChangeListener("batchMaxSamples", this, &fastfilter_i::batchMaxSamplesChanged);
+	addPropertyChangeListener("batchMaxLatency", this, &fastfilter_i::batchMaxLatencyChanged);
+	addPropertyChangeListener("maxLatencySamples", this, &fastfilter_i::maxLatencySamplesChanged);
+	setPropertyQueryImpl(streamLatency, this, &fastfilter_i::getStreamLatency);
+	addPropertyChangeListener("statisticsEnabled", this, &fastfilter_i::statisticsEnabledChanged);
+	setPropertyQueryImpl(statistics, this, &fastfilter_i::getStatistics);
+	//readPacket() has already waited on the float input when none of them have data
+	setThreadDelay(IDLE_DELAY);
+	//streams are filtered on the service thread until start() brings up any workers
+	shards_.push_back(new FilterShard());
+	boost::mutex::scoped_lock lock(filterLock_);
+	applyFilterSettings();
 }
 
 fastfilter_i::~fastfilter_i()
 {
+	stopShardThreads();
+	for (std::vector<FilterShard*>::iterator shard = shards_.begin(); shard!=shards_.end(); shard++)
+		delete *shard;
+	for (size_t i=0; i!=NUM_INPUTS; i++)
+		delete heldPackets_[i];
 }
 
 /***********************************************************************************************
@@ -177,300 +386,1598 @@ fastfilter_i::~fastfilter_i()
 ************************************************************************************************/
 int fastfilter_i::serviceFunction()
 {
-    bulkio::InFloatPort::dataTransfer *tmp = dataFloat_in->getPacket(bulkio::Const::BLOCKING);
-	if (not tmp) { // No data is available
+	//a service thread which outlived a timed out stop can still be here while start() rebuilds
+	//the shards, so anything touching them holds shardsLock_
+	{
+		boost::mutex::scoped_lock shardsLock(shardsLock_);
+		//the workers look for idle streams themselves - this is for the streams filtered here
+		for (std::vector<FilterShard*>::iterator shard = shards_.begin(); shard!=shards_.end(); shard++)
+		{
+			if (!(*shard)->thread)
+				sweepIdleStreams(**shard);
+		}
+	}
+
+	FilterPacket* packet = readPacket();
+	if (not packet) { // No data is available
 		return NOOP;
 	}
 
-	if (tmp->inputQueueFlushed)
+	boost::mutex::scoped_lock shardsLock(shardsLock_);
+
+	if (packet->inputQueueFlushed)
 	{
 		LOG_WARN(fastfilter_i, "input queue flushed - data has been thrown on the floor.  flushing internal buffers");
 		//flush all our processor states if the queue flushed
-		boost::mutex::scoped_lock lock(filterLock_);
-		for (map_type::iterator i = filters_.begin(); i!=filters_.end(); i++)
-			i->second.filter->flush();
+		for (std::vector<FilterShard*>::iterator shard = shards_.begin(); shard!=shards_.end(); shard++)
+			flushShard(**shard);
+	}
+
+	//every packet for a stream goes to the same shard so they are always filtered in order
+	FilterShard* shard = shards_[boost::hash<std::string>()(packet->streamID) % shards_.size()];
+	if (shard->thread)
+		queuePacket(*shard, packet);
+	else
+		processPacket(*shard, packet);
+    return NORMAL;
+}
+
+FilterPacket* fastfilter_i::readPacket()
+{
+	//take turns between the inputs so a busy port can't hold up the others
+	for (size_t i=0; i!=NUM_INPUTS; i++)
+	{
+		nextInput_ = (nextInput_+1)%NUM_INPUTS;
+		FilterPacket* packet = readInput(nextInput_);
+		if (packet)
+			return batchPackets(nextInput_, packet);
 	}
-	bool updateSRI = tmp->sriChanged;
-    float fs = 1.0/tmp->SRI.xdelta;
+	//nothing waiting on any of them - wait a little on the float input, which most streams
+	//use, rather than spin on all three.  The others are picked up on the next pass
+	nextInput_ = FLOAT_INPUT;
+	FilterPacket* packet = readInput(FLOAT_INPUT, IDLE_WAIT);
+	if (packet)
+		return batchPackets(FLOAT_INPUT, packet);
+	return NULL;
+}
+
+FilterPacket* fastfilter_i::readInput(size_t input, float timeout)
+{
+	//whatever the last batch held back comes first
+	FilterPacket* packet = heldPackets_[input];
+	if (packet)
 	{
-		boost::mutex::scoped_lock lock(filterLock_);
-		map_type::iterator i = filters_.find(tmp->streamID);
-		firfilter* filter;
-		if (i==filters_.end())
+		heldPackets_[input] = NULL;
+		return packet;
+	}
+	switch (input)
+	{
+		case FLOAT_INPUT:
+			packet = readPort<float>(dataFloat_in, timeout);
+			break;
+		case SHORT_INPUT:
+			packet = readPort<short>(dataShort_in, timeout);
+			break;
+		case DOUBLE_INPUT:
+			packet = readPort<double>(dataDouble_in, timeout);
+			break;
+	}
+	if (packet)
+		packet->received = getTime();
+	return packet;
+}
+
+FilterPacket* fastfilter_i::batchPackets(size_t input, FilterPacket* packet)
+{
+	FilterConfigPtr config = getConfig(inputConfig_);
+	if (config->batchSamples==0 || packet->EOS)
+		return packet;
+	//only take packets which are already waiting - a batch never holds up the data
+	size_t numSamples = packet->size();
+	std::vector<FilterPacket*> batch;
+	while (numSamples < config->batchSamples)
+	{
+		FilterPacket* next = readInput(input);
+		if (!next)
+			break;
+		size_t total = numSamples+next->size();
+		if (!continues(*packet, numSamples, *next) || total>config->batchSamples ||
+		    (config->batchLatency>0 && total*packet->SRI.xdelta>config->batchLatency))
 		{
-			//this is a new stream - need to create a new filter & wrapper
-			LOG_DEBUG(fastfilter_i, "creating new filter for streamID "<<tmp->streamID);
-			if (manualTaps_)
-			{
-				LOG_DEBUG(fastfilter_i, "using manual taps ");
-				bool real, complex;
-				getManualTaps(real,complex);
-				if (real)
-					filter = new firfilter(fftSize, realOut, complexOut, realTaps_);
-				else if(complex)
-					filter = new firfilter(fftSize, realOut, complexOut, complexTaps_);
-				else
-				{
-					LOG_WARN(fastfilter_i, "state error - using manual taps with no filter provided.  This shouldn't really happen");
-					if (updateSRI)
-						dataFloat_out->pushSRI(tmp->SRI);
-					dataFloat_out->pushPacket(tmp->dataBuffer, tmp->T, tmp->EOS, tmp->streamID);
-					delete tmp;
-					return NORMAL;
-				}
-				updateSRI = true;
-			}
-			else
-			{
-				LOG_DEBUG(fastfilter_i, "using filter designer");
-				correlationMode=false;
-				if (filterProps.filterComplex)
-				{
-					designTaps(complexTaps_, fs);
-					filter = new firfilter(fftSize, realOut, complexOut, complexTaps_);
-				}
-				else
-				{
-					designTaps(realTaps_, fs);
-					filter = new firfilter(fftSize, realOut, complexOut, realTaps_);
-				}
-			}
-			map_type::value_type filterWrapperMap(tmp->streamID, FilterWrapper());
-			i = filters_.insert(filters_.end(),filterWrapperMap);
-			i->second.setParams(fs,filter);
+			//a new stream, sri, time or too big - it starts the next batch
+			heldPackets_[input] = next;
+			break;
 		}
-		else
-			//get the filter we have used before
-			filter = i->second.filter;
+		batch.push_back(next);
+		numSamples = total;
+		if (next->EOS)
+			break;
+	}
+	if (!batch.empty())
+	{
+		LOG_TRACE(fastfilter_i, "batched "<<batch.size()+1<<" packets of "<<packet->streamID<<" into "<<numSamples<<" samples");
+		packet->append(batch);
+		for (std::vector<FilterPacket*>::iterator i = batch.begin(); i!=batch.end(); i++)
+			delete *i;
+	}
+	return packet;
+}
+
+void fastfilter_i::processPacket(FilterShard& shard, FilterPacket *packet)
+{
+	map_type& filters = shard.filters;
+	if (packet->evictRequest)
+	{
+		evictRequested(shard, packet->streamID);
+		delete packet;
+		return;
+	}
 
-		//if we are in design mode and the sample rate has changed - redesign and apply our filter
-		if (!manualTaps_ && i->second.hasSampleRateChanged(fs))
+	bool updateSRI = packet->sriChanged;
+    float fs = 1.0/packet->SRI.xdelta;
+	//streams pick up new filter settings between packets
+	double lockWait = 0;
+	FilterConfigPtr config = getConfig(shard.config, &lockWait);
+	//what else this packet costs the stream, for the statistics
+	bool timing = config->statistics;
+	unsigned long redesigns = 0;
+	double redesignTime = 0;
+	double pushTime = 0;
+	size_t samplesOut = 0;
+	double start = 0;
+	map_type::iterator i = filters.find(packet->streamID);
+	if (i==filters.end())
+	{
+		//this is a new stream - need to create a new filter & wrapper
+		LOG_DEBUG(fastfilter_i, "creating new filter for streamID "<<packet->streamID);
+		if (!config->isDesigned(packet->streamID))
 		{
-			if (filterProps.filterComplex)
+			LOG_DEBUG(fastfilter_i, "using manual taps ");
+			updateSRI = true;
+		}
+		else
+			LOG_DEBUG(fastfilter_i, "using filter designer");
+		//make room by ending the stream which has gone longest without data.  Streams already on
+		//their way out don't count
+		if (config->maxStreams!=0 && long(liveStreams_)-long(pendingEvictions_)>=long(config->maxStreams))
+			evictLeastRecent(shard);
+		map_type::value_type filterWrapperMap(packet->streamID, FilterWrapper());
+		{
+			boost::mutex::scoped_lock lock(shard.statsLock);
+			i = filters.insert(filters.end(),filterWrapperMap);
+		}
+		i->second.setParams(fs,NULL);
+		if (timing)
+			start = getTime();
+		if (!updateFilter(shard, i->second, *config, packet->streamID, fs))
+		{
+			LOG_WARN(fastfilter_i, "state error - no filter available for this stream.  This shouldn't really happen");
 			{
-				designTaps(complexTaps_, fs);
-				filter->setTaps(complexTaps_);
+				boost::mutex::scoped_lock lock(shard.statsLock);
+				filters.erase(i);
 			}
-			else
+			//send the samples on unfiltered
+			packet->copy(shard.realOut);
+			shard.complexOut.clear();
+			if (packet->SRI.mode==1 && !shard.realOut.empty())
 			{
-				designTaps(realTaps_, fs);
-				filter->setTaps(realTaps_);
+				const std::complex<float>* cxData = reinterpret_cast<const std::complex<float>*>(&shard.realOut[0]);
+				shard.complexOut.assign(cxData, cxData+shard.realOut.size()/2);
+				shard.realOut.clear();
 			}
+			pushOutput(*packet, packet->streamID, shard.realOut, shard.complexOut, *config, updateSRI);
+			delete packet;
+			return;
+		}
+		if (timing)
+			redesignTime += getTime()-start;
+		redesigns++;
+		i->second.setGeneration(config->generation);
+		addSampleRate(fs);
+		++liveStreams_;
+		if (shard.evicted.erase(packet->streamID))
+		{
+			LOG_DEBUG(fastfilter_i, "evicted stream "<<packet->streamID<<" is back");
+			++recreatedStreams_;
 		}
+	}
+	else
+	{
+		//get the filter we have used before
+		float oldFs = i->second.getSampleRate();
+		bool sampleRateChanged = i->second.hasSampleRateChanged(fs);
+		if (sampleRateChanged)
+		{
+			removeSampleRate(oldFs);
+			addSampleRate(fs);
+		}
+		//if the settings have changed or we are in design mode and the sample rate has changed - apply our new filter
+		if (i->second.getGeneration()!=config->generation || (sampleRateChanged && config->isDesigned(packet->streamID)))
+		{
+			if (timing)
+				start = getTime();
+			updateFilter(shard, i->second, *config, packet->streamID, fs);
+			if (timing)
+				redesignTime += getTime()-start;
+			redesigns++;
+			i->second.setGeneration(config->generation);
+		}
+	}
+
+	//a resampling filter changes the output sample rate - the bank does not resample
+	double xdeltaScale = 1.0;
+	if (!i->second.bank)
+		xdeltaScale = double(config->decimation)/config->interpolation;
+	if (xdeltaScale!=i->second.getXdeltaScale())
+	{
+		i->second.setXdeltaScale(xdeltaScale);
+		updateSRI = true;
+	}
+	//kept in case the stream has to be ended without an eos of its own
+	i->second.sri = packet->SRI;
+	i->second.lastTime = packet->T;
+	{
+		boost::mutex::scoped_lock lock(shard.statsLock);
+		i->second.lastActive = getTime();
+	}
+	packet->SRI.xdelta *= xdeltaScale;
+
+	//now process the data - real or complex according to the sri mode.  An evicted stream
+	//has no data but can push out what is left in its filter
+	i->second.setTimes(timing ? &i->second.times : NULL);
+	if (packet->evicted && config->drainEvicted)
+		i->second.drain();
+	else
+		packet->filter(i->second);
+
+	//detections are timestamped from the last packet which had a valid time
+	if (packet->T.tcstatus==BULKIO::TCS_VALID)
+	{
+		i->second.timeReference = packet->T;
+		i->second.timeIndex = i->second.inputCount/xdeltaScale;
+	}
+	i->second.inputCount += packet->size();
+	{
+		boost::mutex::scoped_lock lock(shard.statsLock);
+		i->second.latency = i->second.getLatency();
+		i->second.peakLatency = std::max(i->second.peakLatency, i->second.latency);
+	}
+
+	//frequency domain frames are described along x in Hz and along y by the time between them
+	OverlapAddFilter* filter = i->second.filter;
+	if (filter && filter->isFrequencyOutput())
+	{
+		size_t frameSize = filter->getFftSize();
+		size_t frameStep = filter->getSpectrum()->getBlockSize();
+		if (frameSize!=i->second.frameSize || frameStep!=i->second.frameStep)
+		{
+			i->second.frameSize = frameSize;
+			i->second.frameStep = frameStep;
+			updateSRI = true;
+		}
+		packet->SRI.mode = 1;
+		packet->SRI.subsize = frameSize;
+		packet->SRI.ystart = 0;
+		packet->SRI.ydelta = frameStep*packet->SRI.xdelta;
+		packet->SRI.yunits = BULKIO::UNITS_TIME;
+		packet->SRI.xstart = 0;
+		packet->SRI.xdelta = 1.0/(frameSize*packet->SRI.xdelta);
+		packet->SRI.xunits = BULKIO::UNITS_FREQUENCY;
+	}
+	else if (i->second.frameSize!=0)
+	{
+		//back to samples - the input sri describes the output again
+		i->second.frameSize = 0;
+		i->second.frameStep = 0;
+		updateSRI = true;
+	}
 
-		//now process the data
-		if (tmp->SRI.mode==1)
+	//to do -- adjust time stamps appropriately on all these output pushes
+	FilterBank* bank = i->second.bank;
+	size_t numOutputs = bank ? bank->size() : 1;
+	for (size_t n=0; n!=numOutputs; n++)
+	{
+		//each filter in the bank has its own output stream
+		std::string streamID = packet->streamID;
+		if (bank)
+		{
+			std::string suffix = n<config->bank.size() ? config->bank[n].streamIDSuffix : std::string();
+			if (suffix.empty())
+				suffix = "_"+boost::lexical_cast<std::string>(n);
+			streamID += suffix;
+		}
+		OverlapAddFilter::realVector& realOut = bank ? bank->getRealOut(n) : shard.realOut;
+		OverlapAddFilter::complexVector& complexOut = bank ? bank->getComplexOut(n) : shard.complexOut;
+		//the detectors count samples even when they are not in use so the indexes are always
+		//from the start of the stream
+		if (i->second.detectors.size()!=numOutputs)
+			i->second.detectors.resize(numOutputs, PeakDetector(config->detection));
+		if (config->detect)
 		{
-			//data is complex
-			//run the filter
-			std::vector<std::complex<float> >* cxData = (std::vector<std::complex<float> >*) &(tmp->dataBuffer);
-			filter->newComplexData(*cxData);
+			i->second.detectors[n].setSettings(config->detection);
+			detectPeaks(i->second, n, *packet, streamID, realOut, complexOut);
 		}
 		else
+			i->second.detectors[n].skip(realOut.size()+complexOut.size());
+		samplesOut += realOut.size()+complexOut.size();
+		if (!config->detect || config->fullRateOutput)
 		{
-			//data is real
-			//run the filter
-			filter->newRealData(tmp->dataBuffer);
-			//we might have a single complex frame if the previous data was complex and there were
-			//complex data still in the filter taps
-			if (!complexOut.empty())
-			{
-				//update the mode to true for the complex fame and force an sri push
-				tmp->SRI.mode=1;
-				updateSRI = true;
-			}
+			if (timing)
+				start = getTime();
+			pushOutput(*packet, streamID, realOut, complexOut, *config, updateSRI);
+			if (timing)
+				pushTime += getTime()-start;
 		}
-	    if (tmp->EOS)
-	    {
-	    	//if we have an eos - remove the wrapper from the container
-	    	filters_.erase(i);
-	    }
 	}
 
-	//to do -- adjust time stamps appropriately on all these output pushes
+	if (timing)
+	{
+		double latency = getTime()-packet->received;
+		boost::mutex::scoped_lock lock(shard.statsLock);
+		statisticsEntry_struct& stats = i->second.statistics;
+		stats.samplesIn += packet->size();
+		stats.samplesOut += samplesOut;
+		stats.blocks = i->second.times.blocks;
+		stats.forwardFftTime = i->second.times.forwardTime;
+		stats.multiplyTime = i->second.times.multiplyTime;
+		stats.inverseFftTime = i->second.times.inverseTime;
+		stats.pushTime += pushTime;
+		stats.lockWaitTime += lockWait;
+		stats.redesigns += redesigns;
+		stats.redesignTime += redesignTime;
+		countLatency(stats, latency);
+	}
+
+	if (packet->EOS)
+	{
+		//if we have an eos - remove the wrapper from the container
+		removeSampleRate(i->second.getSampleRate());
+		{
+			boost::mutex::scoped_lock lock(shard.statsLock);
+			filters.erase(i);
+		}
+		--liveStreams_;
+	}
+	delete packet;
+}
+
+void fastfilter_i::detectPeaks(FilterWrapper& wrapper, size_t output, FilterPacket& packet, const std::string& streamID, const OverlapAddFilter::realVector& realOut, const OverlapAddFilter::complexVector& complexOut)
+{
+	PeakDetector& detector = wrapper.detectors[output];
+	PeakDetector::DetectionList detections;
+	if (!complexOut.empty())
+		detector.newComplexData(&complexOut[0], complexOut.size(), detections);
+	if (!realOut.empty())
+		detector.newRealData(&realOut[0], realOut.size(), detections);
+	if (packet.EOS)
+		detector.flush(detections);
+	if (detections.empty())
+		return;
+
+	std::vector<detection_struct> messages(detections.size());
+	for (size_t n=0; n!=detections.size(); n++)
+	{
+		detection_struct& message = messages[n];
+		message.streamID = streamID;
+		message.sampleIndex = detections[n].index;
+		message.magnitude = detections[n].magnitude;
+		message.phase = detections[n].phase;
+		//packet.SRI.xdelta is already at the output rate
+		double offset = wrapper.timeReference.tfsec + (detections[n].index-wrapper.timeIndex)*packet.SRI.xdelta;
+		double whole = floor(offset);
+		message.twsec = wrapper.timeReference.twsec + whole;
+		message.tfsec = offset-whole;
+	}
+	detections_out->sendMessages(messages);
+}
+
+void fastfilter_i::pushOutput(FilterPacket& packet, const std::string& streamID, OverlapAddFilter::realVector& realOut, OverlapAddFilter::complexVector& complexOut, const FilterConfig& config, bool updateSRI)
+{
+	BULKIO::StreamSRI sri = packet.SRI;
+	sri.streamID = streamID.c_str();
+	//we might have a single complex frame if the previous data was complex and there were
+	//complex data still in the filter taps
+	if (sri.mode!=1 && !complexOut.empty())
+	{
+		//update the mode to true for the complex fame and force an sri push
+		sri.mode=1;
+		updateSRI = true;
+	}
+	//the float output hands off its vectors so the converted outputs have to go first
+	pushConvertedOutput<short>(dataShort_out, packet, sri, realOut, complexOut, config, updateSRI);
+	pushConvertedOutput<double>(dataDouble_out, packet, sri, realOut, complexOut, config, updateSRI);
+	pushFloatOutput(packet, sri, realOut, complexOut, updateSRI);
+}
+
+void fastfilter_i::pushFloatOutput(FilterPacket& packet, BULKIO::StreamSRI& sri, OverlapAddFilter::realVector& realOut, OverlapAddFilter::complexVector& complexOut, bool updateSRI)
+{
+	std::string streamID(sri.streamID);
+#ifdef HAVE_BULKIO_STREAMS
+	//the output stream pushes the sri itself whenever it or the complex flag changes
+	bulkio::OutFloatStream stream = dataFloat_out->getStream(streamID);
+	if (!stream)
+		stream = dataFloat_out->createStream(sri);
+	else if (updateSRI)
+		stream.sri(sri);
+	if (!complexOut.empty())
+	{
+		stream.complex(true);
+		stream.write(adoptVector(complexOut), packet.T);
+	}
+	if (!realOut.empty())
+	{
+		stream.complex(false);
+		stream.write(adoptVector(realOut), packet.T);
+	}
+	if (packet.EOS)
+		stream.close();
+#else
     // NOTE: You must make at least one valid pushSRI call
     if (updateSRI) {
-    	dataFloat_out->pushSRI(tmp->SRI);
+    	dataFloat_out->pushSRI(sri);
     }
     if (!complexOut.empty())
     {
     	std::vector<float>* tmpRealOut = (std::vector<float>*) &(complexOut);
-    	dataFloat_out->pushPacket(*tmpRealOut, tmp->T, tmp->EOS, tmp->streamID);
+    	dataFloat_out->pushPacket(*tmpRealOut, packet.T, packet.EOS, streamID);
     }
     if (!realOut.empty())
     {
     	//case we we forced a push on real data from previous complex data
     	//need to force our sri back to real and push another sri
-    	if (updateSRI && tmp->SRI.mode==1)
+    	if (updateSRI && sri.mode==1)
     	{
     		//change mode back to 0 and send another sri with our real output
-    		tmp->SRI.mode=0;
-    		dataFloat_out->pushSRI(tmp->SRI);
+    		sri.mode=0;
+    		dataFloat_out->pushSRI(sri);
     	}
-    	dataFloat_out->pushPacket(realOut, tmp->T, tmp->EOS, tmp->streamID);
+    	dataFloat_out->pushPacket(realOut, packet.T, packet.EOS, streamID);
     }
 
     // If no Data but EOS is True then push and empty packet with EOS True
-    if (complexOut.empty() && realOut.empty() &&tmp->EOS){
+    if (complexOut.empty() && realOut.empty() && packet.EOS){
 		std::vector<float> emptyOutput;
 		LOG_DEBUG(fastfilter_i, "Pushing Empty Data with EOS True");
-		dataFloat_out->pushPacket(emptyOutput, tmp->T, tmp->EOS, tmp->streamID);
+		dataFloat_out->pushPacket(emptyOutput, packet.T, packet.EOS, streamID);
     }
-
-    delete tmp; // IMPORTANT: MUST RELEASE THE RECEIVED DATA BLOCK
-    return NORMAL;
+#endif
 }
 
-void fastfilter_i::configure (const CF::Properties& configProperties)
-	throw (CF::PropertySet::PartialConfiguration,
-           CF::PropertySet::InvalidConfiguration, CORBA::SystemException)
+template<typename T, typename Port>
+void fastfilter_i::pushConvertedOutput(Port* port, FilterPacket& packet, const BULKIO::StreamSRI& sri, const OverlapAddFilter::realVector& realOut, const OverlapAddFilter::complexVector& complexOut, const FilterConfig& config, bool updateSRI)
 {
-	if (started())
+	std::string streamID(sri.streamID);
+	const float* realData = realOut.empty() ? NULL : &realOut[0];
+	const float* complexData = complexOut.empty() ? NULL : reinterpret_cast<const float*>(&complexOut[0]);
+	//the sri is kept up to date either way but there is no point converting samples nobody receives
+	bool active = port->state()!=BULKIO::IDLE;
+
+#ifdef HAVE_BULKIO_STREAMS
+	typename Port::StreamType stream = port->getStream(streamID);
+	if (!stream)
+		stream = port->createStream(sri);
+	else if (updateSRI)
+		stream.sri(sri);
+	if (active && complexData)
 	{
-		size_t filtProps=0;
-		for (unsigned int index = 0; index < configProperties.length(); ++index)
-		{
-			if (strcmp(configProperties[index].id,"realFilterCoefficients")==0)
-				filtProps++;
-			else if (strcmp(configProperties[index].id,"complexFilterCoefficients")==0)
-				filtProps++;
-			else if (strcmp(configProperties[index].id,"filterProps")==0)
-				filtProps++;
-		}
-		if (filtProps > 1)
+		stream.complex(true);
+		stream.write(makeOutput<T>(complexData, 2*complexOut.size(), config), packet.T);
+	}
+	if (active && realData)
+	{
+		stream.complex(false);
+		stream.write(makeOutput<T>(realData, realOut.size(), config), packet.T);
+	}
+	if (packet.EOS)
+		stream.close();
+#else
+	BULKIO::StreamSRI realSRI = sri;
+	if (updateSRI)
+		port->pushSRI(realSRI);
+	std::vector<T> out;
+	if (active && complexData)
+	{
+		out.resize(2*complexOut.size());
+		convertOutput(complexData, out.size(), config, &out[0]);
+		port->pushPacket(out, packet.T, packet.EOS, streamID);
+	}
+	if (active && realData)
+	{
+		if (updateSRI && realSRI.mode==1)
 		{
-			LOG_ERROR(fastfilter_i,"cannot configure multiple combinations of real coefficients cx coefficients and filterProps simultaneously");
-			throw CF::PropertySet::InvalidConfiguration("cannot configure multiple combinations of real coefficients cx coefficients and filterProps simultaneously", configProperties);
+			realSRI.mode=0;
+			port->pushSRI(realSRI);
 		}
+		out.resize(realOut.size());
+		convertOutput(realData, out.size(), config, &out[0]);
+		port->pushPacket(out, packet.T, packet.EOS, streamID);
 	}
-	fastfilter_base::configure(configProperties);
+	if (packet.EOS && (!active || (!complexData && !realData)))
+	{
+		out.clear();
+		port->pushPacket(out, packet.T, packet.EOS, streamID);
+	}
+#endif
 }
 
-//HERE ARE all the filter callbacks
-
-void fastfilter_i::complexFilterCoefficientsChanged(const std::vector<std::complex<float> > *oldValue, const std::vector<std::complex<float> > *newValue)
+void fastfilter_i::sweepIdleStreams(FilterShard& shard)
 {
-	//user manually configured the taps with an externally designed filter - set the boolean and update the filter flags
-	if (*oldValue != *newValue) {
-		boost::mutex::scoped_lock lock(filterLock_);
-        try {
-          if (!complexFilterCoefficients.empty())
-          {
-              manualTaps_=true;
-              realFilterCoefficients.clear();
-              if ( !filters_.empty())
-              {
-                  getManualTapsTemplate(complexFilterCoefficients, complexTaps_);
-                  for (map_type::iterator i = filters_.begin(); i!=filters_.end(); i++)
-                      i->second.filter->setTaps(complexTaps_);
-              }
-          }
-        } catch (...) {
-           LOG_ERROR(fastfilter_i, "Unable to update complexFilterCoefficients!");
-           complexFilterCoefficients=*oldValue;
-        }
+	//only ever called from the shard's own thread
+	FilterConfigPtr config = getConfig(shard);
+	if (config->idleTimeout<=0 || shard.filters.empty())
+		return;
+	double now = getTime();
+	if (now-shard.lastSweep < config->idleTimeout/IDLE_SWEEPS)
+		return;
+	shard.lastSweep = now;
+	std::vector<std::string> idle;
+	for (map_type::iterator i = shard.filters.begin(); i!=shard.filters.end(); i++)
+	{
+		if (now-i->second.lastActive >= config->idleTimeout)
+			idle.push_back(i->first);
+	}
+	for (std::vector<std::string>::iterator streamID = idle.begin(); streamID!=idle.end(); streamID++)
+	{
+		LOG_DEBUG(fastfilter_i, "ending idle stream "<<*streamID);
+		evictStream(shard, shard.filters.find(*streamID));
 	}
 }
 
-void fastfilter_i::correlationModeChanged(const bool *oldValue, const bool *newValue)
+void fastfilter_i::evictLeastRecent(FilterShard& shard)
 {
-	if (*oldValue != *newValue) {
-		//user manually configured the taps with an externally designed filter - set the boolean and update the filter flags
-		boost::mutex::scoped_lock lock(filterLock_);
-		if (correlationMode)
-			manualTaps_=true;
-		bool real, complex;
-		if (! filters_.empty())
+	//maxStreams is for the whole component so the stream to end can be on any shard
+	FilterShard* oldestShard = NULL;
+	std::string oldestID;
+	double oldestActive = 0;
+	for (std::vector<FilterShard*>::iterator s = shards_.begin(); s!=shards_.end(); s++)
+	{
+		boost::mutex::scoped_lock lock((*s)->statsLock);
+		for (map_type::iterator i = (*s)->filters.begin(); i!=(*s)->filters.end(); i++)
 		{
-			getManualTaps(real,complex);
-			if (real)
+			if (!i->second.evictQueued && (!oldestShard || i->second.lastActive < oldestActive))
 			{
-				for (map_type::iterator i = filters_.begin(); i!=filters_.end(); i++)
-					i->second.filter->setTaps(realTaps_);
-			} else if (complex)
-			{
-				for (map_type::iterator i = filters_.begin(); i!=filters_.end(); i++)
-					i->second.filter->setTaps(complexTaps_);
+				oldestShard = *s;
+				oldestID = i->first;
+				oldestActive = i->second.lastActive;
 			}
 		}
 	}
+	if (!oldestShard)
+		return;
+	LOG_DEBUG(fastfilter_i, "maxStreams reached - ending least recently used stream "<<oldestID);
+	//without workers every shard is processed here
+	if (oldestShard==&shard || !oldestShard->thread)
+	{
+		evictStream(*oldestShard, oldestShard->filters.find(oldestID));
+		return;
+	}
+	//only the shard's own thread may touch its streams - mark the stream so the next new
+	//stream doesn't pick it as well, and have the shard end it when it gets to the request
+	{
+		boost::mutex::scoped_lock lock(oldestShard->statsLock);
+		map_type::iterator i = oldestShard->filters.find(oldestID);
+		if (i==oldestShard->filters.end())
+			return;
+		i->second.evictQueued = true;
+	}
+	++pendingEvictions_;
+	SamplePacket<float>* packet = new SamplePacket<float>();
+	packet->streamID = oldestID;
+	packet->evictRequest = true;
+	boost::mutex::scoped_lock lock(oldestShard->queueLock);
+	oldestShard->queue.push_back(packet);
+	oldestShard->queueCond.notify_all();
 }
 
-void fastfilter_i::fftSizeChanged(const CORBA::ULong *oldValue, const CORBA::ULong *newValue)
+void fastfilter_i::evictRequested(FilterShard& shard, const std::string& streamID)
 {
-	if (*oldValue != *newValue) {
-		boost::mutex::scoped_lock lock(filterLock_);
-		if (!filters_.empty())
-		{
-			size_t maxNumTaps=0;
-			for (map_type::iterator i = filters_.begin(); i!=filters_.end(); i++)
-			{
-				if (i->second.filter->getNumTaps()> maxNumTaps)
-					maxNumTaps=i->second.filter->getNumTaps();
-			}
-			validateFftSize(maxNumTaps);
-			for (map_type::iterator i = filters_.begin(); i!=filters_.end(); i++)
-				i->second.filter->setFftSize(fftSize);
-		}
+	--pendingEvictions_;
+	//the stream may have ended on its own since, and come back as a new stream
+	map_type::iterator i = shard.filters.find(streamID);
+	bool queued = false;
+	if (i!=shard.filters.end())
+	{
+		boost::mutex::scoped_lock lock(shard.statsLock);
+		queued = i->second.evictQueued;
 	}
+	if (queued)
+		evictStream(shard, i);
 }
 
-void fastfilter_i::filterPropsChanged(const filterProps_struct *oldValue, const filterProps_struct *newValue)
+void fastfilter_i::evictStream(FilterShard& shard, map_type::iterator i)
 {
-	if (oldValue != newValue) {
-		boost::mutex::scoped_lock lock(filterLock_);
-        realFilterCoefficients.clear();
-        complexFilterCoefficients.clear();
-        correlationMode=false;
-        manualTaps_=false;
-        if (!filters_.empty())
-        {
-            if (filterProps.filterComplex)
-            {
-                for (map_type::iterator i = filters_.begin(); i!=filters_.end(); i++)
-                {
-                    designTaps(complexTaps_, i->second.getSampleRate());
-                    i->second.filter->setTaps(complexTaps_);
-                }
-            }
-            else
-            {
-                for (map_type::iterator i = filters_.begin(); i!=filters_.end(); i++)
-                {
-                    designTaps(realTaps_, i->second.getSampleRate());
-                    i->second.filter->setTaps(realTaps_);
-                }
-            }
-        }
+	//remember it so we can tell if it comes back - oldest first once we have enough
+	shard.evicted.insert(i->first);
+	shard.evictedOrder.push_back(i->first);
+	if (shard.evictedOrder.size() > MAX_EVICTED_IDS)
+	{
+		shard.evicted.erase(shard.evictedOrder.front());
+		shard.evictedOrder.pop_front();
 	}
+	++evictedStreams_;
+	endStream(shard, i);
 }
 
-void fastfilter_i::realFilterCoefficientsChanged(const std::vector<float> *oldValue, const std::vector<float> *newValue)
+void fastfilter_i::endStream(FilterShard& shard, map_type::iterator i)
 {
-	//user manually configured the taps with an externally designed filter - set the boolean and update the filter flags
-	if (*oldValue != *newValue) {
-		boost::mutex::scoped_lock lock(filterLock_);
-		if (!realFilterCoefficients.empty())
-		{
-			manualTaps_=true;
-			complexFilterCoefficients.clear();
-			if (!filters_.empty())
-			{
-				getManualTapsTemplate(realFilterCoefficients, realTaps_);
-				for (map_type::iterator i = filters_.begin(); i!=filters_.end(); i++)
-				{
-					i->second.filter->setTaps(realTaps_);
-				}
-			}
-		}
-		else
-		{
-            realFilterCoefficients=*oldValue;
-			LOG_WARN(fastfilter_i, "Ignoring empty configure for realFilterCoefficients -- to clear this setting configure complexFilterCoefficients or filterProps")
+	//end it like any other stream so the outputs get an eos and the wrapper is cleaned up
+	SamplePacket<float>* packet = new SamplePacket<float>();
+	packet->streamID = i->first;
+	packet->SRI = i->second.sri;
+	packet->T = i->second.lastTime;
+	packet->EOS = true;
+	packet->evicted = true;
+	packet->received = getTime();
+	processPacket(shard, packet);
+}
+
+void fastfilter_i::flushShard(FilterShard& shard)
+{
+	if (shard.thread)
+	{
+		//let the worker flush once it gets through the packets it already has
+		queuePacket(shard, NULL);
+		return;
+	}
+	flushFilters(shard);
+}
+
+void fastfilter_i::flushFilters(FilterShard& shard)
+{
+	for (map_type::iterator i = shard.filters.begin(); i!=shard.filters.end(); i++)
+		i->second.flush();
+}
+
+bool fastfilter_i::updateFilter(FilterShard& shard, FilterWrapper& wrapper, const FilterConfig& config, const std::string& streamID, float sampleRate)
+{
+	//returns false if there is no filter for this sample rate - the stream keeps what it had
+	if (!config.bank.empty())
+	{
+		FilterSpectrumList spectra = getBankSpectra(config, sampleRate);
+		if (spectra.empty())
+			return false;
+		applyBank(shard, wrapper, spectra);
+		return true;
+	}
+	FilterSpectrumPtr spectrum = getSpectrum(config, streamID, sampleRate);
+	if (!spectrum)
+		return false;
+	applySpectrum(shard, wrapper, config, spectrum);
+	return true;
+}
+
+void fastfilter_i::applyBank(FilterShard& shard, FilterWrapper& wrapper, const FilterSpectrumList& spectra)
+{
+	delete wrapper.filter;
+	wrapper.filter = NULL;
+	delete wrapper.resampler;
+	wrapper.resampler = NULL;
+	if (wrapper.bank)
+		wrapper.bank->setSpectra(spectra);
+	else
+		wrapper.bank = new FilterBank(spectra, &shard.scratch);
+}
+
+void fastfilter_i::applySpectrum(FilterShard& shard, FilterWrapper& wrapper, const FilterConfig& config, const FilterSpectrumPtr& spectrum)
+{
+	if (wrapper.bank)
+	{
+		delete wrapper.bank;
+		wrapper.bank = NULL;
+	}
+	if (config.interpolation==1 && config.decimation==1)
+	{
+		if (wrapper.resampler)
+		{
+			delete wrapper.resampler;
+			wrapper.resampler = NULL;
+		}
+		if (wrapper.filter && wrapper.filter->isFrequencyOutput()!=config.frequencyOutput)
+		{
+			//the output changes domain so there is no state worth carrying over
+			delete wrapper.filter;
+			wrapper.filter = NULL;
+		}
+		if (wrapper.filter)
+			wrapper.filter->setSpectrum(spectrum);
+		else
+			wrapper.filter = new OverlapAddFilter(shard.realOut, shard.complexOut, spectrum, config.frequencyOutput, &shard.scratch);
+		return;
+	}
+	if (wrapper.filter)
+	{
+		delete wrapper.filter;
+		wrapper.filter = NULL;
+	}
+	//the phase is only meaningful for the rates it was kept at - start over if they change
+	if (wrapper.resampler && wrapper.resampler->getInterpolation()==config.interpolation && wrapper.resampler->getDecimation()==config.decimation)
+		wrapper.resampler->setSpectrum(spectrum);
+	else
+	{
+		delete wrapper.resampler;
+		wrapper.resampler = new PolyphaseFilter(shard.realOut, shard.complexOut, spectrum, config.interpolation, config.decimation, &shard.scratch);
+	}
+}
+
+void fastfilter_i::queuePacket(FilterShard& shard, FilterPacket *packet)
+{
+	boost::mutex::scoped_lock lock(shard.queueLock);
+	//don't let a slow worker buffer up an unbounded amount of data
+	while (shard.queue.size() >= MAX_SHARD_QUEUE_DEPTH)
+		shard.queueCond.wait(lock);
+	shard.queue.push_back(packet);
+	shard.queueCond.notify_all();
+}
+
+void fastfilter_i::shardThread(FilterShard* shard)
+{
+	while (true)
+	{
+		//wake up now and then to look for idle streams even when no packets come in
+		double sweepInterval = getConfig(*shard)->idleTimeout/IDLE_SWEEPS;
+		FilterPacket *packet = NULL;
+		bool havePacket;
+		{
+			boost::mutex::scoped_lock lock(shard->queueLock);
+			if (shard->queue.empty() && shard->running)
+			{
+				if (sweepInterval>0)
+					shard->queueCond.timed_wait(lock, boost::posix_time::microseconds(static_cast<long>(1e6*sweepInterval)));
+				else
+					shard->queueCond.wait(lock);
+			}
+			havePacket = !shard->queue.empty();
+			//we only exit once everything we were given has been processed
+			if (!havePacket && !shard->running)
+				break;
+			if (havePacket)
+			{
+				packet = shard->queue.front();
+				shard->queue.pop_front();
+				shard->queueCond.notify_all();
+			}
+		}
+		if (packet)
+			processPacket(*shard, packet);
+		else if (havePacket)
+			flushFilters(*shard);
+		sweepIdleStreams(*shard);
+	}
+}
+
+void fastfilter_i::start() throw (CF::Resource::StartError, CORBA::SystemException)
+{
+	//a second start would spawn another set of workers on the same shards
+	if (started())
+		return;
+	//stop() normally has them already but a failed stop or start can leave workers behind
+	stopShardThreads();
+	size_t numShards = std::max(numThreads, CORBA::ULong(1));
+	if (numShards != shards_.size())
+	{
+		LOG_INFO(fastfilter_i, "using "<<numShards<<" filter threads");
+		boost::mutex::scoped_lock shardsLock(shardsLock_);
+		for (std::vector<FilterShard*>::iterator shard = shards_.begin(); shard!=shards_.end(); shard++)
+		{
+			//streams are assigned to shards by hash so changing the number of shards ends every
+			//stream - the same way eviction does so the outputs get their eos.  A worker can be
+			//left with eviction requests the other workers queued after it stopped
+			while (!(*shard)->queue.empty())
+			{
+				FilterPacket* packet = (*shard)->queue.front();
+				(*shard)->queue.pop_front();
+				if (packet)
+					processPacket(**shard, packet);
+			}
+			while (!(*shard)->filters.empty())
+				endStream(**shard, (*shard)->filters.begin());
+			delete *shard;
+		}
+		shards_.clear();
+		for (size_t i=0; i!=numShards; i++)
+			shards_.push_back(new FilterShard());
+	}
+	//the wisdom has to be in before the filter settings are applied so their plans can use it.
+	//Measuring the direct crossover needs a few plans too - get it over with now rather than
+	//on the first stream
+	loadWisdom();
+	OverlapAddFilter::getDirectCrossover();
+	{
+		//property values set at launch do not go through the change listeners
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+	if (numShards > 1)
+	{
+		//under the lock so the service thread sees each shard either with its worker or without
+		boost::mutex::scoped_lock shardsLock(shardsLock_);
+		for (std::vector<FilterShard*>::iterator shard = shards_.begin(); shard!=shards_.end(); shard++)
+		{
+			(*shard)->running = true;
+			(*shard)->thread = new boost::thread(&fastfilter_i::shardThread, this, *shard);
+		}
+	}
+	fastfilter_base::start();
+}
+
+void fastfilter_i::stop() throw (CF::Resource::StopError, CORBA::SystemException)
+{
+	try
+	{
+		fastfilter_base::stop();
+	}
+	catch (...)
+	{
+		stopShardThreads();
+		throw;
+	}
+	stopShardThreads();
+	saveWisdom();
+}
+
+void fastfilter_i::loadWisdom()
+{
+	std::string filename = fftwWisdomFile;
+	if (filename.empty())
+		return;
+	wisdomLoaded_ = FftPlans::loadWisdom(filename);
+	if (wisdomLoaded_)
+	{
+		LOG_INFO(fastfilter_i, "loaded fftw wisdom from "<<filename);
+	}
+	else
+	{
+		LOG_INFO(fastfilter_i, "no fftw wisdom in "<<filename<<" - plans will be measured and saved when the component stops");
+	}
+	wisdomPlanCount_ = FftPlans::getStatistics().plans;
+}
+
+void fastfilter_i::saveWisdom()
+{
+	std::string filename = fftwWisdomFile;
+	unsigned long planCount = FftPlans::getStatistics().plans;
+	if (filename.empty() || planCount==wisdomPlanCount_)
+		return;
+	if (FftPlans::saveWisdom(filename))
+	{
+		LOG_DEBUG(fastfilter_i, "saved fftw wisdom to "<<filename);
+		wisdomPlanCount_ = planCount;
+	}
+	else
+	{
+		LOG_WARN(fastfilter_i, "could not save fftw wisdom to "<<filename);
+	}
+}
+
+void fastfilter_i::fftwWisdomFileChanged(const std::string *oldValue, const std::string *newValue)
+{
+	if (*oldValue != *newValue) {
+		//anything planned from here on can use it
+		loadWisdom();
+	}
+}
+
+planStatistics_struct fastfilter_i::getPlanStatistics()
+{
+	FftPlans::Statistics stats = FftPlans::getStatistics();
+	planStatistics_struct ret;
+	ret.planCount = stats.plans;
+	ret.planningTime = stats.planningTime;
+	ret.lastPlanningTime = stats.lastPlanningTime;
+	ret.wisdomLoaded = wisdomLoaded_;
+	return ret;
+}
+
+void fastfilter_i::stopShardThreads()
+{
+	for (std::vector<FilterShard*>::iterator shard = shards_.begin(); shard!=shards_.end(); shard++)
+	{
+		if (!(*shard)->thread)
+			continue;
+		{
+			boost::mutex::scoped_lock lock((*shard)->queueLock);
+			(*shard)->running = false;
+			(*shard)->queueCond.notify_all();
+		}
+		(*shard)->thread->join();
+		delete (*shard)->thread;
+		(*shard)->thread = 0;
+	}
+}
+
+void fastfilter_i::configure (const CF::Properties& configProperties)
+	throw (CF::PropertySet::PartialConfiguration,
+           CF::PropertySet::InvalidConfiguration, CORBA::SystemException)
+{
+	if (started())
+	{
+		size_t filtProps=0;
+		for (unsigned int index = 0; index < configProperties.length(); ++index)
+		{
+			if (strcmp(configProperties[index].id,"realFilterCoefficients")==0)
+				filtProps++;
+			else if (strcmp(configProperties[index].id,"complexFilterCoefficients")==0)
+				filtProps++;
+			else if (strcmp(configProperties[index].id,"filterProps")==0)
+				filtProps++;
 		}
+		if (filtProps > 1)
+		{
+			LOG_ERROR(fastfilter_i,"cannot configure multiple combinations of real coefficients cx coefficients and filterProps simultaneously");
+			throw CF::PropertySet::InvalidConfiguration("cannot configure multiple combinations of real coefficients cx coefficients and filterProps simultaneously", configProperties);
+		}
+	}
+	fastfilter_base::configure(configProperties);
+}
+
+//HERE ARE all the filter callbacks
+//
+//none of the callbacks touch the streams directly.  Each builds a complete new set of filters
+//for the current settings and publishes it - the streams switch over between packets
+
+void fastfilter_i::complexFilterCoefficientsChanged(const std::vector<std::complex<float> > *oldValue, const std::vector<std::complex<float> > *newValue)
+{
+	//user manually configured the taps with an externally designed filter - set the boolean and update the filter flags
+	if (*oldValue != *newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+        try {
+          if (!complexFilterCoefficients.empty())
+          {
+              manualTaps_=true;
+              realFilterCoefficients.clear();
+              applyFilterSettings();
+          }
+        } catch (...) {
+           LOG_ERROR(fastfilter_i, "Unable to update complexFilterCoefficients!");
+           complexFilterCoefficients=*oldValue;
+        }
 	}
 }
 
+void fastfilter_i::correlationModeChanged(const bool *oldValue, const bool *newValue)
+{
+	if (*oldValue != *newValue) {
+		//user manually configured the taps with an externally designed filter - set the boolean and update the filter flags
+		boost::mutex::scoped_lock lock(filterLock_);
+		if (correlationMode)
+			manualTaps_=true;
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::fftSizeChanged(const CORBA::ULong *oldValue, const CORBA::ULong *newValue)
+{
+	if (*oldValue != *newValue) {
+		//the spectrum depends on the fftSize so every filter needs a new one
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::fftSizeObjectiveChanged(const std::string *oldValue, const std::string *newValue)
+{
+	//only matters if we are picking the fftSize ourselves
+	if (*oldValue != *newValue && fftSize==0) {
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::partitionThresholdChanged(const CORBA::ULong *oldValue, const CORBA::ULong *newValue)
+{
+	if (*oldValue != *newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::resamplingChanged(const CORBA::ULong *oldValue, const CORBA::ULong *newValue)
+{
+	if (*oldValue != *newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::outputScaleChanged(const float *oldValue, const float *newValue)
+{
+	if (*oldValue != *newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::saturateOutputChanged(const bool *oldValue, const bool *newValue)
+{
+	if (*oldValue != *newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::peakDetectionChanged(const peakDetection_struct *oldValue, const peakDetection_struct *newValue)
+{
+	if (*oldValue != *newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::filterPropsChanged(const filterProps_struct *oldValue, const filterProps_struct *newValue)
+{
+	if (oldValue != newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+        realFilterCoefficients.clear();
+        complexFilterCoefficients.clear();
+        correlationMode=false;
+        manualTaps_=false;
+        applyFilterSettings();
+	}
+}
+
+void fastfilter_i::realFilterCoefficientsChanged(const std::vector<float> *oldValue, const std::vector<float> *newValue)
+{
+	//user manually configured the taps with an externally designed filter - set the boolean and update the filter flags
+	if (*oldValue != *newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+		if (!realFilterCoefficients.empty())
+		{
+			manualTaps_=true;
+			complexFilterCoefficients.clear();
+			applyFilterSettings();
+		}
+		else
+		{
+            realFilterCoefficients=*oldValue;
+			LOG_WARN(fastfilter_i, "Ignoring empty configure for realFilterCoefficients -- to clear this setting configure complexFilterCoefficients or filterProps")
+		}
+	}
+}
+
+void fastfilter_i::filterBankChanged(const std::vector<filterBankFilter_struct> *oldValue, const std::vector<filterBankFilter_struct> *newValue)
+{
+	if (*oldValue != *newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::streamFiltersChanged(const std::vector<streamFilter_struct> *oldValue, const std::vector<streamFilter_struct> *newValue)
+{
+	if (*oldValue != *newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::outputDomainChanged(const std::string *oldValue, const std::string *newValue)
+{
+	if (*oldValue != *newValue) {
+		//short filters may need to move from direct convolution to an fft
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::applyFilterSettings()
+{
+	//build the new filters without holding up the streams - must be called with filterLock_ held
+	double start = getTime();
+	boost::shared_ptr<FilterConfig> config(new FilterConfig());
+	config->generation = configGeneration_+1;
+	config->manualTaps = manualTaps_;
+	config->interpolation = std::max(interpolation, CORBA::ULong(1));
+	config->decimation = std::max(decimation, CORBA::ULong(1));
+	config->outputScale = outputScale;
+	config->saturateOutput = saturateOutput;
+	bool resampling = config->interpolation!=1 || config->decimation!=1;
+	config->frequencyOutput = outputDomain=="frequency";
+	if (config->frequencyOutput && !filterBank.empty())
+	{
+		LOG_WARN(fastfilter_i, "frequency domain output is not supported with a filter bank - pushing time domain output");
+		config->frequencyOutput = false;
+	}
+	else if (config->frequencyOutput && resampling)
+	{
+		LOG_WARN(fastfilter_i, "decimation and interpolation are ignored with frequency domain output");
+		config->interpolation = 1;
+		config->decimation = 1;
+		resampling = false;
+	}
+	//streams matching streamFilters get their own filter instead of the one set up below -
+	//done first as designing the component's filter turns correlationMode off
+	if (filterBank.empty() && !streamFilters.empty())
+		getStreamFilterSettings(*config, resampling);
+	if (!filterBank.empty())
+	{
+		if (resampling)
+			LOG_WARN(fastfilter_i, "decimation and interpolation are ignored with a filter bank");
+		if (!streamFilters.empty())
+			LOG_WARN(fastfilter_i, "streamFilters are ignored with a filter bank");
+		getBankSettings(*config);
+	}
+	else if (manualTaps_)
+	{
+		bool real, complex;
+		getManualTaps(real,complex);
+		bool lowLatency = fftSizeObjective=="latency";
+		if (real)
+			config->manualSpectrum = makeSpectrum(realTaps_, fftSize, lowLatency, partitionThreshold, maxLatencySamples, resampling, config->frequencyOutput);
+		else if (complex)
+			config->manualSpectrum = makeSpectrum(complexTaps_, fftSize, lowLatency, partitionThreshold, maxLatencySamples, resampling, config->frequencyOutput);
+	}
+	else
+	{
+		correlationMode=false;
+		config->designKey.type = filterProps.Type;
+		config->designKey.transitionWidth = filterProps.TransitionWidth;
+		config->designKey.ripple = filterProps.Ripple;
+		config->designKey.freq1 = filterProps.freq1;
+		config->designKey.freq2 = filterProps.freq2;
+		config->designKey.complex = filterProps.filterComplex;
+		config->designKey.fftSize = fftSize;
+		config->designKey.lowLatency = fftSize==0 && fftSizeObjective=="latency";
+		config->designKey.partitionThreshold = partitionThreshold;
+		config->designKey.maxLatency = maxLatencySamples;
+		config->designKey.resampling = resampling;
+		config->designKey.frequencyOutput = config->frequencyOutput;
+		config->designKey.correlationMode = correlationMode;
+		//design up front for every sample rate in use so the streams don't have to
+		std::vector<float> sampleRates;
+		{
+			boost::mutex::scoped_lock lock(sampleRateLock_);
+			for (std::map<float, size_t>::iterator i = sampleRates_.begin(); i!=sampleRates_.end(); i++)
+				sampleRates.push_back(i->first);
+		}
+		for (std::vector<float>::iterator i = sampleRates.begin(); i!=sampleRates.end(); i++)
+		{
+			FilterSpectrumPtr spectrum = getDesignedSpectrum(config->designKey, *i*config->interpolation);
+			if (spectrum)
+				config->designed[*i] = spectrum;
+		}
+	}
+	//peaks are only picked from correlation output in the time domain
+	config->detect = correlationMode && peakDetection.enabled && !config->frequencyOutput;
+	config->detection.cfar = peakDetection.thresholdMode=="cfar";
+	config->detection.threshold = peakDetection.threshold;
+	config->detection.noiseWindow = peakDetection.noiseWindow;
+	config->detection.minSeparation = peakDetection.minSeparation;
+	config->fullRateOutput = peakDetection.fullRateOutput;
+	config->batchSamples = batchMaxSamples;
+	config->batchLatency = batchMaxLatency;
+	config->idleTimeout = streamIdleTimeout;
+	config->maxStreams = maxStreams;
+	config->drainEvicted = flushEvictedStreams;
+	config->statistics = statisticsEnabled;
+	preparePlans(*config);
+	double built = getTime();
+
+	//the only time the streams can be held up is while we swap the pointer
+	{
+		boost::mutex::scoped_lock lock(configLock_);
+		config_ = config;
+		++configGeneration_;
+	}
+	double published = getTime();
+
+	boost::mutex::scoped_lock lock(configLock_);
+	configureStats_.configureCount++;
+	configureStats_.lastBuildTime = built-start;
+	configureStats_.lastBlockTime = published-built;
+	configureStats_.maxBlockTime = std::max(configureStats_.maxBlockTime, configureStats_.lastBlockTime);
+}
+
+void fastfilter_i::preparePlans(const FilterConfig& config)
+{
+	//building the spectra above planned their fftSize already - this covers the plans which
+	//would otherwise be made when the first stream comes along
+	if (!config.bank.empty())
+	{
+		if (config.bankManual)
+			FilterBank::preparePlans(config.bankManualSpectra);
+		for (std::map<float, FilterSpectrumList>::const_iterator i = config.bankDesigned.begin(); i!=config.bankDesigned.end(); i++)
+			FilterBank::preparePlans(i->second);
+		if (config.bankDesigned.empty() && config.bankFftSize!=0)
+			FftPlans::get(config.bankFftSize);
+	}
+	else if (config.isDesigned() && config.designed.empty() && config.designKey.fftSize!=0)
+	{
+		//no streams to design for yet, but if the fftSize is configured we know what they
+		//will need
+		FftPlans::get(config.designKey.fftSize);
+	}
+}
+
+void fastfilter_i::getBankSettings(FilterConfig& config)
+{
+	config.bankManual = true;
+	config.bankFftSize = fftSize;
+	config.bankLowLatency = fftSizeObjective=="latency";
+	config.maxLatency = maxLatencySamples;
+	for (std::vector<filterBankFilter_struct>::iterator i = filterBank.begin(); i!=filterBank.end(); i++)
+	{
+		FilterBankEntry entry;
+		entry.streamIDSuffix = i->streamIDSuffix;
+		//templates are reversed to correlate against them
+		if (!i->realFilterCoefficients.empty())
+		{
+			if (correlationMode)
+				entry.taps.assign(i->realFilterCoefficients.rbegin(), i->realFilterCoefficients.rend());
+			else
+				entry.taps.assign(i->realFilterCoefficients.begin(), i->realFilterCoefficients.end());
+		}
+		else if (!i->complexFilterCoefficients.empty())
+		{
+			if (correlationMode)
+				entry.complexTaps.assign(i->complexFilterCoefficients.rbegin(), i->complexFilterCoefficients.rend());
+			else
+				entry.complexTaps.assign(i->complexFilterCoefficients.begin(), i->complexFilterCoefficients.end());
+		}
+		else
+		{
+			config.bankManual = false;
+			entry.designKey.type = i->Type;
+			entry.designKey.transitionWidth = i->TransitionWidth;
+			entry.designKey.ripple = i->Ripple;
+			entry.designKey.freq1 = i->freq1;
+			entry.designKey.freq2 = i->freq2;
+			entry.designKey.complex = i->filterComplex;
+			entry.designKey.fftSize = fftSize;
+			//the bank only needs the taps - it builds its own spectra once it knows the longest filter
+			entry.designKey.resampling = true;
+		}
+		config.bank.push_back(entry);
+	}
+	if (config.bankManual)
+	{
+		config.bankManualSpectra = makeBankSpectra(config, 0);
+		return;
+	}
+	//design up front for every sample rate in use so the streams don't have to
+	std::vector<float> sampleRates;
+	{
+		boost::mutex::scoped_lock lock(sampleRateLock_);
+		for (std::map<float, size_t>::iterator i = sampleRates_.begin(); i!=sampleRates_.end(); i++)
+			sampleRates.push_back(i->first);
+	}
+	for (std::vector<float>::iterator i = sampleRates.begin(); i!=sampleRates.end(); i++)
+	{
+		FilterSpectrumList spectra = makeBankSpectra(config, *i);
+		if (!spectra.empty())
+			config.bankDesigned[*i] = spectra;
+	}
+}
+
+void fastfilter_i::getStreamFilterSettings(FilterConfig& config, bool resampling)
+{
+	bool lowLatency = fftSizeObjective=="latency";
+	for (std::vector<streamFilter_struct>::iterator i = streamFilters.begin(); i!=streamFilters.end(); i++)
+	{
+		StreamFilterEntry entry;
+		entry.streamIDPattern = i->streamIDPattern;
+		//manual taps are turned into a spectrum now, like the component's own
+		if (!i->realFilterCoefficients.empty())
+		{
+			RealFFTWVector taps;
+			getManualTapsTemplate(i->realFilterCoefficients, taps);
+			entry.manualSpectrum = makeSpectrum(taps, fftSize, lowLatency, partitionThreshold, maxLatencySamples, resampling, config.frequencyOutput);
+		}
+		else if (!i->complexFilterCoefficients.empty())
+		{
+			ComplexFFTWVector taps;
+			getManualTapsTemplate(i->complexFilterCoefficients, taps);
+			entry.manualSpectrum = makeSpectrum(taps, fftSize, lowLatency, partitionThreshold, maxLatencySamples, resampling, config.frequencyOutput);
+		}
+		else
+		{
+			//designed filters come out of the tap cache as the streams need them
+			entry.designKey.type = i->Type;
+			entry.designKey.transitionWidth = i->TransitionWidth;
+			entry.designKey.ripple = i->Ripple;
+			entry.designKey.freq1 = i->freq1;
+			entry.designKey.freq2 = i->freq2;
+			entry.designKey.complex = i->filterComplex;
+			entry.designKey.fftSize = fftSize;
+			entry.designKey.lowLatency = fftSize==0 && lowLatency;
+			entry.designKey.partitionThreshold = partitionThreshold;
+			entry.designKey.maxLatency = maxLatencySamples;
+			entry.designKey.resampling = resampling;
+			entry.designKey.frequencyOutput = config.frequencyOutput;
+			entry.designKey.correlationMode = correlationMode;
+		}
+		config.streamFilters.push_back(entry);
+	}
+}
+
+FilterSpectrumList fastfilter_i::getBankSpectra(const FilterConfig& config, float sampleRate)
+{
+	if (config.bankManual)
+		return config.bankManualSpectra;
+	std::map<float, FilterSpectrumList>::const_iterator i = config.bankDesigned.find(sampleRate);
+	if (i!=config.bankDesigned.end())
+		return i->second;
+	return makeBankSpectra(config, sampleRate);
+}
+
+FilterSpectrumList fastfilter_i::makeBankSpectra(const FilterConfig& config, float sampleRate)
+{
+	//gather the taps for every filter - designed filters come out of the tap cache
+	std::vector<ComplexFFTWVector> taps(config.bank.size());
+	std::vector<bool> complex(config.bank.size(), false);
+	size_t numTaps = 0;
+	for (size_t n=0; n!=config.bank.size(); n++)
+	{
+		const FilterBankEntry& entry = config.bank[n];
+		if (!entry.taps.empty())
+			taps[n].assign(entry.taps.begin(), entry.taps.end());
+		else if (!entry.complexTaps.empty())
+		{
+			complex[n] = true;
+			taps[n] = entry.complexTaps;
+		}
+		else
+		{
+			FilterSpectrumPtr designed = getDesignedSpectrum(entry.designKey, sampleRate);
+			if (!designed)
+				return FilterSpectrumList();
+			complex[n] = designed->isComplex();
+			if (complex[n])
+				taps[n].assign(designed->getComplexTaps().begin(), designed->getComplexTaps().end());
+			else
+				taps[n].assign(designed->getRealTaps().begin(), designed->getRealTaps().end());
+		}
+		numTaps = std::max(numTaps, taps[n].size());
+	}
+
+	//every filter has to use the same fft so pad them all to the longest one
+	size_t size = config.bankFftSize;
+	bool bounded = false;
+	if (size==0 && config.maxLatency!=0)
+	{
+		size = FftPlans::chooseSize(numTaps, config.bankLowLatency, false, config.maxLatency+1);
+		bounded = size!=0;
+		if (!bounded)
+			LOG_WARN(fastfilter_i, "no fftSize for the filter bank keeps its latency within maxLatencySamples - a bank can't be partitioned");
+	}
+	if (size==0)
+		size = FftPlans::chooseSize(numTaps, config.bankLowLatency, false);
+	if (!bounded && 2*(numTaps-1)>size)
+	{
+		LOG_WARN(fastfilter_i, "Increasing fftSize for the filter bank to fit its longest filter");
+		while (2*(numTaps-1)>size)
+			size*=2;
+	}
+	LOG_DEBUG(fastfilter_i, "using fftSize "<<size<<" for a bank of "<<taps.size()<<" filters of "<<numTaps<<" taps");
+	FilterSpectrumList spectra;
+	for (size_t n=0; n!=taps.size(); n++)
+	{
+		if (complex[n])
+		{
+			taps[n].resize(numTaps, std::complex<float>(0,0));
+			spectra.push_back(FilterSpectrumPtr(new FilterSpectrum(taps[n], size)));
+		}
+		else
+		{
+			RealFFTWVector realTaps(numTaps, 0);
+			for (size_t k=0; k!=taps[n].size(); k++)
+				realTaps[k] = taps[n][k].real();
+			spectra.push_back(FilterSpectrumPtr(new FilterSpectrum(realTaps, size)));
+		}
+	}
+	return spectra;
+}
+
+FilterConfigPtr fastfilter_i::getConfig(FilterShard& shard)
+{
+	return getConfig(shard.config);
+}
+
+FilterConfigPtr fastfilter_i::getConfig(FilterConfigPtr& current, double* lockWait)
+{
+	//only take the lock when there is something new to pick up
+	if (!current || current->generation!=configGeneration_)
+	{
+		double start = lockWait ? getTime() : 0;
+		boost::mutex::scoped_lock lock(configLock_);
+		if (lockWait)
+			*lockWait += getTime()-start;
+		current = config_;
+	}
+	return current;
+}
+
+configureStatistics_struct fastfilter_i::getConfigureStatistics()
+{
+	boost::mutex::scoped_lock lock(configLock_);
+	return configureStats_;
+}
+
+void fastfilter_i::addSampleRate(float sampleRate)
+{
+	boost::mutex::scoped_lock lock(sampleRateLock_);
+	sampleRates_[sampleRate]++;
+}
+
+void fastfilter_i::removeSampleRate(float sampleRate)
+{
+	boost::mutex::scoped_lock lock(sampleRateLock_);
+	std::map<float, size_t>::iterator i = sampleRates_.find(sampleRate);
+	if (i!=sampleRates_.end() && --i->second==0)
+		sampleRates_.erase(i);
+}
+
+void fastfilter_i::tapCacheSizeChanged(const CORBA::ULong *oldValue, const CORBA::ULong *newValue)
+{
+	if (*oldValue != *newValue) {
+		tapCache_.setCapacity(tapCacheSize);
+	}
+}
+
+void fastfilter_i::streamIdleTimeoutChanged(const double *oldValue, const double *newValue)
+{
+	if (*oldValue != *newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::maxStreamsChanged(const CORBA::ULong *oldValue, const CORBA::ULong *newValue)
+{
+	if (*oldValue != *newValue) {
+		//streams over a lower limit are left alone until new ones come along
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::flushEvictedStreamsChanged(const bool *oldValue, const bool *newValue)
+{
+	if (*oldValue != *newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::batchMaxSamplesChanged(const CORBA::ULong *oldValue, const CORBA::ULong *newValue)
+{
+	if (*oldValue != *newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::batchMaxLatencyChanged(const double *oldValue, const double *newValue)
+{
+	if (*oldValue != *newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+void fastfilter_i::maxLatencySamplesChanged(const CORBA::ULong *oldValue, const CORBA::ULong *newValue)
+{
+	if (*oldValue != *newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+std::vector<streamLatencyEntry_struct> fastfilter_i::getStreamLatency()
+{
+	std::vector<streamLatencyEntry_struct> ret;
+	boost::mutex::scoped_lock shardsLock(shardsLock_);
+	for (std::vector<FilterShard*>::iterator shard = shards_.begin(); shard!=shards_.end(); shard++)
+	{
+		boost::mutex::scoped_lock lock((*shard)->statsLock);
+		for (map_type::iterator i = (*shard)->filters.begin(); i!=(*shard)->filters.end(); i++)
+		{
+			streamLatencyEntry_struct latency;
+			latency.streamID = i->first;
+			latency.latencySamples = i->second.latency;
+			latency.peakLatencySamples = i->second.peakLatency;
+			ret.push_back(latency);
+		}
+	}
+	return ret;
+}
+
+void fastfilter_i::statisticsEnabledChanged(const bool *oldValue, const bool *newValue)
+{
+	if (*oldValue != *newValue) {
+		boost::mutex::scoped_lock lock(filterLock_);
+		applyFilterSettings();
+	}
+}
+
+std::vector<statisticsEntry_struct> fastfilter_i::getStatistics()
+{
+	std::vector<statisticsEntry_struct> ret;
+	if (!statisticsEnabled)
+		return ret;
+	boost::mutex::scoped_lock shardsLock(shardsLock_);
+	for (std::vector<FilterShard*>::iterator shard = shards_.begin(); shard!=shards_.end(); shard++)
+	{
+		boost::mutex::scoped_lock lock((*shard)->statsLock);
+		for (map_type::iterator i = (*shard)->filters.begin(); i!=(*shard)->filters.end(); i++)
+		{
+			ret.push_back(i->second.statistics);
+			ret.back().streamID = i->first;
+		}
+	}
+	return ret;
+}
+
+streamStatistics_struct fastfilter_i::getStreamStatistics()
+{
+	streamStatistics_struct ret;
+	ret.liveStreams = liveStreams_;
+	ret.evictedStreams = evictedStreams_;
+	ret.recreatedStreams = recreatedStreams_;
+	return ret;
+}
+
+tapCacheStatistics_struct fastfilter_i::getTapCacheStatistics()
+{
+	TapCache::Statistics stats = tapCache_.getStatistics();
+	tapCacheStatistics_struct ret;
+	ret.hits = stats.hits;
+	ret.misses = stats.misses;
+	ret.evictions = stats.evictions;
+	ret.entries = stats.entries;
+	return ret;
+}
+
+FilterSpectrumPtr fastfilter_i::getSpectrum(const FilterConfig& config, const std::string& streamID, float sampleRate)
+{
+	const StreamFilterEntry* entry = config.findStreamFilter(streamID);
+	if (entry)
+	{
+		if (entry->manualSpectrum)
+			return entry->manualSpectrum;
+		return getDesignedSpectrum(entry->designKey, sampleRate*config.interpolation);
+	}
+	if (config.manualTaps)
+		return config.manualSpectrum;
+	std::map<float, FilterSpectrumPtr>::const_iterator i = config.designed.find(sampleRate);
+	if (i!=config.designed.end())
+		return i->second;
+	//a sample rate we didn't know about when the settings changed - the filter runs at the
+	//upsampled rate when interpolating
+	return getDesignedSpectrum(config.designKey, sampleRate*config.interpolation);
+}
+
+FilterSpectrumPtr fastfilter_i::getDesignedSpectrum(const TapCacheKey& designKey, float sampleRate)
+{
+	//streams at the same sample rate get the same filter - look for one we already designed
+	TapCacheKey key(designKey);
+	key.sampleRate = sampleRate;
+	FilterSpectrumPtr spectrum = tapCache_.find(key, false);
+	if (spectrum)
+		return spectrum;
+	boost::mutex::scoped_lock lock(designLock_);
+	//another stream may have designed it while we waited for the lock - only this lookup
+	//counts a miss so the misses are the filters we designed
+	spectrum = tapCache_.find(key);
+	if (spectrum)
+		return spectrum;
+	LOG_DEBUG(fastfilter_i, "designing filter for sample rate "<<sampleRate);
+	if (key.complex)
+	{
+		ComplexFFTWVector taps;
+		if (designTaps(taps, key))
+			spectrum = makeSpectrum(taps, key.fftSize, key.lowLatency, key.partitionThreshold, key.maxLatency, key.resampling, key.frequencyOutput);
+	}
+	else
+	{
+		RealFFTWVector taps;
+		if (designTaps(taps, key))
+			spectrum = makeSpectrum(taps, key.fftSize, key.lowLatency, key.partitionThreshold, key.maxLatency, key.resampling, key.frequencyOutput);
+	}
+	if (spectrum)
+		tapCache_.insert(key, spectrum);
+	return spectrum;
+}
+
 void fastfilter_i::getManualTaps(bool& doReal, bool& doComplex)
 {
 	if (!realFilterCoefficients.empty())
@@ -507,43 +2014,55 @@ void fastfilter_i::getManualTapsTemplate(T& in, U& out)
 		out.assign(in.begin(), in.end());
 }
 
+template<typename T>
+FilterSpectrumPtr fastfilter_i::makeSpectrum(const T& taps, size_t configuredSize, bool lowLatency, size_t partitionThreshold, size_t maxLatency, bool resampling, bool frequencyOutput)
+{
+	FilterSpectrumPtr spectrum = FilterDesign::makeSpectrum(taps, configuredSize, lowLatency, partitionThreshold, maxLatency, resampling, frequencyOutput);
+	if (spectrum->getMethod()==FilterSpectrum::DIRECT)
+	{
+		LOG_DEBUG(fastfilter_i, "using direct convolution for "<<taps.size()<<" taps");
+		return spectrum;
+	}
+	if (spectrum->getMethod()==FilterSpectrum::PARTITIONED)
+	{
+		LOG_DEBUG(fastfilter_i, "using partitions of "<<spectrum->getBlockSize()<<" taps for "<<taps.size()<<" taps");
+	}
+	else if (configuredSize==0)
+	{
+		LOG_DEBUG(fastfilter_i, "using fftSize "<<spectrum->getFftSize()<<" for "<<taps.size()<<" taps");
+	}
+	if (maxLatency!=0 && spectrum->getBlockSize()>maxLatency+1)
+	{
+		if (configuredSize==0)
+		{
+			LOG_WARN(fastfilter_i, "no fftSize keeps the latency within maxLatencySamples - frequency domain output needs an fft");
+		}
+		else
+		{
+			LOG_WARN(fastfilter_i, "blocks of "<<spectrum->getBlockSize()<<" samples can hold back more than maxLatencySamples - set fftSize to 0 to have it chosen to fit");
+		}
+	}
+	return spectrum;
+}
+
 void fastfilter_i::validateFftSize(size_t numTaps)
 {
-	if (2*(numTaps-1)>fftSize)
+	size_t size = FilterDesign::fitFftSize(fftSize, partitionThreshold, numTaps);
+	if (size!=fftSize)
 	{
 		LOG_WARN(fastfilter_i, "Increasing fftSize because you configured with manual taps > fftSize!");
-		while (2*(numTaps-1)>fftSize)
-			fftSize*=2;
+		fftSize = size;
 	}
 }
 
 template<typename T>
-void fastfilter_i::designTaps(T& taps, float sampleRate)
-{
-
-	//design the filter according to the filterProps specifications and set the output in the filterCoefficients property
-	FIRFilter::filter_type type;
-	if (filterProps.Type=="lowpass")
-		type = FIRFilter::lowpass;
-	else if (filterProps.Type=="highpass")
-		type = FIRFilter::highpass;
-	else if (filterProps.Type=="bandpass")
-		type = FIRFilter::bandpass;
-	else if (filterProps.Type=="bandstop")
-		type = FIRFilter::bandstop;
-	else
+bool fastfilter_i::designTaps(T& taps, const TapCacheKey& key)
+{
+	//design the filter according to the filterProps specifications
+	if (!FilterDesign::isFilterType(key.type))
 	{
-		LOG_ERROR(fastfilter_i, "filter type "<<filterProps.Type<<" not suported");
-		return;
+		LOG_ERROR(fastfilter_i, "filter type "<<key.type<<" not suported");
+		return false;
 	}
-	//we can only design the filter if we have a valid sampling rate
-	//use the interal filter designer to calculate the taps
-	size_t fftSizeInt(static_cast<size_t>(fftSize));
-	size_t minTaps = std::max(fftSizeInt/16,size_t(10));
-	size_t maxTaps = getMaxTapsSize(fftSizeInt);
-
-	std::vector<typename T::value_type> tmp;
-	filterdesigner_.wdfirHz(tmp,type,filterProps.Ripple, filterProps.TransitionWidth, filterProps.freq1, filterProps.freq2, sampleRate,minTaps,maxTaps);
-	taps.assign(tmp.begin(), tmp.end());
+	return filterDesign_.designTaps(taps, key);
 }
-
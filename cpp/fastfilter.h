@@ -19,9 +19,19 @@
 #define FASTFILTER_IMPL_H
 
 #include "fastfilter_base.h"
-#include "firfilter.h"
-#include "FirFilterDesigner.h"
+#include "OverlapAddFilter.h"
+#include "PolyphaseFilter.h"
+#include "FilterBank.h"
+#include "PeakDetector.h"
+#include "TapCache.h"
+#include "FilterDesign.h"
+#include <deque>
+#include <set>
+#include <fnmatch.h>
+#include <boost/functional/hash.hpp>
 #include <boost/thread/mutex.hpp>
+#include <boost/thread/condition_variable.hpp>
+#include <boost/detail/atomic_count.hpp>
 
 class fastfilter_i;
 
@@ -30,19 +40,94 @@ class FilterWrapper
 	public:
 		FilterWrapper() :
 			filter(NULL),
-			fs_(1.0)
+			resampler(NULL),
+			bank(NULL),
+			inputCount(0),
+			timeIndex(0),
+			frameSize(0),
+			frameStep(0),
+			lastActive(0),
+			evictQueued(false),
+			latency(0),
+			peakLatency(0),
+			fs_(1.0),
+			generation_(0),
+			xdeltaScale_(1.0)
 		{
 		}
 		~FilterWrapper()
 		{
 			if (filter!=NULL)
 				delete filter;
+			if (resampler!=NULL)
+				delete resampler;
+			if (bank!=NULL)
+				delete bank;
 		}
-		void setParams(float sampleRate, firfilter* filter)
+		void setParams(float sampleRate, OverlapAddFilter* filter)
 		{
 			this->filter =filter;
 			fs_ = sampleRate;
 		}
+		//only one of filter, resampler and bank is in use at a time
+		template<typename T>
+		void newRealData(const T* in, size_t size)
+		{
+			if (bank)
+				bank->newRealData(in, size);
+			else if (resampler)
+				resampler->newRealData(in, size);
+			else
+				filter->newRealData(in, size);
+		}
+		template<typename T>
+		void newComplexData(const std::complex<T>* in, size_t size)
+		{
+			if (bank)
+				bank->newComplexData(in, size);
+			else if (resampler)
+				resampler->newComplexData(in, size);
+			else
+				filter->newComplexData(in, size);
+		}
+		void flush()
+		{
+			if (bank)
+				bank->flush();
+			else if (resampler)
+				resampler->flush();
+			else
+				filter->flush();
+		}
+		void drain()
+		{
+			if (bank)
+				bank->drain();
+			else if (resampler)
+				resampler->drain();
+			else
+				filter->drain();
+		}
+		//time the filter's blocks into times, or stop timing with NULL
+		void setTimes(FilterTimes* times)
+		{
+			if (bank)
+				bank->setTimes(times);
+			else if (resampler)
+				resampler->setTimes(times);
+			else
+				filter->setTimes(times);
+		}
+		//the resampler puts out every output its input allows so it never falls behind
+		size_t getLatency()
+		{
+			if (bank)
+				return bank->getLatency();
+			else if (resampler)
+				return 0;
+			else
+				return filter->getLatency();
+		}
 		bool hasSampleRateChanged(float sampleRate)
 		{
 			bool ret(false);
@@ -57,9 +142,337 @@ class FilterWrapper
 		{
 			return fs_;
 		}
-		firfilter* filter;
+		//the FilterConfig generation this filter was last updated from
+		long getGeneration()
+		{
+			return generation_;
+		}
+		void setGeneration(long generation)
+		{
+			generation_ = generation;
+		}
+		//decimation/interpolation applied to the xdelta of the last sri we pushed
+		double getXdeltaScale()
+		{
+			return xdeltaScale_;
+		}
+		void setXdeltaScale(double xdeltaScale)
+		{
+			xdeltaScale_ = xdeltaScale;
+		}
+		OverlapAddFilter* filter;
+		//used in place of filter when resampling - it also holds the stream's phase
+		PolyphaseFilter* resampler;
+		//used in place of filter in filter bank mode - it has an output per filter
+		FilterBank* bank;
+		//peak detection on each output in correlation mode
+		std::vector<PeakDetector> detectors;
+		//input samples seen so far, and the last valid timestamp along with the output sample
+		//it lines up with, so detections can be timestamped whichever packet they end up in
+		unsigned long long inputCount;
+		BULKIO::PrecisionUTCTime timeReference;
+		double timeIndex;
+		//bins per frame and input samples between frames in the last frequency domain sri
+		//we pushed - 0 for time domain output
+		size_t frameSize;
+		size_t frameStep;
+		//the input sri and time of the last packet and when it was filtered - enough to end
+		//the stream if it goes quiet
+		BULKIO::StreamSRI sri;
+		BULKIO::PrecisionUTCTime lastTime;
+		//when the stream last had data and whether another shard has asked for it to be ended
+		//to make room under maxStreams - guarded by the shard's statsLock
+		double lastActive;
+		bool evictQueued;
+		//input samples held back after the last packet and the most there have ever been -
+		//guarded by the shard's statsLock
+		size_t latency;
+		size_t peakLatency;
+		//the filter's block timings so far - only touched by the shard's thread - and the
+		//stream's statistics as of the last packet, guarded by the shard's statsLock
+		FilterTimes times;
+		statisticsEntry_struct statistics;
 	private:
 		float fs_;
+		long generation_;
+		double xdeltaScale_;
+};
+
+/**
+ * One packet of input for a stream from any of the input ports.
+ *
+ * The samples are never copied - with the bulkio stream api the buffer shares the memory
+ * the block arrived in, otherwise it takes over the packet's vector.
+ */
+struct FilterPacket
+{
+	FilterPacket() :
+		sriChanged(false),
+		EOS(false),
+		inputQueueFlushed(false),
+		evicted(false),
+		evictRequest(false),
+		received(0)
+	{
+	}
+	virtual ~FilterPacket()
+	{
+	}
+
+	//run the samples through the stream's filter - they are converted to float as they are loaded
+	virtual void filter(FilterWrapper& wrapper) const = 0;
+	//the samples as floats for when there is no filter for the stream
+	virtual void copy(OverlapAddFilter::realVector& out) const = 0;
+	//number of samples - complex samples count once
+	virtual size_t size() const = 0;
+	//add the samples of later packets from the same port on the end, along with the last
+	//one's eos
+	virtual void append(const std::vector<FilterPacket*>& packets) = 0;
+
+	std::string streamID;
+	BULKIO::StreamSRI SRI;
+	BULKIO::PrecisionUTCTime T;
+	bool sriChanged;
+	bool EOS;
+	bool inputQueueFlushed;
+	//an EOS with no samples to end a stream we are dropping
+	bool evicted;
+	//no data - asks the shard which owns the stream to end it to make room under maxStreams
+	bool evictRequest;
+	//when the packet was read from its port
+	double received;
+};
+
+template<typename Sample>
+struct SamplePacket : public FilterPacket
+{
+	void filter(FilterWrapper& wrapper) const
+	{
+		const Sample* data = buffer.empty() ? NULL : &buffer[0];
+		if (SRI.mode==1)
+			wrapper.newComplexData(reinterpret_cast<const std::complex<Sample>*>(data), buffer.size()/2);
+		else
+			wrapper.newRealData(data, buffer.size());
+	}
+	void copy(OverlapAddFilter::realVector& out) const
+	{
+		out.assign(buffer.begin(), buffer.end());
+	}
+	size_t size() const
+	{
+		return SRI.mode==1 ? buffer.size()/2 : buffer.size();
+	}
+	void append(const std::vector<FilterPacket*>& packets)
+	{
+		size_t total = buffer.size();
+		for (std::vector<FilterPacket*>::const_iterator i = packets.begin(); i!=packets.end(); i++)
+			total += static_cast<const SamplePacket<Sample>*>(*i)->buffer.size();
+#ifdef HAVE_BULKIO_STREAMS
+		//the buffers are shared with the port so they have to be copied into a new one
+		redhawk::buffer<Sample> joined(total);
+		size_t pos = buffer.size();
+		if (pos)
+			std::copy(buffer.begin(), buffer.end(), &joined[0]);
+		for (std::vector<FilterPacket*>::const_iterator i = packets.begin(); i!=packets.end(); i++)
+		{
+			const redhawk::shared_buffer<Sample>& more = static_cast<const SamplePacket<Sample>*>(*i)->buffer;
+			if (!more.empty())
+				std::copy(more.begin(), more.end(), &joined[pos]);
+			pos += more.size();
+		}
+		buffer = joined;
+#else
+		buffer.reserve(total);
+		for (std::vector<FilterPacket*>::const_iterator i = packets.begin(); i!=packets.end(); i++)
+		{
+			const std::vector<Sample>& more = static_cast<const SamplePacket<Sample>*>(*i)->buffer;
+			buffer.insert(buffer.end(), more.begin(), more.end());
+		}
+#endif
+		if (!packets.empty())
+			EOS = packets.back()->EOS;
+	}
+
+#ifdef HAVE_BULKIO_STREAMS
+	redhawk::shared_buffer<Sample> buffer;
+#else
+	std::vector<Sample> buffer;
+#endif
+};
+
+/**
+ * One filter of a filter bank - either manual taps or a filter to design for each sample rate.
+ */
+struct FilterBankEntry
+{
+	//appended to the input streamID for this filter's output
+	std::string streamIDSuffix;
+	RealFFTWVector taps;
+	ComplexFFTWVector complexTaps;
+	TapCacheKey designKey;
+};
+
+/**
+ * The filter for the streams whose streamID matches a pattern - either manual taps or a
+ * filter to design for each sample rate.
+ */
+struct StreamFilterEntry
+{
+	std::string streamIDPattern;
+	//empty for a designed filter
+	FilterSpectrumPtr manualSpectrum;
+	TapCacheKey designKey;
+};
+
+/**
+ * Everything a stream needs to pick its filter, as of a single configure.
+ *
+ * A FilterConfig is never modified once it is published - a configure builds a whole new one
+ * and swaps it in, so the streams never wait on the filter designer.
+ */
+struct FilterConfig
+{
+	FilterConfig() :
+		generation(0),
+		manualTaps(false),
+		interpolation(1),
+		decimation(1),
+		outputScale(1.0),
+		saturateOutput(true),
+		bankManual(false),
+		bankFftSize(0),
+		bankLowLatency(false),
+		maxLatency(0),
+		frequencyOutput(false),
+		detect(false),
+		fullRateOutput(true),
+		batchSamples(0),
+		batchLatency(0),
+		idleTimeout(0),
+		maxStreams(0),
+		drainEvicted(false),
+		statistics(true)
+	{
+	}
+
+	//true if each sample rate needs its own filters
+	bool isDesigned() const
+	{
+		return bank.empty() ? !manualTaps : !bankManual;
+	}
+	//the first of streamFilters for the stream, or NULL if it uses the component's filter
+	const StreamFilterEntry* findStreamFilter(const std::string& streamID) const
+	{
+		for (std::vector<StreamFilterEntry>::const_iterator i = streamFilters.begin(); i!=streamFilters.end(); i++)
+		{
+			if (fnmatch(i->streamIDPattern.c_str(), streamID.c_str(), 0)==0)
+				return &*i;
+		}
+		return NULL;
+	}
+	//as above for the filter this stream uses
+	bool isDesigned(const std::string& streamID) const
+	{
+		const StreamFilterEntry* entry = findStreamFilter(streamID);
+		return entry ? !entry->manualSpectrum : isDesigned();
+	}
+
+	long generation;
+	bool manualTaps;
+	size_t interpolation;
+	size_t decimation;
+	//applied to the output written to dataShort_out
+	float outputScale;
+	bool saturateOutput;
+	//the filter every stream uses with manual taps
+	FilterSpectrumPtr manualSpectrum;
+	//filterProps and fftSize for designed filters along with the filters designed up front
+	//for the sample rates in use
+	TapCacheKey designKey;
+	std::map<float, FilterSpectrumPtr> designed;
+	//streams matching one of these use its filter instead - not used with a bank
+	std::vector<StreamFilterEntry> streamFilters;
+	//the filter bank if there is one - the filters above are not used with a bank.  Like the
+	//single filter the bank is built once if every entry has manual taps and up front for the
+	//sample rates in use otherwise
+	std::vector<FilterBankEntry> bank;
+	bool bankManual;
+	size_t bankFftSize;
+	bool bankLowLatency;
+	//most input samples the bank may hold back - 0 for no limit
+	size_t maxLatency;
+	FilterSpectrumList bankManualSpectra;
+	std::map<float, FilterSpectrumList> bankDesigned;
+	//push the filtered spectrum of each block rather than samples
+	bool frequencyOutput;
+	//report correlation peaks on detections_out - the filtered data is only pushed as well
+	//with fullRateOutput
+	bool detect;
+	PeakDetector::Settings detection;
+	bool fullRateOutput;
+	//consecutive packets for a stream already waiting at an input are filtered and pushed
+	//together, up to batchSamples samples spanning at most batchLatency seconds - 0 turns
+	//batching off and puts no limit on the span respectively
+	size_t batchSamples;
+	double batchLatency;
+	//streams are ended after idleTimeout seconds without data, and the least recently used
+	//is ended to make room for a new one beyond maxStreams - 0 for no limit either way.
+	//drainEvicted pushes the rest of the filter output first
+	double idleTimeout;
+	size_t maxStreams;
+	bool drainEvicted;
+	//time each stream's filtering for the statistics property
+	bool statistics;
+};
+typedef boost::shared_ptr<const FilterConfig> FilterConfigPtr;
+
+/**
+ * A group of streams filtered by a single thread.
+ *
+ * Each streamID hashes to exactly one shard, so its packets are always filtered in order
+ * and its FilterWrapper is only touched by that shard's thread.  When the component runs
+ * with one thread the only shard is processed directly on the service thread.
+ */
+struct FilterShard
+{
+	typedef std::map<std::string, FilterWrapper> map_type;
+
+	FilterShard() :
+		lastSweep(0),
+		thread(0),
+		running(false)
+	{
+	}
+	~FilterShard()
+	{
+		for (std::deque<FilterPacket*>::iterator i = queue.begin(); i!=queue.end(); i++)
+			delete *i;
+	}
+
+	map_type filters;
+	OverlapAddFilter::realVector realOut;
+	OverlapAddFilter::complexVector complexOut;
+	//work buffers shared by every filter in the shard - a stream only keeps its filter state
+	FilterScratch scratch;
+	//the settings this shard's streams are using - only touched by the shard's thread
+	FilterConfigPtr config;
+	//streams this shard evicted, so we can tell if they come back, and when it last looked
+	//for idle streams
+	std::set<std::string> evicted;
+	std::deque<std::string> evictedOrder;
+	double lastSweep;
+	//the shard's thread holds this while it adds or removes streams or updates their
+	//latency so the per stream statistics can be read from other threads
+	boost::mutex statsLock;
+
+	//packets waiting for the worker thread - a NULL packet asks the worker to flush its filters.
+	//Eviction requests from the other shards skip the depth limit so two full shards can't wait
+	//on each other
+	std::deque<FilterPacket*> queue;
+	boost::mutex queueLock;
+	boost::condition_variable queueCond;
+	boost::thread* thread;
+	bool running;
 };
 
 class fastfilter_i : public fastfilter_base
@@ -70,38 +483,146 @@ class fastfilter_i : public fastfilter_base
         ~fastfilter_i();
         int serviceFunction();
 
+        void start() throw (CF::Resource::StartError, CORBA::SystemException);
+        void stop() throw (CF::Resource::StopError, CORBA::SystemException);
+
         void configure (const CF::Properties& configProperties)
             throw (CF::PropertySet::PartialConfiguration,
                    CF::PropertySet::InvalidConfiguration, CORBA::SystemException);
 
     private:
 
-        typedef std::map<std::string, FilterWrapper> map_type;
-   		map_type filters_;
+        typedef FilterShard::map_type map_type;
+        //packets a worker may have queued before the service thread waits for it
+        static const size_t MAX_SHARD_QUEUE_DEPTH = 16;
+        //evicted streamIDs each shard remembers so it can count the ones which come back
+        static const size_t MAX_EVICTED_IDS = 4096;
+        std::vector<FilterShard*> shards_;
+        //held while start() rebuilds the shards or brings up their workers, and by anything
+        //which reads shards_ from outside the workers
+        boost::mutex shardsLock_;
 
-        firfilter::realVector realOut;
-        firfilter::complexVector complexOut;
+        //the input ports in the order they are polled
+        enum { FLOAT_INPUT, SHORT_INPUT, DOUBLE_INPUT, NUM_INPUTS };
+        //a packet read while batching which couldn't join the batch - it is the next one
+        //read from its input
+        FilterPacket* heldPackets_[NUM_INPUTS];
+        //the settings as of the last packet read - only touched by the service thread
+        FilterConfigPtr inputConfig_;
+        size_t nextInput_;
+
+        FilterPacket* readPacket();
+        FilterPacket* readInput(size_t input, float timeout=bulkio::Const::NON_BLOCKING);
+        FilterPacket* batchPackets(size_t input, FilterPacket* packet);
+        void processPacket(FilterShard& shard, FilterPacket *packet);
+        void pushOutput(FilterPacket& packet, const std::string& streamID, OverlapAddFilter::realVector& realOut, OverlapAddFilter::complexVector& complexOut, const FilterConfig& config, bool updateSRI);
+        void pushFloatOutput(FilterPacket& packet, BULKIO::StreamSRI& sri, OverlapAddFilter::realVector& realOut, OverlapAddFilter::complexVector& complexOut, bool updateSRI);
+        template<typename T, typename Port>
+        void pushConvertedOutput(Port* port, FilterPacket& packet, const BULKIO::StreamSRI& sri, const OverlapAddFilter::realVector& realOut, const OverlapAddFilter::complexVector& complexOut, const FilterConfig& config, bool updateSRI);
+        void detectPeaks(FilterWrapper& wrapper, size_t output, FilterPacket& packet, const std::string& streamID, const OverlapAddFilter::realVector& realOut, const OverlapAddFilter::complexVector& complexOut);
+        void queuePacket(FilterShard& shard, FilterPacket *packet);
+        void flushShard(FilterShard& shard);
+        void shardThread(FilterShard* shard);
+        void flushFilters(FilterShard& shard);
+        void stopShardThreads();
+        void sweepIdleStreams(FilterShard& shard);
+        void evictLeastRecent(FilterShard& shard);
+        void evictRequested(FilterShard& shard, const std::string& streamID);
+        void evictStream(FilterShard& shard, map_type::iterator i);
+        void endStream(FilterShard& shard, map_type::iterator i);
 
         void complexFilterCoefficientsChanged(const std::vector<std::complex<float> > *oldValue, const std::vector<std::complex<float> > *newValue);
         void correlationModeChanged(const bool *oldValue, const bool *newValue);
         void filterPropsChanged(const filterProps_struct *oldValue, const filterProps_struct *newValue);
         void fftSizeChanged(const CORBA::ULong *oldValue, const CORBA::ULong *newValue);
+        void fftSizeObjectiveChanged(const std::string *oldValue, const std::string *newValue);
+        void outputScaleChanged(const float *oldValue, const float *newValue);
+        void saturateOutputChanged(const bool *oldValue, const bool *newValue);
+        void outputDomainChanged(const std::string *oldValue, const std::string *newValue);
+        void peakDetectionChanged(const peakDetection_struct *oldValue, const peakDetection_struct *newValue);
+        void partitionThresholdChanged(const CORBA::ULong *oldValue, const CORBA::ULong *newValue);
+        void resamplingChanged(const CORBA::ULong *oldValue, const CORBA::ULong *newValue);
         void realFilterCoefficientsChanged(const std::vector<float> *oldValue, const std::vector<float> *newValue);
+        void filterBankChanged(const std::vector<filterBankFilter_struct> *oldValue, const std::vector<filterBankFilter_struct> *newValue);
+        void streamFiltersChanged(const std::vector<streamFilter_struct> *oldValue, const std::vector<streamFilter_struct> *newValue);
+        void tapCacheSizeChanged(const CORBA::ULong *oldValue, const CORBA::ULong *newValue);
+        void streamIdleTimeoutChanged(const double *oldValue, const double *newValue);
+        void maxStreamsChanged(const CORBA::ULong *oldValue, const CORBA::ULong *newValue);
+        void flushEvictedStreamsChanged(const bool *oldValue, const bool *newValue);
+        void batchMaxSamplesChanged(const CORBA::ULong *oldValue, const CORBA::ULong *newValue);
+        void batchMaxLatencyChanged(const double *oldValue, const double *newValue);
+        streamStatistics_struct getStreamStatistics();
+        void maxLatencySamplesChanged(const CORBA::ULong *oldValue, const CORBA::ULong *newValue);
+        std::vector<streamLatencyEntry_struct> getStreamLatency();
+        void statisticsEnabledChanged(const bool *oldValue, const bool *newValue);
+        std::vector<statisticsEntry_struct> getStatistics();
+        tapCacheStatistics_struct getTapCacheStatistics();
+        configureStatistics_struct getConfigureStatistics();
+        void fftwWisdomFileChanged(const std::string *oldValue, const std::string *newValue);
+        planStatistics_struct getPlanStatistics();
+        void loadWisdom();
+        void saveWisdom();
+        void preparePlans(const FilterConfig& config);
+
+        void applyFilterSettings();
+        FilterConfigPtr getConfig(FilterShard& shard);
+        FilterConfigPtr getConfig(FilterConfigPtr& current, double* lockWait=NULL);
+        void addSampleRate(float sampleRate);
+        void removeSampleRate(float sampleRate);
 
         void getManualTaps(bool& doReal, bool& doComplex);
         template<typename T, typename U>
         void getManualTapsTemplate(T& in, U& out);
         template<typename T>
-        void designTaps(T& taps, float sampleRate);
+        bool designTaps(T& taps, const TapCacheKey& key);
         void validateFftSize(size_t numTaps);
+        template<typename T>
+        FilterSpectrumPtr makeSpectrum(const T& taps, size_t configuredSize, bool lowLatency, size_t partitionThreshold, size_t maxLatency, bool resampling, bool frequencyOutput);
+        bool updateFilter(FilterShard& shard, FilterWrapper& wrapper, const FilterConfig& config, const std::string& streamID, float sampleRate);
+        void applySpectrum(FilterShard& shard, FilterWrapper& wrapper, const FilterConfig& config, const FilterSpectrumPtr& spectrum);
+        void applyBank(FilterShard& shard, FilterWrapper& wrapper, const FilterSpectrumList& spectra);
+        void getBankSettings(FilterConfig& config);
+        void getStreamFilterSettings(FilterConfig& config, bool resampling);
+        FilterSpectrumList getBankSpectra(const FilterConfig& config, float sampleRate);
+        FilterSpectrumList makeBankSpectra(const FilterConfig& config, float sampleRate);
+        FilterSpectrumPtr getSpectrum(const FilterConfig& config, const std::string& streamID, float sampleRate);
+        FilterSpectrumPtr getDesignedSpectrum(const TapCacheKey& designKey, float sampleRate);
 
-        FirFilterDesigner filterdesigner_;
+        FilterDesign filterDesign_;
+        //the designer keeps state between calls
+        boost::mutex designLock_;
         bool manualTaps_;
 
+        //designed filters shared between streams
+        TapCache tapCache_;
+
         RealFFTWVector realTaps_;
         ComplexFFTWVector complexTaps_;
 
+        //serializes the callbacks - guards the filter settings and the tap scratch vectors above
         boost::mutex filterLock_;
+
+        //the current settings - the streams only take the lock when the generation moves on
+        FilterConfigPtr config_;
+        boost::detail::atomic_count configGeneration_;
+        configureStatistics_struct configureStats_;
+        boost::mutex configLock_;
+
+        //fftw wisdom from fftwWisdomFile - the plan count as of the last load or save tells us
+        //if there is anything new to save
+        bool wisdomLoaded_;
+        unsigned long wisdomPlanCount_;
+
+        //number of live streams at each sample rate so a configure can design their filters up front
+        std::map<float, size_t> sampleRates_;
+        boost::mutex sampleRateLock_;
+
+        //streams across all of the shards
+        boost::detail::atomic_count liveStreams_;
+        //live streams another shard has been asked to end but not got to yet
+        boost::detail::atomic_count pendingEvictions_;
+        boost::detail::atomic_count evictedStreams_;
+        boost::detail::atomic_count recreatedStreams_;
 };
 
 #endif
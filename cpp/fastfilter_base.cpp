@@ -36,16 +36,36 @@ fastfilter_base::fastfilter_base(const char *uuid, const char *label) :
 
     dataFloat_in = new bulkio::InFloatPort("dataFloat_in");
     addPort("dataFloat_in", dataFloat_in);
+    dataShort_in = new bulkio::InShortPort("dataShort_in");
+    addPort("dataShort_in", dataShort_in);
+    dataDouble_in = new bulkio::InDoublePort("dataDouble_in");
+    addPort("dataDouble_in", dataDouble_in);
     dataFloat_out = new bulkio::OutFloatPort("dataFloat_out");
     addPort("dataFloat_out", dataFloat_out);
+    dataShort_out = new bulkio::OutShortPort("dataShort_out");
+    addPort("dataShort_out", dataShort_out);
+    dataDouble_out = new bulkio::OutDoublePort("dataDouble_out");
+    addPort("dataDouble_out", dataDouble_out);
+    detections_out = new MessageSupplierPort("detections_out");
+    addPort("detections_out", detections_out);
 }
 
 fastfilter_base::~fastfilter_base()
 {
     delete dataFloat_in;
     dataFloat_in = 0;
+    delete dataShort_in;
+    dataShort_in = 0;
+    delete dataDouble_in;
+    dataDouble_in = 0;
     delete dataFloat_out;
     dataFloat_out = 0;
+    delete dataShort_out;
+    dataShort_out = 0;
+    delete dataDouble_out;
+    dataDouble_out = 0;
+    delete detections_out;
+    detections_out = 0;
 }
 
 /*******************************************************************************************
@@ -123,6 +143,236 @@ void fastfilter_base::loadProperties()
                 "external",
                 "configure");
 
+    addProperty(tapCacheSize,
+                64,
+                "tapCacheSize",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(tapCacheStatistics,
+                tapCacheStatistics_struct(),
+                "tapCacheStatistics",
+                "",
+                "readonly",
+                "",
+                "external",
+                "configure");
+
+    addProperty(numThreads,
+                1,
+                "numThreads",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(fftSizeObjective,
+                "throughput",
+                "fftSizeObjective",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(partitionThreshold,
+                4096,
+                "partitionThreshold",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(maxLatencySamples,
+                0,
+                "maxLatencySamples",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(decimation,
+                1,
+                "decimation",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(interpolation,
+                1,
+                "interpolation",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(configureStatistics,
+                configureStatistics_struct(),
+                "configureStatistics",
+                "",
+                "readonly",
+                "",
+                "external",
+                "configure");
+
+    addProperty(fftwWisdomFile,
+                "",
+                "fftwWisdomFile",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(planStatistics,
+                planStatistics_struct(),
+                "planStatistics",
+                "",
+                "readonly",
+                "",
+                "external",
+                "configure");
+
+    addProperty(batchMaxSamples,
+                0,
+                "batchMaxSamples",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(batchMaxLatency,
+                0.0,
+                "batchMaxLatency",
+                "",
+                "readwrite",
+                "s",
+                "external",
+                "configure");
+
+    addProperty(streamIdleTimeout,
+                0.0,
+                "streamIdleTimeout",
+                "",
+                "readwrite",
+                "s",
+                "external",
+                "configure");
+
+    addProperty(maxStreams,
+                0,
+                "maxStreams",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(flushEvictedStreams,
+                false,
+                "flushEvictedStreams",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(streamStatistics,
+                streamStatistics_struct(),
+                "streamStatistics",
+                "",
+                "readonly",
+                "",
+                "external",
+                "configure");
+
+    addProperty(outputScale,
+                1.0,
+                "outputScale",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(saturateOutput,
+                true,
+                "saturateOutput",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(outputDomain,
+                "time",
+                "outputDomain",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(filterBank,
+                "filterBank",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(streamFilters,
+                "streamFilters",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(streamLatency,
+                "streamLatency",
+                "",
+                "readonly",
+                "",
+                "external",
+                "configure");
+
+    addProperty(statisticsEnabled,
+                true,
+                "statisticsEnabled",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
+    addProperty(statistics,
+                "statistics",
+                "",
+                "readonly",
+                "",
+                "external",
+                "configure");
+
+    addProperty(peakDetection,
+                peakDetection_struct(),
+                "peakDetection",
+                "",
+                "readwrite",
+                "",
+                "external",
+                "configure");
+
 }
 
 
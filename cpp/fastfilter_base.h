@@ -24,6 +24,7 @@
 #include <ossie/ThreadedComponent.h>
 
 #include <bulkio/bulkio.h>
+#include <ossie/MessageInterface.h>
 #include "struct_props.h"
 
 class fastfilter_base : public Resource_impl, protected ThreadedComponent
@@ -47,10 +48,41 @@ class fastfilter_base : public Resource_impl, protected ThreadedComponent
         std::vector<float> realFilterCoefficients;
         std::vector<std::complex<float> > complexFilterCoefficients;
         filterProps_struct filterProps;
+        CORBA::ULong tapCacheSize;
+        tapCacheStatistics_struct tapCacheStatistics;
+        CORBA::ULong numThreads;
+        std::string fftSizeObjective;
+        CORBA::ULong partitionThreshold;
+        CORBA::ULong maxLatencySamples;
+        CORBA::ULong decimation;
+        CORBA::ULong interpolation;
+        configureStatistics_struct configureStatistics;
+        std::string fftwWisdomFile;
+        planStatistics_struct planStatistics;
+        CORBA::ULong batchMaxSamples;
+        double batchMaxLatency;
+        double streamIdleTimeout;
+        CORBA::ULong maxStreams;
+        bool flushEvictedStreams;
+        streamStatistics_struct streamStatistics;
+        float outputScale;
+        bool saturateOutput;
+        std::string outputDomain;
+        std::vector<filterBankFilter_struct> filterBank;
+        std::vector<streamFilter_struct> streamFilters;
+        std::vector<streamLatencyEntry_struct> streamLatency;
+        bool statisticsEnabled;
+        std::vector<statisticsEntry_struct> statistics;
+        peakDetection_struct peakDetection;
 
         // Ports
         bulkio::InFloatPort *dataFloat_in;
+        bulkio::InShortPort *dataShort_in;
+        bulkio::InDoublePort *dataDouble_in;
         bulkio::OutFloatPort *dataFloat_out;
+        bulkio::OutShortPort *dataShort_out;
+        bulkio::OutDoublePort *dataDouble_out;
+        MessageSupplierPort *detections_out;
 
     private:
 };
@@ -0,0 +1,541 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+
+/*
+ * fastfilter_engine - the component's overlap-add filter and filter designer as a python module.
+ *
+ *     import numpy, fastfilter_engine
+ *     taps = fastfilter_engine.designTaps('lowpass', 1e6, freq1=100e3, TransitionWidth=10e3)
+ *     filt = fastfilter_engine.Filter(taps, fftSize=1024)
+ *     out = filt.filter(numpy.asarray(samples, numpy.complex64))
+ *     out = numpy.concatenate((out, filt.drain()))
+ *
+ * Samples and taps are read where they are through the buffer protocol - anything C contiguous
+ * of float32 or complex64, such as a numpy array, is used without a copy.  Output comes back as
+ * numpy arrays, which is the only use made of numpy so it isn't needed to build the module.
+ *
+ * A Filter is one stream in the component: its state carries over from one call to the next so
+ * data can be fed in pieces of any size.  The GIL is released while filtering so filters used
+ * from different threads run in parallel, but a single Filter is only usable by one thread at
+ * a time.
+ */
+
+#include <Python.h>
+#include "FilterDesign.h"
+#include <algorithm>
+#include <cstring>
+#include <string>
+#include <boost/thread/mutex.hpp>
+
+namespace
+{
+	//the byte order character python uses for this machine
+	const char NATIVE_ORDER = __BYTE_ORDER__==__ORDER_LITTLE_ENDIAN__ ? '<' : '>';
+
+	//float32 or complex64 samples read through the buffer protocol - released when it goes out of scope
+	class SampleBuffer
+	{
+		public:
+			SampleBuffer() :
+				held_(false),
+				complex_(false)
+			{
+			}
+			~SampleBuffer()
+			{
+				if (held_)
+					PyBuffer_Release(&view_);
+			}
+
+			//false with a python exception set if obj doesn't hold the samples we need
+			bool get(PyObject* obj, const char* name)
+			{
+				if (PyObject_GetBuffer(obj, &view_, PyBUF_C_CONTIGUOUS|PyBUF_FORMAT)!=0)
+					return false;
+				held_ = true;
+				std::string format(view_.format ? view_.format : "B");
+				//numpy gives the byte order when it isn't the native one
+				if (!format.empty() && (format[0]=='@' || format[0]=='=' || format[0]==NATIVE_ORDER))
+					format.erase(0, 1);
+				if (format=="f" && view_.itemsize==sizeof(float))
+					complex_ = false;
+				else if (format=="Zf" && view_.itemsize==sizeof(std::complex<float>))
+					complex_ = true;
+				else
+				{
+					PyErr_Format(PyExc_TypeError, "%s must be float32 or complex64 samples, not format '%s'", name, view_.format ? view_.format : "B");
+					return false;
+				}
+				return true;
+			}
+			bool isComplex() const
+			{
+				return complex_;
+			}
+			size_t size() const
+			{
+				return view_.len/view_.itemsize;
+			}
+			const float* realData() const
+			{
+				return static_cast<const float*>(view_.buf);
+			}
+			const std::complex<float>* complexData() const
+			{
+				return static_cast<const std::complex<float>*>(view_.buf);
+			}
+
+		private:
+			SampleBuffer(const SampleBuffer&);
+			SampleBuffer& operator=(const SampleBuffer&);
+
+			Py_buffer view_;
+			bool held_;
+			bool complex_;
+	};
+
+	//wrap size samples starting at data in a new numpy array
+	PyObject* makeArray(const void* data, size_t size, bool complex)
+	{
+		static PyObject* frombuffer = NULL;
+		if (!frombuffer)
+		{
+			PyObject* numpy = PyImport_ImportModule("numpy");
+			if (!numpy)
+				return NULL;
+			frombuffer = PyObject_GetAttrString(numpy, "frombuffer");
+			Py_DECREF(numpy);
+			if (!frombuffer)
+				return NULL;
+		}
+		size_t bytes = size*(complex ? sizeof(std::complex<float>) : sizeof(float));
+		PyObject* buffer = PyByteArray_FromStringAndSize(NULL, bytes);
+		if (!buffer)
+			return NULL;
+		if (bytes)
+			memcpy(PyByteArray_AS_STRING(buffer), data, bytes);
+		//the array keeps the bytearray alive and can be written to
+		PyObject* array = PyObject_CallFunction(frombuffer, const_cast<char*>("Os"), buffer, complex ? "complex64" : "float32");
+		Py_DECREF(buffer);
+		return array;
+	}
+
+	//copy taps out of a python buffer, reversed for correlation
+	template<typename T, typename U>
+	void loadTaps(const U* in, size_t size, bool correlationMode, T& taps)
+	{
+		if (correlationMode)
+			taps.assign(std::reverse_iterator<const U*>(in+size), std::reverse_iterator<const U*>(in));
+		else
+			taps.assign(in, in+size);
+	}
+
+	//designTaps() shares one designer
+	FilterDesign designer;
+	boost::mutex designLock;
+}
+
+/**
+ * One stream's filter.  It is only touched with the GIL held or by the one thread which set
+ * busy while holding it.
+ */
+class FilterEngine
+{
+	public:
+		FilterEngine(const FilterSpectrumPtr& spectrum) :
+			filter(realOut, complexOut, spectrum),
+			complexInput(false),
+			busy(false)
+		{
+		}
+
+		//the output so far as a single array and start over - complex output is followed by
+		//any real output as the component pushes them, so both come out complex
+		PyObject* takeOutput()
+		{
+			bool complex = !complexOut.empty() || complexInput || filter.getSpectrum()->isComplex();
+			PyObject* array;
+			if (!complex)
+				array = makeArray(realOut.empty() ? NULL : &realOut[0], realOut.size(), false);
+			else
+			{
+				complexOut.insert(complexOut.end(), realOut.begin(), realOut.end());
+				array = makeArray(complexOut.empty() ? NULL : &complexOut[0], complexOut.size(), true);
+			}
+			realOut.clear();
+			complexOut.clear();
+			return array;
+		}
+
+		OverlapAddFilter::realVector realOut;
+		OverlapAddFilter::complexVector complexOut;
+		OverlapAddFilter filter;
+		//the type of the last input, which is the type of the filter state
+		bool complexInput;
+		//a thread is filtering without the GIL
+		bool busy;
+};
+
+typedef struct
+{
+	PyObject_HEAD
+	FilterEngine* engine;
+} FilterObject;
+
+static void Filter_dealloc(FilterObject* self)
+{
+	delete self->engine;
+	Py_TYPE(self)->tp_free(reinterpret_cast<PyObject*>(self));
+}
+
+static PyObject* Filter_new(PyTypeObject* type, PyObject*, PyObject*)
+{
+	FilterObject* self = reinterpret_cast<FilterObject*>(type->tp_alloc(type, 0));
+	if (self)
+		self->engine = NULL;
+	return reinterpret_cast<PyObject*>(self);
+}
+
+static int Filter_init(FilterObject* self, PyObject* args, PyObject* kwds)
+{
+	static const char* keywords[] = {"taps", "fftSize", "correlationMode", "fftSizeObjective", "partitionThreshold", NULL};
+	PyObject* tapsObj;
+	Py_ssize_t fftSize = 1024;
+	PyObject* correlationObj = Py_False;
+	const char* objective = "throughput";
+	Py_ssize_t partitionThreshold = 4096;
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|nOsn:Filter", const_cast<char**>(keywords), &tapsObj, &fftSize, &correlationObj, &objective, &partitionThreshold))
+		return -1;
+	int correlationMode = PyObject_IsTrue(correlationObj);
+	if (correlationMode<0)
+		return -1;
+	if (fftSize<0 || partitionThreshold<0)
+	{
+		PyErr_SetString(PyExc_ValueError, "fftSize and partitionThreshold cannot be negative");
+		return -1;
+	}
+	if (strcmp(objective, "throughput")!=0 && strcmp(objective, "latency")!=0)
+	{
+		PyErr_SetString(PyExc_ValueError, "fftSizeObjective must be throughput or latency");
+		return -1;
+	}
+	bool lowLatency = strcmp(objective, "latency")==0;
+	SampleBuffer taps;
+	if (!taps.get(tapsObj, "taps"))
+		return -1;
+	if (taps.size()==0)
+	{
+		PyErr_SetString(PyExc_ValueError, "no taps");
+		return -1;
+	}
+
+	FilterEngine* engine = NULL;
+	std::string error;
+	//measuring the direct filter and making fft plans can take a while
+	Py_BEGIN_ALLOW_THREADS
+	try
+	{
+		size_t size = FilterDesign::fitFftSize(fftSize, partitionThreshold, taps.size());
+		FilterSpectrumPtr spectrum;
+		if (taps.isComplex())
+		{
+			ComplexFFTWVector complexTaps;
+			loadTaps(taps.complexData(), taps.size(), correlationMode, complexTaps);
+			spectrum = FilterDesign::makeSpectrum(complexTaps, size, lowLatency, partitionThreshold, 0, false, false);
+		}
+		else
+		{
+			RealFFTWVector realTaps;
+			loadTaps(taps.realData(), taps.size(), correlationMode, realTaps);
+			spectrum = FilterDesign::makeSpectrum(realTaps, size, lowLatency, partitionThreshold, 0, false, false);
+		}
+		engine = new FilterEngine(spectrum);
+	}
+	catch (const std::exception& e)
+	{
+		error = e.what();
+	}
+	Py_END_ALLOW_THREADS
+	if (!engine)
+	{
+		PyErr_SetString(PyExc_RuntimeError, error.c_str());
+		return -1;
+	}
+	//checked with the gil back since another thread can start filtering while this one designs
+	if (self->engine && self->engine->busy)
+	{
+		delete engine;
+		PyErr_SetString(PyExc_RuntimeError, "Filter is in use by another thread");
+		return -1;
+	}
+	delete self->engine;
+	self->engine = engine;
+	return 0;
+}
+
+//false with a python exception set if the filter can't be used now
+static bool acquire(FilterObject* self)
+{
+	if (!self->engine)
+	{
+		PyErr_SetString(PyExc_RuntimeError, "Filter was not initialized");
+		return false;
+	}
+	if (self->engine->busy)
+	{
+		PyErr_SetString(PyExc_RuntimeError, "Filter is in use by another thread");
+		return false;
+	}
+	self->engine->busy = true;
+	return true;
+}
+
+static PyObject* Filter_filter(FilterObject* self, PyObject* args)
+{
+	PyObject* dataObj;
+	if (!PyArg_ParseTuple(args, "O:filter", &dataObj))
+		return NULL;
+	SampleBuffer data;
+	if (!data.get(dataObj, "data") || !acquire(self))
+		return NULL;
+	FilterEngine* engine = self->engine;
+	std::string error;
+	Py_BEGIN_ALLOW_THREADS
+	try
+	{
+		if (data.isComplex())
+			engine->filter.newComplexData(data.complexData(), data.size());
+		else
+			engine->filter.newRealData(data.realData(), data.size());
+		if (data.size())
+			engine->complexInput = data.isComplex();
+	}
+	catch (const std::exception& e)
+	{
+		error = e.what();
+	}
+	Py_END_ALLOW_THREADS
+	engine->busy = false;
+	if (!error.empty())
+	{
+		PyErr_SetString(PyExc_RuntimeError, error.c_str());
+		return NULL;
+	}
+	return engine->takeOutput();
+}
+
+static PyObject* Filter_drain(FilterObject* self, PyObject*)
+{
+	if (!acquire(self))
+		return NULL;
+	FilterEngine* engine = self->engine;
+	std::string error;
+	Py_BEGIN_ALLOW_THREADS
+	try
+	{
+		engine->filter.drain();
+	}
+	catch (const std::exception& e)
+	{
+		error = e.what();
+	}
+	Py_END_ALLOW_THREADS
+	engine->busy = false;
+	if (!error.empty())
+	{
+		PyErr_SetString(PyExc_RuntimeError, error.c_str());
+		return NULL;
+	}
+	PyObject* output = engine->takeOutput();
+	engine->complexInput = false;
+	return output;
+}
+
+static PyObject* Filter_flush(FilterObject* self, PyObject*)
+{
+	if (!acquire(self))
+		return NULL;
+	self->engine->filter.flush();
+	self->engine->complexInput = false;
+	self->engine->busy = false;
+	Py_RETURN_NONE;
+}
+
+static PyObject* Filter_getNumTaps(FilterObject* self, void*)
+{
+	if (!self->engine)
+		Py_RETURN_NONE;
+	return PyLong_FromSize_t(self->engine->filter.getNumTaps());
+}
+
+static PyObject* Filter_getFftSize(FilterObject* self, void*)
+{
+	if (!self->engine)
+		Py_RETURN_NONE;
+	return PyLong_FromSize_t(self->engine->filter.getFftSize());
+}
+
+static PyObject* Filter_getLatency(FilterObject* self, void*)
+{
+	if (!self->engine)
+		Py_RETURN_NONE;
+	return PyLong_FromSize_t(self->engine->filter.getLatency());
+}
+
+static PyObject* Filter_getMethod(FilterObject* self, void*)
+{
+	if (!self->engine)
+		Py_RETURN_NONE;
+	switch (self->engine->filter.getSpectrum()->getMethod())
+	{
+		case FilterSpectrum::DIRECT:
+			return Py_BuildValue("s", "direct");
+		case FilterSpectrum::PARTITIONED:
+			return Py_BuildValue("s", "partitioned");
+		default:
+			return Py_BuildValue("s", "overlap-add");
+	}
+}
+
+static PyMethodDef Filter_methods[] =
+{
+	{"filter", reinterpret_cast<PyCFunction>(Filter_filter), METH_VARARGS,
+		"filter(data) -> output\n\nFilter the next float32 or complex64 samples of the stream and return the output\n"
+		"they complete.  The filter holds back up to a block of input - see latency."},
+	{"drain", reinterpret_cast<PyCFunction>(Filter_drain), METH_NOARGS,
+		"drain() -> output\n\nReturn the rest of the convolution of the stream - the held back input and the\n"
+		"filter tail - and start a new stream."},
+	{"flush", reinterpret_cast<PyCFunction>(Filter_flush), METH_NOARGS,
+		"flush()\n\nThrow away the stream's state and start a new stream."},
+	{NULL, NULL, 0, NULL}
+};
+
+static PyGetSetDef Filter_getset[] =
+{
+	{const_cast<char*>("numTaps"), reinterpret_cast<getter>(Filter_getNumTaps), NULL, const_cast<char*>("number of taps"), NULL},
+	{const_cast<char*>("fftSize"), reinterpret_cast<getter>(Filter_getFftSize), NULL, const_cast<char*>("fft size, after fitting the taps"), NULL},
+	{const_cast<char*>("latency"), reinterpret_cast<getter>(Filter_getLatency), NULL, const_cast<char*>("input samples held back waiting for the rest of their block"), NULL},
+	{const_cast<char*>("method"), reinterpret_cast<getter>(Filter_getMethod), NULL, const_cast<char*>("direct, overlap-add or partitioned"), NULL},
+	{NULL, NULL, NULL, NULL, NULL}
+};
+
+static PyTypeObject FilterType =
+{
+	PyVarObject_HEAD_INIT(NULL, 0)
+	"fastfilter_engine.Filter",
+	sizeof(FilterObject),
+};
+
+static PyObject* designTaps(PyObject*, PyObject* args, PyObject* kwds)
+{
+	static const char* keywords[] = {"Type", "sampleRate", "freq1", "freq2", "TransitionWidth", "Ripple", "filterComplex", "fftSize", NULL};
+	const char* type;
+	TapCacheKey key;
+	key.transitionWidth = 800;
+	key.ripple = 0.01;
+	PyObject* complexObj = Py_False;
+	Py_ssize_t fftSize = 1024;
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "sf|ddddOn:designTaps", const_cast<char**>(keywords), &type, &key.sampleRate, &key.freq1, &key.freq2, &key.transitionWidth, &key.ripple, &complexObj, &fftSize))
+		return NULL;
+	int complex = PyObject_IsTrue(complexObj);
+	if (complex<0)
+		return NULL;
+	key.type = type;
+	key.complex = complex;
+	if (!FilterDesign::isFilterType(key.type))
+		return PyErr_Format(PyExc_ValueError, "filter type %s not supported", type);
+	if (key.sampleRate<=0 || fftSize<0)
+	{
+		PyErr_SetString(PyExc_ValueError, "sampleRate must be positive and fftSize cannot be negative");
+		return NULL;
+	}
+	key.fftSize = fftSize;
+
+	RealFFTWVector realTaps;
+	ComplexFFTWVector complexTaps;
+	bool designed;
+	Py_BEGIN_ALLOW_THREADS
+	{
+		boost::mutex::scoped_lock lock(designLock);
+		designed = key.complex ? designer.designTaps(complexTaps, key) : designer.designTaps(realTaps, key);
+	}
+	Py_END_ALLOW_THREADS
+	if (!designed)
+		return PyErr_Format(PyExc_ValueError, "cannot design a %s filter with these settings", type);
+	if (key.complex)
+		return makeArray(&complexTaps[0], complexTaps.size(), true);
+	return makeArray(&realTaps[0], realTaps.size(), false);
+}
+
+static PyMethodDef module_methods[] =
+{
+	{"designTaps", reinterpret_cast<PyCFunction>(designTaps), METH_VARARGS|METH_KEYWORDS,
+		"designTaps(Type, sampleRate, freq1=0, freq2=0, TransitionWidth=800, Ripple=0.01, filterComplex=False, fftSize=1024) -> taps\n\n"
+		"Design taps as the component does for filterProps.  Type is lowpass, highpass, bandpass or bandstop\n"
+		"and fftSize limits the length of the filter as it does in the component, with 0 for no limit."},
+	{NULL, NULL, 0, NULL}
+};
+
+static const char module_doc[] =
+	"The fastfilter component's filter engine.\n\n"
+	"Filter(taps, fftSize=1024, correlationMode=False, fftSizeObjective='throughput', partitionThreshold=4096)\n"
+	"filters a stream with float32 or complex64 taps, using the options as the component uses the\n"
+	"properties of the same names.  Input is read in place and the GIL is released while filtering.";
+
+static PyObject* initModule()
+{
+	FilterType.tp_flags = Py_TPFLAGS_DEFAULT;
+	FilterType.tp_doc = "Filter(taps, fftSize=1024, correlationMode=False, fftSizeObjective='throughput', partitionThreshold=4096)";
+	FilterType.tp_dealloc = reinterpret_cast<destructor>(Filter_dealloc);
+	FilterType.tp_new = Filter_new;
+	FilterType.tp_init = reinterpret_cast<initproc>(Filter_init);
+	FilterType.tp_methods = Filter_methods;
+	FilterType.tp_getset = Filter_getset;
+	if (PyType_Ready(&FilterType)<0)
+		return NULL;
+#if PY_MAJOR_VERSION >= 3
+	static struct PyModuleDef moduleDef =
+	{
+		PyModuleDef_HEAD_INIT,
+		"fastfilter_engine",
+		module_doc,
+		-1,
+		module_methods
+	};
+	PyObject* module = PyModule_Create(&moduleDef);
+#else
+	PyObject* module = Py_InitModule3("fastfilter_engine", module_methods, module_doc);
+#endif
+	if (!module)
+		return NULL;
+	Py_INCREF(&FilterType);
+	PyModule_AddObject(module, "Filter", reinterpret_cast<PyObject*>(&FilterType));
+	return module;
+}
+
+#if PY_MAJOR_VERSION >= 3
+PyMODINIT_FUNC PyInit_fastfilter_engine()
+{
+	return initModule();
+}
+#else
+PyMODINIT_FUNC initfastfilter_engine()
+{
+	initModule();
+}
+#endif
@@ -0,0 +1,708 @@
+/*
+ * This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+ * source distribution.
+ *
+ * This file is part of REDHAWK Basic Components fastfilter.
+ *
+ * REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+ * the GNU General Public License as published by the Free Software Foundation, either
+ * version 3 of the License, or (at your option) any later version.
+ *
+ * REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+ * without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+ * PURPOSE.  See the GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License along with this
+ * program.  If not, see http://www.gnu.org/licenses/.
+ */
+
+/*
+ * fastfilter_offline filters a recorded file into another file with the same filter engine
+ * and the same property semantics as the component, without standing up a waveform.
+ *
+ *     fastfilter_offline [options] input output
+ *
+ * The input is either raw samples or a BLUE (type 1000) file and is memory mapped.  It is
+ * cut into chunks which are filtered on several threads at once - each chunk starts with
+ * the numTaps-1 input samples before it so the output is exactly what one filter would have
+ * made of the whole file.  The output is a float file with one sample out for every sample
+ * in, in the same format as the input, written straight into a memory mapped output file.
+ */
+
+#include "FilterDesign.h"
+#include <algorithm>
+#include <cerrno>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <fstream>
+#include <iostream>
+#include <sstream>
+#include <stdexcept>
+#include <string>
+#include <vector>
+#include <fcntl.h>
+#include <getopt.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#include <boost/bind.hpp>
+#include <boost/shared_ptr.hpp>
+#include <boost/thread/mutex.hpp>
+#include <boost/thread/thread.hpp>
+
+namespace
+{
+	const char* PROGRAM = "fastfilter_offline";
+	//BLUE headers are a fixed 512 bytes - these are the offsets of the fields we use
+	const size_t BLUE_HEADER_SIZE = 512;
+	const size_t BLUE_HEAD_REP = 4;
+	const size_t BLUE_DATA_REP = 8;
+	const size_t BLUE_DETACHED = 12;
+	const size_t BLUE_EXT_START = 24;
+	const size_t BLUE_EXT_SIZE = 28;
+	const size_t BLUE_DATA_START = 32;
+	const size_t BLUE_DATA_SIZE = 40;
+	const size_t BLUE_TYPE = 48;
+	const size_t BLUE_FORMAT = 52;
+	const size_t BLUE_XDELTA = 264;
+	//input samples fed to a filter at a time - bounds the memory each thread uses
+	const size_t SLICE_SIZE = 65536;
+
+	struct Options
+	{
+		Options() :
+			format("SF"),
+			sampleRate(0),
+			fftSize(1024),
+			partitionThreshold(4096),
+			lowLatency(false),
+			correlationMode(false),
+			threads(boost::thread::hardware_concurrency()),
+			chunkSize(1<<20)
+		{
+			//the filterProps defaults
+			designKey.type = "highpass";
+			designKey.transitionWidth = 800;
+			designKey.ripple = 0.01;
+		}
+
+		std::string input;
+		std::string output;
+		//the BLUE format code of a raw input file
+		std::string format;
+		double sampleRate;
+		size_t fftSize;
+		size_t partitionThreshold;
+		bool lowLatency;
+		bool correlationMode;
+		std::string realTaps;
+		std::string complexTaps;
+		TapCacheKey designKey;
+		size_t threads;
+		size_t chunkSize;
+	};
+
+	//a memory mapped file which is unmapped and closed when it goes out of scope
+	class MappedFile
+	{
+		public:
+			//map an existing file to read
+			explicit MappedFile(const std::string& filename) :
+				fd_(-1),
+				data_(NULL),
+				size_(0)
+			{
+				fd_ = open(filename.c_str(), O_RDONLY);
+				if (fd_<0)
+					fail(filename);
+				struct stat st;
+				if (fstat(fd_, &st)!=0)
+					fail(filename);
+				map(filename, st.st_size, PROT_READ, MAP_PRIVATE);
+				if (data_)
+					madvise(data_, size_, MADV_SEQUENTIAL);
+			}
+			//create (or replace) a file of size bytes to write
+			MappedFile(const std::string& filename, size_t size) :
+				fd_(-1),
+				data_(NULL),
+				size_(0)
+			{
+				fd_ = open(filename.c_str(), O_RDWR|O_CREAT|O_TRUNC, 0666);
+				if (fd_<0 || ftruncate(fd_, size)!=0)
+					fail(filename);
+				map(filename, size, PROT_READ|PROT_WRITE, MAP_SHARED);
+			}
+			~MappedFile()
+			{
+				if (data_)
+					munmap(data_, size_);
+				if (fd_>=0)
+					close(fd_);
+			}
+			char* data() const
+			{
+				return static_cast<char*>(data_);
+			}
+			size_t size() const
+			{
+				return size_;
+			}
+
+		private:
+			MappedFile(const MappedFile&);
+			MappedFile& operator=(const MappedFile&);
+
+			void map(const std::string& filename, size_t size, int prot, int flags)
+			{
+				size_ = size;
+				//mmap won't map an empty file
+				if (size_==0)
+					return;
+				data_ = mmap(NULL, size_, prot, flags, fd_, 0);
+				if (data_==MAP_FAILED)
+				{
+					data_ = NULL;
+					fail(filename);
+				}
+			}
+			void fail(const std::string& filename)
+			{
+				std::string error = filename+": "+strerror(errno);
+				if (fd_>=0)
+					close(fd_);
+				throw std::runtime_error(error);
+			}
+
+			int fd_;
+			void* data_;
+			size_t size_;
+	};
+
+	//what is in the input file and where
+	struct InputLayout
+	{
+		InputLayout() :
+			blue(false),
+			complex(false),
+			scalar('F'),
+			dataStart(0),
+			numSamples(0),
+			sampleRate(0)
+		{
+		}
+
+		bool blue;
+		bool complex;
+		//F, I or D for float, short or double
+		char scalar;
+		size_t dataStart;
+		size_t numSamples;
+		//0 if we don't know
+		double sampleRate;
+	};
+
+	template<typename T>
+	T getField(const char* header, size_t offset)
+	{
+		T value;
+		memcpy(&value, header+offset, sizeof(T));
+		return value;
+	}
+
+	template<typename T>
+	void setField(char* header, size_t offset, T value)
+	{
+		memcpy(header+offset, &value, sizeof(T));
+	}
+
+	size_t scalarSize(char scalar)
+	{
+		switch (scalar)
+		{
+			case 'F':
+				return sizeof(float);
+			case 'I':
+				return sizeof(short);
+			case 'D':
+				return sizeof(double);
+		}
+		return 0;
+	}
+
+	//split a format code like CF into complex and scalar type
+	void parseFormat(const std::string& format, InputLayout& layout)
+	{
+		if (format.size()!=2 || (format[0]!='S' && format[0]!='C') || scalarSize(format[1])==0)
+			throw std::runtime_error("unsupported format "+format+" - use SF, CF, SI, CI, SD or CD");
+		layout.complex = format[0]=='C';
+		layout.scalar = format[1];
+	}
+
+	InputLayout getLayout(const MappedFile& file, const Options& options)
+	{
+		InputLayout layout;
+		const char* header = file.data();
+		layout.blue = file.size()>=BLUE_HEADER_SIZE && memcmp(header, "BLUE", 4)==0;
+		if (!layout.blue)
+		{
+			parseFormat(options.format, layout);
+			layout.sampleRate = options.sampleRate;
+			layout.numSamples = file.size()/(scalarSize(layout.scalar)*(layout.complex ? 2 : 1));
+			return layout;
+		}
+		if (memcmp(header+BLUE_HEAD_REP, "EEEI", 4)!=0 || memcmp(header+BLUE_DATA_REP, "EEEI", 4)!=0)
+			throw std::runtime_error(options.input+": only little endian (EEEI) BLUE files are supported");
+		if (getField<int>(header, BLUE_DETACHED)!=0)
+			throw std::runtime_error(options.input+": detached BLUE files are not supported");
+		int type = getField<int>(header, BLUE_TYPE);
+		if (type/1000!=1)
+			throw std::runtime_error(options.input+": only type 1000 BLUE files are supported");
+		parseFormat(std::string(header+BLUE_FORMAT, 2), layout);
+		double xdelta = getField<double>(header, BLUE_XDELTA);
+		layout.sampleRate = options.sampleRate!=0 ? options.sampleRate : (xdelta>0 ? 1.0/xdelta : 0);
+		layout.dataStart = getField<double>(header, BLUE_DATA_START);
+		size_t dataSize = getField<double>(header, BLUE_DATA_SIZE);
+		if (layout.dataStart>file.size())
+			throw std::runtime_error(options.input+": BLUE data_start is past the end of the file");
+		dataSize = std::min(dataSize, file.size()-layout.dataStart);
+		layout.numSamples = dataSize/(scalarSize(layout.scalar)*(layout.complex ? 2 : 1));
+		return layout;
+	}
+
+	//the input header with the fields describing the data changed to suit the output - the
+	//extended header isn't copied
+	void makeOutputHeader(const char* in, bool complex, size_t dataSize, char* out)
+	{
+		memcpy(out, in, BLUE_HEADER_SIZE);
+		setField<int>(out, BLUE_EXT_START, 0);
+		setField<int>(out, BLUE_EXT_SIZE, 0);
+		setField<double>(out, BLUE_DATA_START, BLUE_HEADER_SIZE);
+		setField<double>(out, BLUE_DATA_SIZE, dataSize);
+		out[BLUE_FORMAT] = complex ? 'C' : 'S';
+		out[BLUE_FORMAT+1] = 'F';
+	}
+
+	//taps written as numbers separated by whitespace or commas - complex taps are pairs of
+	//real and imaginary parts
+	std::vector<float> readTaps(const std::string& filename)
+	{
+		std::ifstream file(filename.c_str());
+		if (!file)
+			throw std::runtime_error(filename+": cannot read taps");
+		std::stringstream text;
+		text<<file.rdbuf();
+		std::string contents = text.str();
+		std::replace(contents.begin(), contents.end(), ',', ' ');
+		std::istringstream values(contents);
+		std::vector<float> taps;
+		float tap;
+		while (values>>tap)
+			taps.push_back(tap);
+		if (!values.eof())
+			throw std::runtime_error(filename+": taps must be numbers");
+		if (taps.empty())
+			throw std::runtime_error(filename+": no taps");
+		return taps;
+	}
+
+	template<typename T>
+	FilterSpectrumPtr manualSpectrum(T& taps, Options& options)
+	{
+		if (options.correlationMode)
+			std::reverse(taps.begin(), taps.end());
+		options.fftSize = FilterDesign::fitFftSize(options.fftSize, options.partitionThreshold, taps.size());
+		return FilterDesign::makeSpectrum(taps, options.fftSize, options.lowLatency, options.partitionThreshold, 0, false, false);
+	}
+
+	template<typename T>
+	FilterSpectrumPtr designedSpectrum(const TapCacheKey& key)
+	{
+		FilterDesign design;
+		T taps;
+		if (!design.designTaps(taps, key))
+			throw std::runtime_error("cannot design a "+key.type+" filter with these filterProps");
+		return FilterDesign::makeSpectrum(taps, key.fftSize, key.lowLatency, key.partitionThreshold, 0, false, false);
+	}
+
+	//the filter the component would run with these settings
+	FilterSpectrumPtr getSpectrum(Options& options, double sampleRate)
+	{
+		if (!options.realTaps.empty())
+		{
+			std::vector<float> values = readTaps(options.realTaps);
+			RealFFTWVector taps(values.begin(), values.end());
+			return manualSpectrum(taps, options);
+		}
+		if (!options.complexTaps.empty())
+		{
+			std::vector<float> values = readTaps(options.complexTaps);
+			if (values.size()%2)
+				throw std::runtime_error(options.complexTaps+": complex taps need a real and imaginary part each");
+			ComplexFFTWVector taps(values.size()/2);
+			std::copy(values.begin(), values.end(), reinterpret_cast<float*>(&taps[0]));
+			return manualSpectrum(taps, options);
+		}
+		//designing the filter turns correlationMode off just as it does in the component
+		if (options.correlationMode)
+			std::cerr<<PROGRAM<<": correlationMode is ignored with a designed filter"<<std::endl;
+		if (sampleRate<=0)
+			throw std::runtime_error("a sample rate is needed to design the filter - use --sampleRate");
+		TapCacheKey key(options.designKey);
+		if (!FilterDesign::isFilterType(key.type))
+			throw std::runtime_error("filter type "+key.type+" not supported");
+		key.sampleRate = sampleRate;
+		key.fftSize = options.fftSize;
+		key.lowLatency = options.fftSize==0 && options.lowLatency;
+		key.partitionThreshold = options.partitionThreshold;
+		if (key.complex)
+			return designedSpectrum<ComplexFFTWVector>(key);
+		return designedSpectrum<RealFFTWVector>(key);
+	}
+
+	//everything the threads share - chunks are handed out in order from nextChunk
+	struct Job
+	{
+		InputLayout layout;
+		const char* input;
+		char* output;
+		bool complexOutput;
+		FilterSpectrumPtr spectrum;
+		size_t chunkSize;
+		size_t numChunks;
+		size_t nextChunk;
+		boost::mutex lock;
+	};
+
+	/**
+	 * Filters chunks of the input for one thread.
+	 *
+	 * A chunk's first output sample depends on the numTaps-1 input samples before it, so
+	 * those are run through the filter first and their output thrown away.  The filter is
+	 * drained at the end of the chunk to get the output still held back in its last block.
+	 */
+	class ChunkWorker
+	{
+		public:
+			ChunkWorker(Job& job) :
+				job_(job),
+				filter_(realOut_, complexOut_, job.spectrum, false, &scratch_)
+			{
+			}
+
+			void run()
+			{
+				size_t chunk;
+				while (nextChunk(chunk))
+				{
+					size_t first = chunk*job_.chunkSize;
+					size_t count = std::min(job_.chunkSize, job_.layout.numSamples-first);
+					switch (job_.layout.scalar)
+					{
+						case 'F':
+							filterChunk<float>(first, count);
+							break;
+						case 'I':
+							filterChunk<short>(first, count);
+							break;
+						case 'D':
+							filterChunk<double>(first, count);
+							break;
+					}
+				}
+			}
+
+		private:
+			bool nextChunk(size_t& chunk)
+			{
+				boost::mutex::scoped_lock lock(job_.lock);
+				if (job_.nextChunk==job_.numChunks)
+					return false;
+				chunk = job_.nextChunk++;
+				return true;
+			}
+
+			template<typename T>
+			void filterChunk(size_t first, size_t count)
+			{
+				const T* in = reinterpret_cast<const T*>(job_.input+job_.layout.dataStart);
+				size_t history = std::min(first, filter_.getNumTaps()-1);
+				size_t end = first+count;
+				filter_.flush();
+				skip_ = history;
+				written_ = 0;
+				for (size_t pos=first-history; pos<end; pos+=SLICE_SIZE)
+				{
+					size_t num = std::min(SLICE_SIZE, end-pos);
+					if (job_.layout.complex)
+						filter_.newComplexData(reinterpret_cast<const std::complex<T>*>(in)+pos, num);
+					else
+						filter_.newRealData(in+pos, num);
+					writeOutput(first, count);
+				}
+				if (written_<count)
+				{
+					filter_.drain();
+					writeOutput(first, count);
+				}
+			}
+
+			//copy the output the filter has made so far into the output file
+			void writeOutput(size_t first, size_t count)
+			{
+				size_t available;
+				const float* out;
+				if (job_.complexOutput)
+				{
+					available = complexOut_.size();
+					out = reinterpret_cast<const float*>(complexOut_.empty() ? NULL : &complexOut_[0]);
+				}
+				else
+				{
+					available = realOut_.size();
+					out = realOut_.empty() ? NULL : &realOut_[0];
+				}
+				size_t scalars = job_.complexOutput ? 2 : 1;
+				size_t dropped = std::min(skip_, available);
+				skip_ -= dropped;
+				size_t num = std::min(available-dropped, count-written_);
+				if (num)
+				{
+					float* dest = reinterpret_cast<float*>(job_.output)+(first+written_)*scalars;
+					memcpy(dest, out+dropped*scalars, num*scalars*sizeof(float));
+					written_ += num;
+				}
+				realOut_.clear();
+				complexOut_.clear();
+			}
+
+			Job& job_;
+			FilterScratch scratch_;
+			OverlapAddFilter::realVector realOut_;
+			OverlapAddFilter::complexVector complexOut_;
+			OverlapAddFilter filter_;
+			//output samples still to throw away and output samples written for this chunk
+			size_t skip_;
+			size_t written_;
+	};
+
+	size_t parseSize(const char* name, const char* value)
+	{
+		char* end;
+		errno = 0;
+		unsigned long long result = strtoull(value, &end, 0);
+		if (*value=='\0' || *end!='\0' || *value=='-' || errno)
+			throw std::runtime_error(std::string("bad value for --")+name+": "+value);
+		return result;
+	}
+
+	double parseDouble(const char* name, const char* value)
+	{
+		char* end;
+		double result = strtod(value, &end);
+		if (*value=='\0' || *end!='\0')
+			throw std::runtime_error(std::string("bad value for --")+name+": "+value);
+		return result;
+	}
+
+	void usage(std::ostream& out)
+	{
+		out<<"usage: "<<PROGRAM<<" [options] input output\n"
+			"\n"
+			"Filter a raw or BLUE file the way the fastfilter component would.  The output has a\n"
+			"float sample for every input sample and is a BLUE file if the input is one.\n"
+			"\n"
+			"filter - as the component properties of the same names:\n"
+			"  --fftSize N             fft size, 0 to choose it for the taps (default 1024)\n"
+			"  --fftSizeObjective OBJ  throughput or latency (default throughput)\n"
+			"  --partitionThreshold N  partition filters longer than this, 0 for never (default 4096)\n"
+			"  --realFilterCoefficients FILE     real taps as numbers separated by spaces or commas\n"
+			"  --complexFilterCoefficients FILE  complex taps as real and imaginary pairs\n"
+			"  --correlationMode       correlate with the taps rather than convolve\n"
+			"  --Type TYPE             filterProps: lowpass, highpass, bandpass or bandstop (default highpass)\n"
+			"  --TransitionWidth HZ    filterProps (default 800)\n"
+			"  --Ripple R              filterProps (default 0.01)\n"
+			"  --freq1 HZ              filterProps (default 0)\n"
+			"  --freq2 HZ              filterProps (default 0)\n"
+			"  --filterComplex         filterProps: design complex taps\n"
+			"\n"
+			"input:\n"
+			"  --format FMT            raw sample format: SF, CF, SI, CI, SD or CD (default SF)\n"
+			"  --sampleRate HZ         sample rate to design the filter for - BLUE files give it in xdelta\n"
+			"\n"
+			"processing:\n"
+			"  --threads N             filter this many chunks at once (default one per cpu)\n"
+			"  --chunkSize N           input samples per chunk (default 1048576)\n";
+	}
+
+	//false if the program should exit without doing anything
+	bool parseOptions(int argc, char* argv[], Options& options)
+	{
+		enum
+		{
+			FFT_SIZE = 256,
+			FFT_SIZE_OBJECTIVE,
+			PARTITION_THRESHOLD,
+			REAL_TAPS,
+			COMPLEX_TAPS,
+			CORRELATION_MODE,
+			TYPE,
+			TRANSITION_WIDTH,
+			RIPPLE,
+			FREQ1,
+			FREQ2,
+			FILTER_COMPLEX,
+			FORMAT,
+			SAMPLE_RATE,
+			THREADS,
+			CHUNK_SIZE,
+			HELP
+		};
+		static const struct option longOptions[] =
+		{
+			{"fftSize", required_argument, NULL, FFT_SIZE},
+			{"fftSizeObjective", required_argument, NULL, FFT_SIZE_OBJECTIVE},
+			{"partitionThreshold", required_argument, NULL, PARTITION_THRESHOLD},
+			{"realFilterCoefficients", required_argument, NULL, REAL_TAPS},
+			{"complexFilterCoefficients", required_argument, NULL, COMPLEX_TAPS},
+			{"correlationMode", no_argument, NULL, CORRELATION_MODE},
+			{"Type", required_argument, NULL, TYPE},
+			{"TransitionWidth", required_argument, NULL, TRANSITION_WIDTH},
+			{"Ripple", required_argument, NULL, RIPPLE},
+			{"freq1", required_argument, NULL, FREQ1},
+			{"freq2", required_argument, NULL, FREQ2},
+			{"filterComplex", no_argument, NULL, FILTER_COMPLEX},
+			{"format", required_argument, NULL, FORMAT},
+			{"sampleRate", required_argument, NULL, SAMPLE_RATE},
+			{"threads", required_argument, NULL, THREADS},
+			{"chunkSize", required_argument, NULL, CHUNK_SIZE},
+			{"help", no_argument, NULL, HELP},
+			{NULL, 0, NULL, 0}
+		};
+		int opt;
+		while ((opt = getopt_long(argc, argv, "", longOptions, NULL))!=-1)
+		{
+			const char* name = opt>=FFT_SIZE && opt<=HELP ? longOptions[opt-FFT_SIZE].name : "";
+			switch (opt)
+			{
+				case FFT_SIZE:
+					options.fftSize = parseSize(name, optarg);
+					break;
+				case FFT_SIZE_OBJECTIVE:
+					if (strcmp(optarg, "throughput")!=0 && strcmp(optarg, "latency")!=0)
+						throw std::runtime_error(std::string("fftSizeObjective must be throughput or latency, not ")+optarg);
+					options.lowLatency = strcmp(optarg, "latency")==0;
+					break;
+				case PARTITION_THRESHOLD:
+					options.partitionThreshold = parseSize(name, optarg);
+					break;
+				case REAL_TAPS:
+					options.realTaps = optarg;
+					break;
+				case COMPLEX_TAPS:
+					options.complexTaps = optarg;
+					break;
+				case CORRELATION_MODE:
+					options.correlationMode = true;
+					break;
+				case TYPE:
+					options.designKey.type = optarg;
+					break;
+				case TRANSITION_WIDTH:
+					options.designKey.transitionWidth = parseDouble(name, optarg);
+					break;
+				case RIPPLE:
+					options.designKey.ripple = parseDouble(name, optarg);
+					break;
+				case FREQ1:
+					options.designKey.freq1 = parseDouble(name, optarg);
+					break;
+				case FREQ2:
+					options.designKey.freq2 = parseDouble(name, optarg);
+					break;
+				case FILTER_COMPLEX:
+					options.designKey.complex = true;
+					break;
+				case FORMAT:
+					options.format = optarg;
+					break;
+				case SAMPLE_RATE:
+					options.sampleRate = parseDouble(name, optarg);
+					break;
+				case THREADS:
+					options.threads = parseSize(name, optarg);
+					break;
+				case CHUNK_SIZE:
+					options.chunkSize = parseSize(name, optarg);
+					break;
+				case HELP:
+					usage(std::cout);
+					return false;
+				default:
+					usage(std::cerr);
+					throw std::runtime_error("bad arguments");
+			}
+		}
+		if (argc-optind!=2)
+		{
+			usage(std::cerr);
+			throw std::runtime_error("expected an input and an output file");
+		}
+		if (!options.realTaps.empty() && !options.complexTaps.empty())
+			throw std::runtime_error("cannot configure both real and complex coefficients");
+		options.input = argv[optind];
+		options.output = argv[optind+1];
+		options.threads = std::max(options.threads, size_t(1));
+		options.chunkSize = std::max(options.chunkSize, size_t(1));
+		return true;
+	}
+}
+
+int main(int argc, char* argv[])
+{
+	try
+	{
+		Options options;
+		if (!parseOptions(argc, argv, options))
+			return 0;
+
+		MappedFile input(options.input);
+		Job job;
+		job.layout = getLayout(input, options);
+		job.input = input.data();
+		job.spectrum = getSpectrum(options, job.layout.sampleRate);
+		job.complexOutput = job.layout.complex || job.spectrum->isComplex();
+		job.chunkSize = options.chunkSize;
+		job.numChunks = (job.layout.numSamples+job.chunkSize-1)/job.chunkSize;
+		job.nextChunk = 0;
+
+		size_t dataSize = job.layout.numSamples*sizeof(float)*(job.complexOutput ? 2 : 1);
+		size_t headerSize = job.layout.blue ? BLUE_HEADER_SIZE : 0;
+		MappedFile output(options.output, headerSize+dataSize);
+		if (job.layout.blue)
+			makeOutputHeader(input.data(), job.complexOutput, dataSize, output.data());
+		job.output = output.data()+headerSize;
+
+		double start = BlockTimer::now();
+		size_t numThreads = std::min(options.threads, std::max(job.numChunks, size_t(1)));
+		std::vector<boost::shared_ptr<ChunkWorker> > workers;
+		boost::thread_group threads;
+		for (size_t i=0; i!=numThreads; i++)
+		{
+			workers.push_back(boost::shared_ptr<ChunkWorker>(new ChunkWorker(job)));
+			threads.create_thread(boost::bind(&ChunkWorker::run, workers.back().get()));
+		}
+		threads.join_all();
+		double elapsed = BlockTimer::now()-start;
+
+		std::cerr<<PROGRAM<<": filtered "<<job.layout.numSamples<<" samples with "<<job.spectrum->getNumTaps()<<" taps in "
+			<<elapsed<<" s ("<<(elapsed>0 ? job.layout.numSamples/elapsed : 0)<<" samples/s) on "<<numThreads<<" threads"<<std::endl;
+	}
+	catch (const std::exception& e)
+	{
+		std::cerr<<PROGRAM<<": "<<e.what()<<std::endl;
+		return 1;
+	}
+	return 0;
+}
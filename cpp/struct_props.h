@@ -113,4 +113,924 @@ inline bool operator!= (const filterProps_struct& s1, const filterProps_struct&
     return !(s1==s2);
 };
 
+struct tapCacheStatistics_struct {
+    tapCacheStatistics_struct ()
+    {
+        hits = 0;
+        misses = 0;
+        evictions = 0;
+        entries = 0;
+    };
+
+    static std::string getId() {
+        return std::string("tapCacheStatistics");
+    };
+
+    CORBA::ULongLong hits;
+    CORBA::ULongLong misses;
+    CORBA::ULongLong evictions;
+    CORBA::ULong entries;
+};
+
+inline bool operator>>= (const CORBA::Any& a, tapCacheStatistics_struct& s) {
+    CF::Properties* temp;
+    if (!(a >>= temp)) return false;
+    CF::Properties& props = *temp;
+    for (unsigned int idx = 0; idx < props.length(); idx++) {
+        if (!strcmp("hits", props[idx].id)) {
+            if (!(props[idx].value >>= s.hits)) return false;
+        }
+        else if (!strcmp("misses", props[idx].id)) {
+            if (!(props[idx].value >>= s.misses)) return false;
+        }
+        else if (!strcmp("evictions", props[idx].id)) {
+            if (!(props[idx].value >>= s.evictions)) return false;
+        }
+        else if (!strcmp("entries", props[idx].id)) {
+            if (!(props[idx].value >>= s.entries)) return false;
+        }
+    }
+    return true;
+};
+
+inline void operator<<= (CORBA::Any& a, const tapCacheStatistics_struct& s) {
+    CF::Properties props;
+    props.length(4);
+    props[0].id = CORBA::string_dup("hits");
+    props[0].value <<= s.hits;
+    props[1].id = CORBA::string_dup("misses");
+    props[1].value <<= s.misses;
+    props[2].id = CORBA::string_dup("evictions");
+    props[2].value <<= s.evictions;
+    props[3].id = CORBA::string_dup("entries");
+    props[3].value <<= s.entries;
+    a <<= props;
+};
+
+inline bool operator== (const tapCacheStatistics_struct& s1, const tapCacheStatistics_struct& s2) {
+    if (s1.hits!=s2.hits)
+        return false;
+    if (s1.misses!=s2.misses)
+        return false;
+    if (s1.evictions!=s2.evictions)
+        return false;
+    if (s1.entries!=s2.entries)
+        return false;
+    return true;
+};
+
+inline bool operator!= (const tapCacheStatistics_struct& s1, const tapCacheStatistics_struct& s2) {
+    return !(s1==s2);
+};
+
+struct configureStatistics_struct {
+    configureStatistics_struct ()
+    {
+        configureCount = 0;
+        lastBuildTime = 0.0;
+        lastBlockTime = 0.0;
+        maxBlockTime = 0.0;
+    };
+
+    static std::string getId() {
+        return std::string("configureStatistics");
+    };
+
+    CORBA::ULong configureCount;
+    double lastBuildTime;
+    double lastBlockTime;
+    double maxBlockTime;
+};
+
+inline bool operator>>= (const CORBA::Any& a, configureStatistics_struct& s) {
+    CF::Properties* temp;
+    if (!(a >>= temp)) return false;
+    CF::Properties& props = *temp;
+    for (unsigned int idx = 0; idx < props.length(); idx++) {
+        if (!strcmp("configureCount", props[idx].id)) {
+            if (!(props[idx].value >>= s.configureCount)) return false;
+        }
+        else if (!strcmp("lastBuildTime", props[idx].id)) {
+            if (!(props[idx].value >>= s.lastBuildTime)) return false;
+        }
+        else if (!strcmp("lastBlockTime", props[idx].id)) {
+            if (!(props[idx].value >>= s.lastBlockTime)) return false;
+        }
+        else if (!strcmp("maxBlockTime", props[idx].id)) {
+            if (!(props[idx].value >>= s.maxBlockTime)) return false;
+        }
+    }
+    return true;
+};
+
+inline void operator<<= (CORBA::Any& a, const configureStatistics_struct& s) {
+    CF::Properties props;
+    props.length(4);
+    props[0].id = CORBA::string_dup("configureCount");
+    props[0].value <<= s.configureCount;
+    props[1].id = CORBA::string_dup("lastBuildTime");
+    props[1].value <<= s.lastBuildTime;
+    props[2].id = CORBA::string_dup("lastBlockTime");
+    props[2].value <<= s.lastBlockTime;
+    props[3].id = CORBA::string_dup("maxBlockTime");
+    props[3].value <<= s.maxBlockTime;
+    a <<= props;
+};
+
+inline bool operator== (const configureStatistics_struct& s1, const configureStatistics_struct& s2) {
+    if (s1.configureCount!=s2.configureCount)
+        return false;
+    if (s1.lastBuildTime!=s2.lastBuildTime)
+        return false;
+    if (s1.lastBlockTime!=s2.lastBlockTime)
+        return false;
+    if (s1.maxBlockTime!=s2.maxBlockTime)
+        return false;
+    return true;
+};
+
+inline bool operator!= (const configureStatistics_struct& s1, const configureStatistics_struct& s2) {
+    return !(s1==s2);
+};
+
+struct planStatistics_struct {
+    planStatistics_struct ()
+    {
+        planCount = 0;
+        planningTime = 0.0;
+        lastPlanningTime = 0.0;
+        wisdomLoaded = false;
+    };
+
+    static std::string getId() {
+        return std::string("planStatistics");
+    };
+
+    CORBA::ULong planCount;
+    double planningTime;
+    double lastPlanningTime;
+    bool wisdomLoaded;
+};
+
+inline bool operator>>= (const CORBA::Any& a, planStatistics_struct& s) {
+    CF::Properties* temp;
+    if (!(a >>= temp)) return false;
+    CF::Properties& props = *temp;
+    for (unsigned int idx = 0; idx < props.length(); idx++) {
+        if (!strcmp("planCount", props[idx].id)) {
+            if (!(props[idx].value >>= s.planCount)) return false;
+        }
+        else if (!strcmp("planningTime", props[idx].id)) {
+            if (!(props[idx].value >>= s.planningTime)) return false;
+        }
+        else if (!strcmp("lastPlanningTime", props[idx].id)) {
+            if (!(props[idx].value >>= s.lastPlanningTime)) return false;
+        }
+        else if (!strcmp("wisdomLoaded", props[idx].id)) {
+            if (!(props[idx].value >>= s.wisdomLoaded)) return false;
+        }
+    }
+    return true;
+};
+
+inline void operator<<= (CORBA::Any& a, const planStatistics_struct& s) {
+    CF::Properties props;
+    props.length(4);
+    props[0].id = CORBA::string_dup("planCount");
+    props[0].value <<= s.planCount;
+    props[1].id = CORBA::string_dup("planningTime");
+    props[1].value <<= s.planningTime;
+    props[2].id = CORBA::string_dup("lastPlanningTime");
+    props[2].value <<= s.lastPlanningTime;
+    props[3].id = CORBA::string_dup("wisdomLoaded");
+    props[3].value <<= s.wisdomLoaded;
+    a <<= props;
+};
+
+inline bool operator== (const planStatistics_struct& s1, const planStatistics_struct& s2) {
+    if (s1.planCount!=s2.planCount)
+        return false;
+    if (s1.planningTime!=s2.planningTime)
+        return false;
+    if (s1.lastPlanningTime!=s2.lastPlanningTime)
+        return false;
+    if (s1.wisdomLoaded!=s2.wisdomLoaded)
+        return false;
+    return true;
+};
+
+inline bool operator!= (const planStatistics_struct& s1, const planStatistics_struct& s2) {
+    return !(s1==s2);
+};
+
+struct streamStatistics_struct {
+    streamStatistics_struct ()
+    {
+        liveStreams = 0;
+        evictedStreams = 0;
+        recreatedStreams = 0;
+    };
+
+    static std::string getId() {
+        return std::string("streamStatistics");
+    };
+
+    CORBA::ULong liveStreams;
+    CORBA::ULongLong evictedStreams;
+    CORBA::ULongLong recreatedStreams;
+};
+
+inline bool operator>>= (const CORBA::Any& a, streamStatistics_struct& s) {
+    CF::Properties* temp;
+    if (!(a >>= temp)) return false;
+    CF::Properties& props = *temp;
+    for (unsigned int idx = 0; idx < props.length(); idx++) {
+        if (!strcmp("liveStreams", props[idx].id)) {
+            if (!(props[idx].value >>= s.liveStreams)) return false;
+        }
+        else if (!strcmp("evictedStreams", props[idx].id)) {
+            if (!(props[idx].value >>= s.evictedStreams)) return false;
+        }
+        else if (!strcmp("recreatedStreams", props[idx].id)) {
+            if (!(props[idx].value >>= s.recreatedStreams)) return false;
+        }
+    }
+    return true;
+};
+
+inline void operator<<= (CORBA::Any& a, const streamStatistics_struct& s) {
+    CF::Properties props;
+    props.length(3);
+    props[0].id = CORBA::string_dup("liveStreams");
+    props[0].value <<= s.liveStreams;
+    props[1].id = CORBA::string_dup("evictedStreams");
+    props[1].value <<= s.evictedStreams;
+    props[2].id = CORBA::string_dup("recreatedStreams");
+    props[2].value <<= s.recreatedStreams;
+    a <<= props;
+};
+
+inline bool operator== (const streamStatistics_struct& s1, const streamStatistics_struct& s2) {
+    if (s1.liveStreams!=s2.liveStreams)
+        return false;
+    if (s1.evictedStreams!=s2.evictedStreams)
+        return false;
+    if (s1.recreatedStreams!=s2.recreatedStreams)
+        return false;
+    return true;
+};
+
+inline bool operator!= (const streamStatistics_struct& s1, const streamStatistics_struct& s2) {
+    return !(s1==s2);
+};
+
+struct streamLatencyEntry_struct {
+    streamLatencyEntry_struct ()
+    {
+        streamID = "";
+        latencySamples = 0;
+        peakLatencySamples = 0;
+    };
+
+    static std::string getId() {
+        return std::string("streamLatencyEntry");
+    };
+
+    std::string streamID;
+    CORBA::ULong latencySamples;
+    CORBA::ULong peakLatencySamples;
+};
+
+inline bool operator>>= (const CORBA::Any& a, streamLatencyEntry_struct& s) {
+    CF::Properties* temp;
+    if (!(a >>= temp)) return false;
+    CF::Properties& props = *temp;
+    for (unsigned int idx = 0; idx < props.length(); idx++) {
+        if (!strcmp("streamLatency::streamID", props[idx].id)) {
+            if (!(props[idx].value >>= s.streamID)) return false;
+        }
+        else if (!strcmp("streamLatency::latencySamples", props[idx].id)) {
+            if (!(props[idx].value >>= s.latencySamples)) return false;
+        }
+        else if (!strcmp("streamLatency::peakLatencySamples", props[idx].id)) {
+            if (!(props[idx].value >>= s.peakLatencySamples)) return false;
+        }
+    }
+    return true;
+};
+
+inline void operator<<= (CORBA::Any& a, const streamLatencyEntry_struct& s) {
+    CF::Properties props;
+    props.length(3);
+    props[0].id = CORBA::string_dup("streamLatency::streamID");
+    props[0].value <<= s.streamID;
+    props[1].id = CORBA::string_dup("streamLatency::latencySamples");
+    props[1].value <<= s.latencySamples;
+    props[2].id = CORBA::string_dup("streamLatency::peakLatencySamples");
+    props[2].value <<= s.peakLatencySamples;
+    a <<= props;
+};
+
+inline bool operator== (const streamLatencyEntry_struct& s1, const streamLatencyEntry_struct& s2) {
+    if (s1.streamID!=s2.streamID)
+        return false;
+    if (s1.latencySamples!=s2.latencySamples)
+        return false;
+    if (s1.peakLatencySamples!=s2.peakLatencySamples)
+        return false;
+    return true;
+};
+
+inline bool operator!= (const streamLatencyEntry_struct& s1, const streamLatencyEntry_struct& s2) {
+    return !(s1==s2);
+};
+
+struct statisticsEntry_struct {
+    statisticsEntry_struct ()
+    {
+        streamID = "";
+        samplesIn = 0;
+        samplesOut = 0;
+        blocks = 0;
+        forwardFftTime = 0;
+        multiplyTime = 0;
+        inverseFftTime = 0;
+        pushTime = 0;
+        lockWaitTime = 0;
+        redesigns = 0;
+        redesignTime = 0;
+        latencyUnder10us = 0;
+        latencyUnder100us = 0;
+        latencyUnder1ms = 0;
+        latencyUnder10ms = 0;
+        latencyUnder100ms = 0;
+        latencyOver100ms = 0;
+    };
+
+    static std::string getId() {
+        return std::string("statisticsEntry");
+    };
+
+    std::string streamID;
+    CORBA::ULongLong samplesIn;
+    CORBA::ULongLong samplesOut;
+    CORBA::ULongLong blocks;
+    double forwardFftTime;
+    double multiplyTime;
+    double inverseFftTime;
+    double pushTime;
+    double lockWaitTime;
+    CORBA::ULong redesigns;
+    double redesignTime;
+    CORBA::ULongLong latencyUnder10us;
+    CORBA::ULongLong latencyUnder100us;
+    CORBA::ULongLong latencyUnder1ms;
+    CORBA::ULongLong latencyUnder10ms;
+    CORBA::ULongLong latencyUnder100ms;
+    CORBA::ULongLong latencyOver100ms;
+};
+
+inline bool operator>>= (const CORBA::Any& a, statisticsEntry_struct& s) {
+    CF::Properties* temp;
+    if (!(a >>= temp)) return false;
+    CF::Properties& props = *temp;
+    for (unsigned int idx = 0; idx < props.length(); idx++) {
+        if (!strcmp("statistics::streamID", props[idx].id)) {
+            if (!(props[idx].value >>= s.streamID)) return false;
+        }
+        else if (!strcmp("statistics::samplesIn", props[idx].id)) {
+            if (!(props[idx].value >>= s.samplesIn)) return false;
+        }
+        else if (!strcmp("statistics::samplesOut", props[idx].id)) {
+            if (!(props[idx].value >>= s.samplesOut)) return false;
+        }
+        else if (!strcmp("statistics::blocks", props[idx].id)) {
+            if (!(props[idx].value >>= s.blocks)) return false;
+        }
+        else if (!strcmp("statistics::forwardFftTime", props[idx].id)) {
+            if (!(props[idx].value >>= s.forwardFftTime)) return false;
+        }
+        else if (!strcmp("statistics::multiplyTime", props[idx].id)) {
+            if (!(props[idx].value >>= s.multiplyTime)) return false;
+        }
+        else if (!strcmp("statistics::inverseFftTime", props[idx].id)) {
+            if (!(props[idx].value >>= s.inverseFftTime)) return false;
+        }
+        else if (!strcmp("statistics::pushTime", props[idx].id)) {
+            if (!(props[idx].value >>= s.pushTime)) return false;
+        }
+        else if (!strcmp("statistics::lockWaitTime", props[idx].id)) {
+            if (!(props[idx].value >>= s.lockWaitTime)) return false;
+        }
+        else if (!strcmp("statistics::redesigns", props[idx].id)) {
+            if (!(props[idx].value >>= s.redesigns)) return false;
+        }
+        else if (!strcmp("statistics::redesignTime", props[idx].id)) {
+            if (!(props[idx].value >>= s.redesignTime)) return false;
+        }
+        else if (!strcmp("statistics::latencyUnder10us", props[idx].id)) {
+            if (!(props[idx].value >>= s.latencyUnder10us)) return false;
+        }
+        else if (!strcmp("statistics::latencyUnder100us", props[idx].id)) {
+            if (!(props[idx].value >>= s.latencyUnder100us)) return false;
+        }
+        else if (!strcmp("statistics::latencyUnder1ms", props[idx].id)) {
+            if (!(props[idx].value >>= s.latencyUnder1ms)) return false;
+        }
+        else if (!strcmp("statistics::latencyUnder10ms", props[idx].id)) {
+            if (!(props[idx].value >>= s.latencyUnder10ms)) return false;
+        }
+        else if (!strcmp("statistics::latencyUnder100ms", props[idx].id)) {
+            if (!(props[idx].value >>= s.latencyUnder100ms)) return false;
+        }
+        else if (!strcmp("statistics::latencyOver100ms", props[idx].id)) {
+            if (!(props[idx].value >>= s.latencyOver100ms)) return false;
+        }
+    }
+    return true;
+};
+
+inline void operator<<= (CORBA::Any& a, const statisticsEntry_struct& s) {
+    CF::Properties props;
+    props.length(17);
+    props[0].id = CORBA::string_dup("statistics::streamID");
+    props[0].value <<= s.streamID;
+    props[1].id = CORBA::string_dup("statistics::samplesIn");
+    props[1].value <<= s.samplesIn;
+    props[2].id = CORBA::string_dup("statistics::samplesOut");
+    props[2].value <<= s.samplesOut;
+    props[3].id = CORBA::string_dup("statistics::blocks");
+    props[3].value <<= s.blocks;
+    props[4].id = CORBA::string_dup("statistics::forwardFftTime");
+    props[4].value <<= s.forwardFftTime;
+    props[5].id = CORBA::string_dup("statistics::multiplyTime");
+    props[5].value <<= s.multiplyTime;
+    props[6].id = CORBA::string_dup("statistics::inverseFftTime");
+    props[6].value <<= s.inverseFftTime;
+    props[7].id = CORBA::string_dup("statistics::pushTime");
+    props[7].value <<= s.pushTime;
+    props[8].id = CORBA::string_dup("statistics::lockWaitTime");
+    props[8].value <<= s.lockWaitTime;
+    props[9].id = CORBA::string_dup("statistics::redesigns");
+    props[9].value <<= s.redesigns;
+    props[10].id = CORBA::string_dup("statistics::redesignTime");
+    props[10].value <<= s.redesignTime;
+    props[11].id = CORBA::string_dup("statistics::latencyUnder10us");
+    props[11].value <<= s.latencyUnder10us;
+    props[12].id = CORBA::string_dup("statistics::latencyUnder100us");
+    props[12].value <<= s.latencyUnder100us;
+    props[13].id = CORBA::string_dup("statistics::latencyUnder1ms");
+    props[13].value <<= s.latencyUnder1ms;
+    props[14].id = CORBA::string_dup("statistics::latencyUnder10ms");
+    props[14].value <<= s.latencyUnder10ms;
+    props[15].id = CORBA::string_dup("statistics::latencyUnder100ms");
+    props[15].value <<= s.latencyUnder100ms;
+    props[16].id = CORBA::string_dup("statistics::latencyOver100ms");
+    props[16].value <<= s.latencyOver100ms;
+    a <<= props;
+};
+
+inline bool operator== (const statisticsEntry_struct& s1, const statisticsEntry_struct& s2) {
+    if (s1.streamID!=s2.streamID)
+        return false;
+    if (s1.samplesIn!=s2.samplesIn)
+        return false;
+    if (s1.samplesOut!=s2.samplesOut)
+        return false;
+    if (s1.blocks!=s2.blocks)
+        return false;
+    if (s1.forwardFftTime!=s2.forwardFftTime)
+        return false;
+    if (s1.multiplyTime!=s2.multiplyTime)
+        return false;
+    if (s1.inverseFftTime!=s2.inverseFftTime)
+        return false;
+    if (s1.pushTime!=s2.pushTime)
+        return false;
+    if (s1.lockWaitTime!=s2.lockWaitTime)
+        return false;
+    if (s1.redesigns!=s2.redesigns)
+        return false;
+    if (s1.redesignTime!=s2.redesignTime)
+        return false;
+    if (s1.latencyUnder10us!=s2.latencyUnder10us)
+        return false;
+    if (s1.latencyUnder100us!=s2.latencyUnder100us)
+        return false;
+    if (s1.latencyUnder1ms!=s2.latencyUnder1ms)
+        return false;
+    if (s1.latencyUnder10ms!=s2.latencyUnder10ms)
+        return false;
+    if (s1.latencyUnder100ms!=s2.latencyUnder100ms)
+        return false;
+    if (s1.latencyOver100ms!=s2.latencyOver100ms)
+        return false;
+    return true;
+};
+
+inline bool operator!= (const statisticsEntry_struct& s1, const statisticsEntry_struct& s2) {
+    return !(s1==s2);
+};
+
+struct filterBankFilter_struct {
+    filterBankFilter_struct ()
+    {
+        streamIDSuffix = "";
+        TransitionWidth = 800;
+        Type = "lowpass";
+        Ripple = 0.01;
+        freq1 = 0;
+        freq2 = 0;
+        filterComplex = false;
+    };
+
+    static std::string getId() {
+        return std::string("filterBankFilter");
+    };
+
+    std::string streamIDSuffix;
+    std::vector<float> realFilterCoefficients;
+    std::vector<std::complex<float> > complexFilterCoefficients;
+    double TransitionWidth;
+    std::string Type;
+    double Ripple;
+    double freq1;
+    double freq2;
+    bool filterComplex;
+};
+
+inline bool operator>>= (const CORBA::Any& a, filterBankFilter_struct& s) {
+    CF::Properties* temp;
+    if (!(a >>= temp)) return false;
+    CF::Properties& props = *temp;
+    for (unsigned int idx = 0; idx < props.length(); idx++) {
+        if (!strcmp("filterBank::streamIDSuffix", props[idx].id)) {
+            if (!(props[idx].value >>= s.streamIDSuffix)) return false;
+        }
+        else if (!strcmp("filterBank::realFilterCoefficients", props[idx].id)) {
+            if (!(props[idx].value >>= s.realFilterCoefficients)) return false;
+        }
+        else if (!strcmp("filterBank::complexFilterCoefficients", props[idx].id)) {
+            if (!(props[idx].value >>= s.complexFilterCoefficients)) return false;
+        }
+        else if (!strcmp("filterBank::TransitionWidth", props[idx].id)) {
+            if (!(props[idx].value >>= s.TransitionWidth)) return false;
+        }
+        else if (!strcmp("filterBank::Type", props[idx].id)) {
+            if (!(props[idx].value >>= s.Type)) return false;
+        }
+        else if (!strcmp("filterBank::Ripple", props[idx].id)) {
+            if (!(props[idx].value >>= s.Ripple)) return false;
+        }
+        else if (!strcmp("filterBank::freq1", props[idx].id)) {
+            if (!(props[idx].value >>= s.freq1)) return false;
+        }
+        else if (!strcmp("filterBank::freq2", props[idx].id)) {
+            if (!(props[idx].value >>= s.freq2)) return false;
+        }
+        else if (!strcmp("filterBank::filterComplex", props[idx].id)) {
+            if (!(props[idx].value >>= s.filterComplex)) return false;
+        }
+    }
+    return true;
+};
+
+inline void operator<<= (CORBA::Any& a, const filterBankFilter_struct& s) {
+    CF::Properties props;
+    props.length(9);
+    props[0].id = CORBA::string_dup("filterBank::streamIDSuffix");
+    props[0].value <<= s.streamIDSuffix;
+    props[1].id = CORBA::string_dup("filterBank::realFilterCoefficients");
+    props[1].value <<= s.realFilterCoefficients;
+    props[2].id = CORBA::string_dup("filterBank::complexFilterCoefficients");
+    props[2].value <<= s.complexFilterCoefficients;
+    props[3].id = CORBA::string_dup("filterBank::TransitionWidth");
+    props[3].value <<= s.TransitionWidth;
+    props[4].id = CORBA::string_dup("filterBank::Type");
+    props[4].value <<= s.Type;
+    props[5].id = CORBA::string_dup("filterBank::Ripple");
+    props[5].value <<= s.Ripple;
+    props[6].id = CORBA::string_dup("filterBank::freq1");
+    props[6].value <<= s.freq1;
+    props[7].id = CORBA::string_dup("filterBank::freq2");
+    props[7].value <<= s.freq2;
+    props[8].id = CORBA::string_dup("filterBank::filterComplex");
+    props[8].value <<= s.filterComplex;
+    a <<= props;
+};
+
+inline bool operator== (const filterBankFilter_struct& s1, const filterBankFilter_struct& s2) {
+    if (s1.streamIDSuffix!=s2.streamIDSuffix)
+        return false;
+    if (s1.realFilterCoefficients!=s2.realFilterCoefficients)
+        return false;
+    if (s1.complexFilterCoefficients!=s2.complexFilterCoefficients)
+        return false;
+    if (s1.TransitionWidth!=s2.TransitionWidth)
+        return false;
+    if (s1.Type!=s2.Type)
+        return false;
+    if (s1.Ripple!=s2.Ripple)
+        return false;
+    if (s1.freq1!=s2.freq1)
+        return false;
+    if (s1.freq2!=s2.freq2)
+        return false;
+    if (s1.filterComplex!=s2.filterComplex)
+        return false;
+    return true;
+};
+
+inline bool operator!= (const filterBankFilter_struct& s1, const filterBankFilter_struct& s2) {
+    return !(s1==s2);
+};
+
+struct streamFilter_struct {
+    streamFilter_struct ()
+    {
+        streamIDPattern = "";
+        TransitionWidth = 800;
+        Type = "lowpass";
+        Ripple = 0.01;
+        freq1 = 0;
+        freq2 = 0;
+        filterComplex = false;
+    };
+
+    static std::string getId() {
+        return std::string("streamFilter");
+    };
+
+    std::string streamIDPattern;
+    std::vector<float> realFilterCoefficients;
+    std::vector<std::complex<float> > complexFilterCoefficients;
+    double TransitionWidth;
+    std::string Type;
+    double Ripple;
+    double freq1;
+    double freq2;
+    bool filterComplex;
+};
+
+inline bool operator>>= (const CORBA::Any& a, streamFilter_struct& s) {
+    CF::Properties* temp;
+    if (!(a >>= temp)) return false;
+    CF::Properties& props = *temp;
+    for (unsigned int idx = 0; idx < props.length(); idx++) {
+        if (!strcmp("streamFilters::streamIDPattern", props[idx].id)) {
+            if (!(props[idx].value >>= s.streamIDPattern)) return false;
+        }
+        else if (!strcmp("streamFilters::realFilterCoefficients", props[idx].id)) {
+            if (!(props[idx].value >>= s.realFilterCoefficients)) return false;
+        }
+        else if (!strcmp("streamFilters::complexFilterCoefficients", props[idx].id)) {
+            if (!(props[idx].value >>= s.complexFilterCoefficients)) return false;
+        }
+        else if (!strcmp("streamFilters::TransitionWidth", props[idx].id)) {
+            if (!(props[idx].value >>= s.TransitionWidth)) return false;
+        }
+        else if (!strcmp("streamFilters::Type", props[idx].id)) {
+            if (!(props[idx].value >>= s.Type)) return false;
+        }
+        else if (!strcmp("streamFilters::Ripple", props[idx].id)) {
+            if (!(props[idx].value >>= s.Ripple)) return false;
+        }
+        else if (!strcmp("streamFilters::freq1", props[idx].id)) {
+            if (!(props[idx].value >>= s.freq1)) return false;
+        }
+        else if (!strcmp("streamFilters::freq2", props[idx].id)) {
+            if (!(props[idx].value >>= s.freq2)) return false;
+        }
+        else if (!strcmp("streamFilters::filterComplex", props[idx].id)) {
+            if (!(props[idx].value >>= s.filterComplex)) return false;
+        }
+    }
+    return true;
+};
+
+inline void operator<<= (CORBA::Any& a, const streamFilter_struct& s) {
+    CF::Properties props;
+    props.length(9);
+    props[0].id = CORBA::string_dup("streamFilters::streamIDPattern");
+    props[0].value <<= s.streamIDPattern;
+    props[1].id = CORBA::string_dup("streamFilters::realFilterCoefficients");
+    props[1].value <<= s.realFilterCoefficients;
+    props[2].id = CORBA::string_dup("streamFilters::complexFilterCoefficients");
+    props[2].value <<= s.complexFilterCoefficients;
+    props[3].id = CORBA::string_dup("streamFilters::TransitionWidth");
+    props[3].value <<= s.TransitionWidth;
+    props[4].id = CORBA::string_dup("streamFilters::Type");
+    props[4].value <<= s.Type;
+    props[5].id = CORBA::string_dup("streamFilters::Ripple");
+    props[5].value <<= s.Ripple;
+    props[6].id = CORBA::string_dup("streamFilters::freq1");
+    props[6].value <<= s.freq1;
+    props[7].id = CORBA::string_dup("streamFilters::freq2");
+    props[7].value <<= s.freq2;
+    props[8].id = CORBA::string_dup("streamFilters::filterComplex");
+    props[8].value <<= s.filterComplex;
+    a <<= props;
+};
+
+inline bool operator== (const streamFilter_struct& s1, const streamFilter_struct& s2) {
+    if (s1.streamIDPattern!=s2.streamIDPattern)
+        return false;
+    if (s1.realFilterCoefficients!=s2.realFilterCoefficients)
+        return false;
+    if (s1.complexFilterCoefficients!=s2.complexFilterCoefficients)
+        return false;
+    if (s1.TransitionWidth!=s2.TransitionWidth)
+        return false;
+    if (s1.Type!=s2.Type)
+        return false;
+    if (s1.Ripple!=s2.Ripple)
+        return false;
+    if (s1.freq1!=s2.freq1)
+        return false;
+    if (s1.freq2!=s2.freq2)
+        return false;
+    if (s1.filterComplex!=s2.filterComplex)
+        return false;
+    return true;
+};
+
+inline bool operator!= (const streamFilter_struct& s1, const streamFilter_struct& s2) {
+    return !(s1==s2);
+};
+
+struct peakDetection_struct {
+    peakDetection_struct ()
+    {
+        enabled = false;
+        thresholdMode = "absolute";
+        threshold = 1.0;
+        noiseWindow = 1024;
+        minSeparation = 1;
+        fullRateOutput = true;
+    };
+
+    static std::string getId() {
+        return std::string("peakDetection");
+    };
+
+    bool enabled;
+    std::string thresholdMode;
+    float threshold;
+    CORBA::ULong noiseWindow;
+    CORBA::ULong minSeparation;
+    bool fullRateOutput;
+};
+
+inline bool operator>>= (const CORBA::Any& a, peakDetection_struct& s) {
+    CF::Properties* temp;
+    if (!(a >>= temp)) return false;
+    CF::Properties& props = *temp;
+    for (unsigned int idx = 0; idx < props.length(); idx++) {
+        if (!strcmp("peakDetection::enabled", props[idx].id)) {
+            if (!(props[idx].value >>= s.enabled)) return false;
+        }
+        else if (!strcmp("peakDetection::thresholdMode", props[idx].id)) {
+            if (!(props[idx].value >>= s.thresholdMode)) return false;
+        }
+        else if (!strcmp("peakDetection::threshold", props[idx].id)) {
+            if (!(props[idx].value >>= s.threshold)) return false;
+        }
+        else if (!strcmp("peakDetection::noiseWindow", props[idx].id)) {
+            if (!(props[idx].value >>= s.noiseWindow)) return false;
+        }
+        else if (!strcmp("peakDetection::minSeparation", props[idx].id)) {
+            if (!(props[idx].value >>= s.minSeparation)) return false;
+        }
+        else if (!strcmp("peakDetection::fullRateOutput", props[idx].id)) {
+            if (!(props[idx].value >>= s.fullRateOutput)) return false;
+        }
+    }
+    return true;
+};
+
+inline void operator<<= (CORBA::Any& a, const peakDetection_struct& s) {
+    CF::Properties props;
+    props.length(6);
+    props[0].id = CORBA::string_dup("peakDetection::enabled");
+    props[0].value <<= s.enabled;
+    props[1].id = CORBA::string_dup("peakDetection::thresholdMode");
+    props[1].value <<= s.thresholdMode;
+    props[2].id = CORBA::string_dup("peakDetection::threshold");
+    props[2].value <<= s.threshold;
+    props[3].id = CORBA::string_dup("peakDetection::noiseWindow");
+    props[3].value <<= s.noiseWindow;
+    props[4].id = CORBA::string_dup("peakDetection::minSeparation");
+    props[4].value <<= s.minSeparation;
+    props[5].id = CORBA::string_dup("peakDetection::fullRateOutput");
+    props[5].value <<= s.fullRateOutput;
+    a <<= props;
+};
+
+inline bool operator== (const peakDetection_struct& s1, const peakDetection_struct& s2) {
+    if (s1.enabled!=s2.enabled)
+        return false;
+    if (s1.thresholdMode!=s2.thresholdMode)
+        return false;
+    if (s1.threshold!=s2.threshold)
+        return false;
+    if (s1.noiseWindow!=s2.noiseWindow)
+        return false;
+    if (s1.minSeparation!=s2.minSeparation)
+        return false;
+    if (s1.fullRateOutput!=s2.fullRateOutput)
+        return false;
+    return true;
+};
+
+inline bool operator!= (const peakDetection_struct& s1, const peakDetection_struct& s2) {
+    return !(s1==s2);
+};
+
+struct detection_struct {
+    detection_struct ()
+    {
+        sampleIndex = 0;
+        twsec = 0.0;
+        tfsec = 0.0;
+        magnitude = 0.0;
+        phase = 0.0;
+    };
+
+    static std::string getId() {
+        return std::string("detection");
+    };
+
+    std::string streamID;
+    CORBA::ULongLong sampleIndex;
+    double twsec;
+    double tfsec;
+    float magnitude;
+    float phase;
+};
+
+inline bool operator>>= (const CORBA::Any& a, detection_struct& s) {
+    CF::Properties* temp;
+    if (!(a >>= temp)) return false;
+    CF::Properties& props = *temp;
+    for (unsigned int idx = 0; idx < props.length(); idx++) {
+        if (!strcmp("detection::streamID", props[idx].id)) {
+            if (!(props[idx].value >>= s.streamID)) return false;
+        }
+        else if (!strcmp("detection::sampleIndex", props[idx].id)) {
+            if (!(props[idx].value >>= s.sampleIndex)) return false;
+        }
+        else if (!strcmp("detection::twsec", props[idx].id)) {
+            if (!(props[idx].value >>= s.twsec)) return false;
+        }
+        else if (!strcmp("detection::tfsec", props[idx].id)) {
+            if (!(props[idx].value >>= s.tfsec)) return false;
+        }
+        else if (!strcmp("detection::magnitude", props[idx].id)) {
+            if (!(props[idx].value >>= s.magnitude)) return false;
+        }
+        else if (!strcmp("detection::phase", props[idx].id)) {
+            if (!(props[idx].value >>= s.phase)) return false;
+        }
+    }
+    return true;
+};
+
+inline void operator<<= (CORBA::Any& a, const detection_struct& s) {
+    CF::Properties props;
+    props.length(6);
+    props[0].id = CORBA::string_dup("detection::streamID");
+    props[0].value <<= s.streamID;
+    props[1].id = CORBA::string_dup("detection::sampleIndex");
+    props[1].value <<= s.sampleIndex;
+    props[2].id = CORBA::string_dup("detection::twsec");
+    props[2].value <<= s.twsec;
+    props[3].id = CORBA::string_dup("detection::tfsec");
+    props[3].value <<= s.tfsec;
+    props[4].id = CORBA::string_dup("detection::magnitude");
+    props[4].value <<= s.magnitude;
+    props[5].id = CORBA::string_dup("detection::phase");
+    props[5].value <<= s.phase;
+    a <<= props;
+};
+
+inline bool operator== (const detection_struct& s1, const detection_struct& s2) {
+    if (s1.streamID!=s2.streamID)
+        return false;
+    if (s1.sampleIndex!=s2.sampleIndex)
+        return false;
+    if (s1.twsec!=s2.twsec)
+        return false;
+    if (s1.tfsec!=s2.tfsec)
+        return false;
+    if (s1.magnitude!=s2.magnitude)
+        return false;
+    if (s1.phase!=s2.phase)
+        return false;
+    return true;
+};
+
+inline bool operator!= (const detection_struct& s1, const detection_struct& s2) {
+    return !(s1==s2);
+};
+
 #endif // STRUCTPROPS_H
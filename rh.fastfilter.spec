@@ -46,6 +46,9 @@ BuildRequires:  rh.dsp-devel >= 2.0
 Requires:       rh.dsp >= 2.0
 BuildRequires:  rh.fftlib-devel >= 2.0
 Requires:       rh.fftlib >= 2.0
+BuildRequires:  fftw-devel >= 3.0
+BuildRequires:  python-devel
+Requires:       numpy
 
 # Interface requirements
 BuildRequires:  bulkioInterfaces >= 2.0
@@ -96,6 +99,7 @@ rm -rf $RPM_BUILD_ROOT
 %{_prefix}/dom/components/rh/fastfilter/fastfilter.prf.xml
 %{_prefix}/dom/components/rh/fastfilter/fastfilter.spd.xml
 %{_prefix}/dom/components/rh/fastfilter/cpp
+%{_prefix}/dom/components/rh/fastfilter/python
 
 %changelog
 * Wed Jun 21 2017 Ryan Bauman - 2.0.1-2
@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+#
+# This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this
+# source distribution.
+#
+# This file is part of REDHAWK Basic Components fastfilter.
+#
+# REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of
+# the GNU General Public License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see http://www.gnu.org/licenses/.
+#
+"""Throughput and latency benchmarks for fastfilter.
+
+Each case runs data through the component under the sandbox with the same
+DataSource/DataSink setup as test_fastfilter.py and reports:
+
+  samplesPerSec  input samples per second from the first push to the last output
+  cpuPerSample   cpu seconds the component process used per input sample
+  latencyP50/99  seconds from pushing a packet to output stamped with its time
+                 arriving at the sink
+
+Every packet is stamped with the time it was pushed, and the component passes the
+input time through to its output, so the sink can tell how long each one took.
+
+    ./benchmark_fastfilter.py --output results.json
+    ./benchmark_fastfilter.py --baseline baseline.json --threshold 0.2
+
+With a baseline the run fails if any case it shares with the baseline is slower,
+uses more cpu or has a worse p99 latency by more than the threshold.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import itertools
+import argparse
+
+import numpy
+from ossie.utils import sb
+from bulkio import timestamp
+
+SPD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fastfilter.spd.xml')
+
+#every combination of these is a case - QUICK_SWEEP is for a fast check on every change
+FULL_SWEEP = {'fftSize': [1024, 8192],
+              'numTaps': [32, 256, 2048],
+              'complexData': [False, True],
+              'complexTaps': [False, True],
+              'correlationMode': [False, True],
+              'packetSize': [1024, 16384],
+              'numStreams': [1, 8]}
+QUICK_SWEEP = {'fftSize': [1024],
+               'numTaps': [256],
+               'complexData': [False, True],
+               'complexTaps': [False],
+               'correlationMode': [False],
+               'packetSize': [4096],
+               'numStreams': [1, 4]}
+
+#samples pushed per stream in each case
+SAMPLES_PER_STREAM = 1 << 20
+#stop waiting for output once the sink has been quiet this long
+IDLE_TIMEOUT = 2.0
+POLL_INTERVAL = 0.001
+
+def caseName(case):
+    return ','.join('%s=%s' % (key, case[key]) for key in sorted(case))
+
+def makeCases(sweep):
+    keys = sorted(sweep)
+    for values in itertools.product(*[sweep[key] for key in keys]):
+        yield dict(zip(keys, values))
+
+def cpuTime(pid):
+    """user plus system cpu seconds used by a process so far, or None if we can't tell
+    """
+    try:
+        fields = open('/proc/%d/stat' % pid).read().rsplit(')', 1)[1].split()
+    except (IOError, TypeError):
+        return None
+    #utime and stime are the 14th and 15th fields - the first two are split off above
+    return (int(fields[11])+int(fields[12]))/float(os.sysconf('SC_CLK_TCK'))
+
+def componentPid(comp):
+    try:
+        return comp._process.pid()
+    except AttributeError:
+        return None
+
+def percentile(values, q):
+    if not values:
+        return None
+    return float(numpy.percentile(values, q))
+
+class Benchmark(object):
+    def __init__(self):
+        self.comp = sb.launch(SPD_FILE)
+        self.src = sb.DataSource()
+        self.sink = sb.DataSink()
+        self.comp.start()
+        self.src.start()
+        self.sink.start()
+        self.src.connect(self.comp, providesPortName='dataFloat_in')
+        self.comp.connect(self.sink, usesPortName='dataFloat_out')
+
+    def release(self):
+        self.comp.stop()
+        self.comp.releaseObject()
+        self.sink.stop()
+        self.src.stop()
+        self.src.releaseObject()
+        self.sink.releaseObject()
+
+    def configure(self, case):
+        taps = numpy.random.uniform(-1, 1, case['numTaps'])
+        self.comp.fftSize = case['fftSize']
+        self.comp.correlationMode = case['correlationMode']
+        if case['complexTaps']:
+            taps = taps+1j*numpy.random.uniform(-1, 1, case['numTaps'])
+            self.comp.realFilterCoefficients = []
+            self.comp.complexFilterCoefficients = list(taps)
+        else:
+            self.comp.complexFilterCoefficients = []
+            self.comp.realFilterCoefficients = list(taps)
+
+    def run(self, case, index):
+        self.configure(case)
+        self.drainSink(0.5)
+        #different streamIDs for each case so no filter state carries over
+        streamIDs = ['bench%d_%d' % (index, n) for n in xrange(case['numStreams'])]
+        packetSize = case['packetSize']
+        scalars = 2*packetSize if case['complexData'] else packetSize
+        packet = list(numpy.random.uniform(-1, 1, scalars))
+        numPackets = max(1, SAMPLES_PER_STREAM/packetSize)
+
+        pid = componentPid(self.comp)
+        cpuStart = cpuTime(pid)
+        start = time.time()
+        for n in xrange(numPackets):
+            for streamID in streamIDs:
+                self.src.push(packet, complexData=case['complexData'], sampleRate=1e6,
+                              EOS=n==numPackets-1, streamID=streamID, ts=timestamp.now())
+        samplesIn = numPackets*packetSize*len(streamIDs)
+        samplesOut, latencies, lastArrival = self.collect(samplesIn, case['complexData'] or case['complexTaps'])
+        cpuEnd = cpuTime(pid)
+
+        elapsed = lastArrival-start
+        result = dict(case)
+        result['name'] = caseName(case)
+        result['samplesIn'] = samplesIn
+        result['samplesOut'] = samplesOut
+        result['samplesPerSec'] = samplesIn/elapsed if elapsed>0 else None
+        result['cpuPerSample'] = (cpuEnd-cpuStart)/samplesIn if cpuStart is not None and cpuEnd is not None else None
+        result['latencyP50'] = percentile(latencies, 50)
+        result['latencyP99'] = percentile(latencies, 99)
+        return result
+
+    def collect(self, samplesIn, complexOut):
+        """read output until it has all come out or the sink goes quiet
+
+        Returns the number of output samples, the latency of each output packet and when
+        the last one arrived.
+        """
+        samplesOut = 0
+        latencies = []
+        lastArrival = time.time()
+        while True:
+            data, tstamps = self.sink.getData(tstamps=True)
+            now = time.time()
+            if data:
+                samplesOut += len(data)/2 if complexOut else len(data)
+                latencies.extend(now-(t.twsec+t.tfsec) for _, t in tstamps)
+                lastArrival = now
+                #the filter may hold back up to a block per stream after the eos
+                if samplesOut >= samplesIn:
+                    break
+            elif now-lastArrival > IDLE_TIMEOUT:
+                break
+            time.sleep(POLL_INTERVAL)
+        return samplesOut, latencies, lastArrival
+
+    def drainSink(self, quiet):
+        last = time.time()
+        while time.time()-last < quiet:
+            if self.sink.getData():
+                last = time.time()
+            time.sleep(0.01)
+
+def findRegressions(results, baseline, threshold):
+    """list the ways results are worse than baseline by more than threshold
+    """
+    previous = dict((case['name'], case) for case in baseline['cases'])
+    regressions = []
+    for case in results['cases']:
+        old = previous.get(case['name'])
+        if old is None:
+            continue
+        #higher is better for throughput and lower for the rest
+        for key, sign in (('samplesPerSec', -1), ('cpuPerSample', 1), ('latencyP99', 1)):
+            if case.get(key) is None or not old.get(key):
+                continue
+            change = (case[key]-old[key])/old[key]
+            if sign*change > threshold:
+                regressions.append('%s: %s %.3g -> %.3g (%+.0f%%)' % (case['name'], key, old[key], case[key], 100*change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark fastfilter throughput and latency')
+    parser.add_argument('--quick', action='store_true', help='run a small sweep')
+    parser.add_argument('--output', help='write the results to this json file')
+    parser.add_argument('--baseline', help='json results from an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='fractional change from the baseline which counts as a regression')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    numpy.random.seed(args.seed)
+    sweep = QUICK_SWEEP if args.quick else FULL_SWEEP
+    results = {'host': platform.node(),
+               'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+               'cases': []}
+    bench = Benchmark()
+    try:
+        for index, case in enumerate(makeCases(sweep)):
+            result = bench.run(case, index)
+            results['cases'].append(result)
+            sys.stdout.write('%s\n    %s samples/s  %s s cpu/sample  p50 %s s  p99 %s s\n' %
+                             (result['name'], result['samplesPerSec'], result['cpuPerSample'],
+                              result['latencyP50'], result['latencyP99']))
+            sys.stdout.flush()
+    finally:
+        bench.release()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = findRegressions(results, baseline, args.threshold)
+        for regression in regressions:
+            sys.stderr.write('REGRESSION %s\n' % regression)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,6 +22,7 @@ from omniORB import CORBA
 from ossie.properties import props_to_dict
 
 import math
+import time
 import scipy.signal
 import scipy.fftpack
 import numpy
@@ -254,11 +255,11 @@ class ImpulseResponseMixIn(object):
             self.cmpList(validate,self.output[:len(validate)])
 
     def cmpList(self,a,b):
-        if isinstance(b, list):
+        if isinstance(b, (list, numpy.ndarray)):
             self.assertTrue(len(a)==len(b))
-            self.assertTrue(all([abs(x-y)<.01 for x, y in zip(a,b)]))
+            self.assertTrue(numpy.all(numpy.abs(numpy.asarray(a)-numpy.asarray(b))<.01))
         else:
-            self.assertTrue(all([abs(x-b)<.01 for x in a]))
+            self.assertTrue(numpy.all(numpy.abs(numpy.asarray(a)-b)<.01))
 
     def validateImpulseResponse(self):        
         
@@ -305,21 +306,12 @@ class ImpulseResponseMixIn(object):
                    stopband = [(-fh+delta, -fl-delta), (fl+delta, fh-delta)]
                    passband = [(-fs/2.0,-fh-delta), (-fl+delta,fl-delta), (fh+delta, fs/2.0)]
 
-        for freq, val in zip(freqsIn, fIn):
-            #for each fft value/frequency - if in passband or stopband ensure the value is correct
-            inPassband = False
-            for fmin, fmax in passband:
-                if fmin<=freq<=fmax:
-                    #print "pb, freq = ", freq, "val = ", val, "1.- abs(val) = ", 1.0-abs(val), "ripple = ", ripple
-                    self.assertTrue(1.0-abs(val)<ripple*self.RIPPLE_MULT)
-                    inPassband = True
-                    break
-            if not inPassband:
-                for fmin, fmax in stopband:
-                    if fmin<=freq<=fmax:
-                        #print "sb, freq = ", freq, "val = ", val, "abs(val) = ", abs(val), "ripple = ", ripple
-                        self.assertTrue(abs(val)<ripple*self.RIPPLE_MULT)
-                        break
+        #check the passband and stopband bins all at once - a bin in both counts as passband
+        mag = numpy.abs(fIn)
+        inPassband = bandMask(freqsIn, passband)
+        inStopband = bandMask(freqsIn, stopband) & ~inPassband
+        self.assertTrue(numpy.all(1.0-mag[inPassband]<ripple*self.RIPPLE_MULT))
+        self.assertTrue(numpy.all(mag[inStopband]<ripple*self.RIPPLE_MULT))
 
     def plotFft(self, sig, fftSize=None, sampleRate=1.0):
         if fftSize==None:
@@ -330,6 +322,78 @@ class ImpulseResponseMixIn(object):
         #matplotlib.pyplot.plot(freqs, testOut)
         matplotlib.pyplot.show()
 
+def filteredSamples(comp, streamID):
+    """input samples of streamID the component has filtered so far, from its statistics - 0 if
+    statisticsEnabled is off or the stream has no filter
+    """
+    for stats in comp.statistics:
+        if stats.streamID==streamID:
+            return stats.samplesIn
+    return 0
+
+class OutputCollector(object):
+    """Reads a DataSink until whatever a test is waiting for has arrived.
+
+    Each wait returns as soon as its condition holds - enough output, an eos, or the
+    component having filtered all of the input - instead of waiting for the sink to go
+    quiet, and only runs on to the timeout if the condition never comes.  The output is
+    kept as numpy arrays and joined once when it is asked for.
+    """
+    POLL_INTERVAL = 0.002
+
+    def __init__(self, sink, timeout=10.0):
+        self.sink = sink
+        self.timeout = timeout
+        self.chunks = []
+        self.count = 0
+
+    def poll(self):
+        data = self.sink.getData()
+        if data:
+            self.chunks.append(numpy.asarray(data))
+            self.count += len(data)
+
+    def waitUntil(self, done, timeout=None):
+        """read the output until done() - returns False if the timeout came first
+        """
+        deadline = time.time()+(self.timeout if timeout is None else timeout)
+        while True:
+            self.poll()
+            if done():
+                #anything pushed before done() held has already reached the sink
+                self.poll()
+                return True
+            if time.time()>deadline:
+                return False
+            time.sleep(self.POLL_INTERVAL)
+
+    def waitForSamples(self, numValues, timeout=None):
+        """until numValues values have arrived - a complex sample is two values
+        """
+        return self.waitUntil(lambda: self.count>=numValues, timeout)
+
+    def waitForMessages(self, messages, count, timeout=None):
+        """until a MessageSink callback has put count messages in messages
+        """
+        return self.waitUntil(lambda: len(messages)>=count, timeout)
+
+    def waitForEOS(self, timeout=None):
+        return self.waitUntil(self.sink.eos, timeout)
+
+    def waitForInput(self, comp, streamID, numSamples, timeout=None):
+        """until the component has filtered numSamples samples of streamID in all - it has
+        pushed the output for them by then
+        """
+        return self.waitUntil(lambda: filteredSamples(comp, streamID)>=numSamples, timeout)
+
+    def data(self):
+        """everything read since the last call as a single array
+        """
+        out = numpy.concatenate(self.chunks) if self.chunks else numpy.zeros(0)
+        self.chunks = []
+        self.count = 0
+        return out
+
 def scipyCorl(filter,data):
     if len(data)<=len(filter):
         #make sure that the data is bigger then the filter by padding zeros to the end
@@ -341,6 +405,13 @@ def scipyCorl(filter,data):
     else:
         return scipy.signal.correlate(data,filter,'full')
 
+def detectionField(msg, name):
+    """get a field of a detection message whether it arrives as a dict or as a list of properties
+    """
+    if not isinstance(msg, dict):
+        msg = props_to_dict(msg)
+    return msg.get('detection::'+name, msg.get(name))
+
 def toClipboard(data):
     import pygtk
     pygtk.require('2.0')
@@ -355,67 +426,136 @@ def toClipboard(data):
     clipboard.store()
 
 def toCx(input):
-    cx=[]
-    for i in xrange(len(input)/2):
-        cx.append(complex(input[2*i],input[2*i+1]))
-    return cx
+    return deinterleave(input).tolist()
 
 def realToCx(input):
-    cx=[]
-    for x in input:
-        cx.append(complex(x,0))
-    return cx
+    return numpy.asarray(input, dtype=complex).tolist()
 
 def muxZeros(input):
-    cx=[]
-    for x in input:
-        cx.append(x)
-        cx.append(0)
-    return cx
+    return interleave(numpy.asarray(input, dtype=float)).tolist()
 
 def demux(input):
-    re =[]
-    im =[]
     if isinstance(input[0],complex):
-        for x in input:
-            re.append(x.real)
-            im.append(x.imag)
+        cx = numpy.asarray(input)
     else:
-        for i in xrange(len(input)/2):
-            re.append(input[2*i])
-            im.append(input[2*i+1])
-    return re, im 
+        cx = deinterleave(input)
+    return cx.real.tolist(), cx.imag.tolist()
 
 def getSink(bw, numPts):
-    out = []
-    fc = math.pi*2*bw
-    for n in xrange(numPts):
-        if 2*n==numPts-1:
-            out.append(2*bw)
-        else:
-            t= n-(numPts-1)/2.0
-            num = math.sin(fc*t)
-            den = math.pi*t
-            out.append(num/den)
-    return out
+    return makeSinc(bw, numPts).tolist()
 
 def getSin(fc,numPts, cx=False, phase0=0):
-    fcRad = fc*math.pi*2
     if cx:
-        out = []
-        for n in xrange(numPts):
-            rad = fcRad*n+phase0
-            out.append(math.cos(rad))
-            out.append(math.sin(rad))
-    else:
-        out = [math.sin(fcRad*n) for n in xrange(numPts)]
-    return out
+        return interleave(makeTone(fc, numPts, cx=True, phase0=phase0)).tolist()
+    #real tones have always started at zero phase
+    return makeTone(fc, numPts).tolist()
 
 def getFiltLen(impulseResponse):
-    last=None
-    for i in xrange(len(impulseResponse)):
-        if abs(impulseResponse[i])>.01:
-            out=last
-        else:
-            last=i
-    return last+1
+    #one past the last sample which is too small to be part of the filter
+    small = numpy.flatnonzero(numpy.abs(impulseResponse)<=.01)
+    return small[-1]+1
+
+#The functions below work on whole numpy arrays, for tests which need more data than the
+#list helpers above can build or check quickly.
+
+def makeTone(fc, numPts, cx=False, phase0=0):
+    """a tone at fc cycles per sample - complex tones are cos + j sin
+    """
+    rad = 2*math.pi*fc*numpy.arange(numPts)+phase0
+    if cx:
+        return numpy.exp(1j*rad)
+    return numpy.sin(rad)
+
+def makeSinc(bw, numPts):
+    """taps of an ideal lowpass filter with cutoff bw cycles per sample, centred in numPts
+    """
+    t = numpy.arange(numPts)-(numPts-1)/2.0
+    return 2*bw*numpy.sinc(2*bw*t)
+
+def interleave(cx):
+    """complex samples as the real, imaginary pairs bulkio carries them in
+    """
+    cx = numpy.asarray(cx)
+    out = numpy.empty(2*len(cx))
+    out[0::2] = cx.real
+    out[1::2] = cx.imag
+    return out
+
+def deinterleave(data):
+    """real, imaginary pairs back to complex samples - a trailing odd value is dropped
+    """
+    data = numpy.asarray(data, dtype=float)
+    numPts = len(data)//2
+    return data[0:2*numPts:2]+1j*data[1:2*numPts:2]
+
+def toPackets(data, packetSize):
+    """split an array into packets of packetSize samples - the last may be shorter
+    """
+    return [data[i:i+packetSize] for i in xrange(0, len(data), packetSize)]
+
+def bandMask(freqs, bands):
+    """true for the frequencies inside any of the (fmin, fmax) bands
+    """
+    freqs = numpy.asarray(freqs)
+    mask = numpy.zeros(len(freqs), dtype=bool)
+    for fmin, fmax in bands:
+        mask |= (freqs>=fmin) & (freqs<=fmax)
+    return mask
+
+class OverlapAddReference(object):
+    """Streaming overlap-add fir filter to check the component against.
+
+    Each packet is filtered as soon as it arrives and the overlap tail is carried over to
+    the next, so any packetization of a signal gives the same output as lfilter over the
+    whole thing.  Unlike the component nothing is held back waiting for a full block - the
+    output for every input sample comes out with that sample, and flush() gives the rest
+    of the convolution.  All of the whole blocks in a packet are transformed at once.
+    """
+    def __init__(self, taps, fftSize=None):
+        self.taps = numpy.asarray(taps)
+        numTaps = len(self.taps)
+        if fftSize is None:
+            fftSize = 1
+            while fftSize < 2*numTaps:
+                fftSize *= 2
+        if fftSize < 2*(numTaps-1):
+            raise ValueError("fftSize %d is too small for %d taps" % (fftSize, numTaps))
+        self.fftSize = fftSize
+        self.blockSize = fftSize-numTaps+1
+        self.spectrum = numpy.fft.fft(self.taps, fftSize)
+        self.tail = numpy.zeros(numTaps-1, dtype=complex)
+        self.complexOut = numpy.iscomplexobj(self.taps)
+
+    def filter(self, data):
+        data = numpy.asarray(data)
+        self.complexOut = self.complexOut or numpy.iscomplexobj(data)
+        numPts = len(data)
+        numTail = len(self.tail)
+        blockSize = self.blockSize
+        numBlocks = -(-numPts//blockSize)
+        #zero pad the input to whole blocks - the padding adds nothing to the output
+        blocks = numpy.zeros(numBlocks*blockSize, dtype=complex)
+        blocks[:numPts] = data
+        blocks = blocks.reshape(numBlocks, blockSize)
+        filtered = numpy.fft.ifft(numpy.fft.fft(blocks, self.fftSize, axis=1)*self.spectrum, axis=1)
+        #each block's tail overlaps the start of the next, and the old tail the first
+        out = numpy.zeros((numBlocks+1)*blockSize, dtype=complex)
+        out[:numBlocks*blockSize] = filtered[:, :blockSize].ravel()
+        tails = numpy.zeros((numBlocks, blockSize), dtype=complex)
+        tails[:, :numTail] = filtered[:, blockSize:blockSize+numTail]
+        out[blockSize:] += tails.ravel()
+        out[:numTail] += self.tail
+        self.tail = out[numPts:numPts+numTail].copy()
+        return self.output(out[:numPts])
+
+    def flush(self):
+        """the rest of the convolution of the input so far - the filter then starts over
+        """
+        tail = self.tail
+        self.tail = numpy.zeros(len(tail), dtype=complex)
+        return self.output(tail)
+
+    def output(self, out):
+        if self.complexOut:
+            return out
+        return out.real
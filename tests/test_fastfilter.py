@@ -24,8 +24,9 @@ from omniORB import any
 from ossie.cf import CF
 from omniORB import CORBA
 from ossie.utils import sb
-import time
 import random
+import tempfile
+import subprocess
 
 from filter_test_helpers import *
 
@@ -48,8 +49,9 @@ class ComponentTests(ossie.utils.testing.ScaComponentTestCase, ImpulseResponseMi
         self.sink.start()
         
         #do the connections
-        self.src.connect(self.comp)        
-        self.comp.connect(self.sink)
+        self.src.connect(self.comp, providesPortName='dataFloat_in')
+        self.comp.connect(self.sink, usesPortName='dataFloat_out')
+        self.collector = OutputCollector(self.sink)
         self.output=[]
  
     def tearDown(self):
@@ -146,16 +148,8 @@ class ComponentTests(ossie.utils.testing.ScaComponentTestCase, ImpulseResponseMi
         data = range(dataPoints)
         
         self.src.push(data,complexData=False, sampleRate=1.0, EOS=False,streamID="someSRI")
-        count = 0
-        while True:
-            newData = self.sink.getData()
-            if newData:
-                count = 0
-                self.output.extend(newData)
-            elif count==200:
-                break
-            time.sleep(.01)
-            count+=1
+        self.collector.waitForSamples(dataPoints/2+1)
+        self.output = self.collector.data()
      
         # Very vague but there's padding in the beginning
         # Just want to verify it doesn't fail miserably
@@ -168,21 +162,11 @@ class ComponentTests(ossie.utils.testing.ScaComponentTestCase, ImpulseResponseMi
         data = range(dataPoints)
         
         self.src.push(data,complexData=False, sampleRate=1.0, EOS=False,streamID="someSRI")
-        count = 0
-        while True:
-            newData = self.sink.getData()
-            if newData:
-                count = 0
-                self.output.extend(newData)
-            elif count==200:
-                break
-            time.sleep(.01)
-            count+=1
+        self.collector.waitForSamples(1)
 
         self.assertFalse(self.sink.eos())
         self.src.push([],complexData=False, sampleRate=1.0, EOS=True,streamID="someSRI")
-        time.sleep(.1)
-        self.assertTrue(self.sink.eos())
+        self.assertTrue(self.collector.waitForEOS(timeout=1.0))
   
     def testReal(self):
         """ Real Filter real data
@@ -274,6 +258,164 @@ class ComponentTests(ossie.utils.testing.ScaComponentTestCase, ImpulseResponseMi
         self.comp.complexFilterCoefficients = filter
         self.doImpulseResponse(1e6,filter) 
 
+    def testAutoFftSizeImpulse(self):
+        """let the component pick the fftSize and ensure that the impulse response matches for both objectives
+        """
+        filter = [random.random() for _ in xrange(700)]
+        self.comp.fftSize = 0
+        self.comp.realFilterCoefficients = filter
+        #long enough to fill a block of the largest fftSize the component could pick
+        data = [0]*(64*len(filter))
+        data[0]=1
+        for objective, streamID in (("throughput", "stream_a"), ("latency", "stream_b")):
+            self.comp.fftSizeObjective = objective
+            self.output=[]
+            self.main([data],streamID=streamID)
+            self.cmpList(filter,self.output[:len(filter)])
+        self.assertEqual(self.comp.fftSize, 0)
+
+    def testShortFilterImpulse(self):
+        """use a filter short enough to run without an fft and ensure that the impulse response matches
+        """
+        filter = [complex(random.random(), random.random()) for _ in xrange(16)]
+        self.comp.fftSize = 1024
+        self.comp.complexFilterCoefficients = filter
+        self.doImpulseResponse(1e6,filter)
+
+    def testPartitionedImpulse(self):
+        """use more taps than the partition threshold and ensure that the impulse response matches without growing the fftSize
+        """
+        filter = [random.random() for _ in xrange(5000)]
+        self.comp.fftSize = 1024
+        self.comp.partitionThreshold = 4096
+        self.comp.realFilterCoefficients = filter
+        data = [0]*(len(filter)+self.comp.fftSize)
+        data[0]=1
+        self.main([data])
+        self.cmpList(filter,self.output[:len(filter)])
+        self.assertEqual(self.comp.fftSize, 1024)
+
+    def testFrequencyOutput(self):
+        """push the filtered spectrum of each block and make sure it is the fft of that block convolved with the taps
+        """
+        filter = [random.random() for _ in xrange(100)]
+        fftSize = 256
+        blockSize = fftSize-len(filter)+1
+        data = [random.random() for _ in xrange(10*blockSize)]
+        self.comp.fftSize = fftSize
+        self.comp.outputDomain = "frequency"
+        self.comp.realFilterCoefficients = filter
+        self.main([data[:1000], data[1000:]], sampleRate=1e6)
+        sri = self.sink.sri()
+        self.assertEqual(sri.mode, 1)
+        self.assertEqual(sri.subsize, fftSize)
+        self.assertAlmostEqual(sri.xdelta, 1e6/fftSize)
+        self.assertAlmostEqual(sri.ydelta, blockSize/1e6)
+        self.assertEqual(len(self.output), 10*fftSize)
+        for n in xrange(10):
+            expected = numpy.fft.fft(numpy.convolve(data[n*blockSize:(n+1)*blockSize], filter), fftSize)
+            frame = numpy.array(self.output[n*fftSize:(n+1)*fftSize])
+            self.assertTrue(numpy.allclose(frame, expected, rtol=1e-3, atol=1e-2))
+
+    def testDecimateInterpolate(self):
+        """resample with a polyphase filter and compare against filtering at the upsampled rate and keeping every decimation'th sample
+        """
+        filter = [random.random() for _ in xrange(65)]
+        data = [random.random() for _ in xrange(3000)]
+        for interp, decim in ((1,4), (3,2)):
+            upsampled = numpy.zeros(len(data)*interp)
+            upsampled[::interp] = data
+            expected = interp*scipy.signal.lfilter(filter, 1, upsampled)[::decim]
+            self.comp.decimation = decim
+            self.comp.interpolation = interp
+            self.comp.realFilterCoefficients = filter
+            self.output=[]
+            streamID = 'resample_%d_%d' %(interp, decim)
+            self.main([data[:1234], data[1234:]], sampleRate=1e6, streamID=streamID)
+            self.validateSRIPushing(sampleRate=1e6*interp/decim, streamID=streamID)
+            self.assertEqual(len(self.output), len(expected))
+            self.cmpList(list(expected), self.output)
+
+    def testShortInOut(self):
+        """filter short data from dataShort_in to dataShort_out and make sure the output is scaled, rounded and saturated
+        """
+        src = sb.DataSource(dataFormat='short')
+        sink = sb.DataSink()
+        src.connect(self.comp, providesPortName='dataShort_in')
+        self.comp.connect(sink, usesPortName='dataShort_out')
+        src.start()
+        sink.start()
+        try:
+            filter = [0.5, 0.25]
+            self.comp.realFilterCoefficients = filter
+            self.comp.outputScale = 3.0
+            data = [random.randint(-20000, 20000) for _ in xrange(4000)]
+            expected = numpy.clip(numpy.round(3.0*scipy.signal.lfilter(filter, 1, data)), -32768, 32767)
+            src.push(data[:1500], sampleRate=1e6, streamID='short_stream')
+            src.push(data[1500:], sampleRate=1e6, streamID='short_stream')
+            collector = OutputCollector(sink)
+            collector.waitForSamples(len(data), timeout=2.0)
+            output = collector.data()
+            self.assertEqual(sink.sri().streamID, 'short_stream')
+            self.assertEqual(len(output), len(expected))
+            #allow for the float arithmetic landing on the other side of a rounding boundary
+            self.assertTrue(max(abs(numpy.array(output)-expected)) <= 1)
+            self.assertTrue(max(output) <= 32767 and min(output) >= -32768)
+        finally:
+            sink.stop()
+            src.stop()
+            src.releaseObject()
+            sink.releaseObject()
+
+    def testStreamFilters(self):
+        """give streams matching a pattern their own taps and make sure the rest keep the component's
+        """
+        sink = sb.StreamSink()
+        self.comp.connect(sink, usesPortName='dataFloat_out')
+        sink.start()
+        try:
+            default = [random.random() for _ in xrange(50)]
+            channel = [random.random()-0.5 for _ in xrange(80)]
+            self.comp.fftSize = 1024
+            self.comp.realFilterCoefficients = default
+            self.comp.streamFilters = [{'streamFilters::streamIDPattern':'chan_*', 'streamFilters::realFilterCoefficients':channel}]
+            data = [random.random() for _ in xrange(3000)]
+            for streamID in ('chan_1', 'other'):
+                self.src.push(data+[0]*self.comp.fftSize, sampleRate=1e6, streamID=streamID, EOS=True)
+            for streamID, filter in (('chan_1', channel), ('other', default)):
+                output = sink.read(timeout=5.0, streamID=streamID, eos=True)
+                self.assertNotEqual(output, None)
+                expected = scipy.signal.lfilter(filter, 1, data)
+                self.cmpList(list(expected), output.data[:len(data)])
+        finally:
+            sink.stop()
+            sink.releaseObject()
+
+    def testFilterBank(self):
+        """run a stream through a bank of two filters and make sure each comes out on its own stream
+        """
+        sink = sb.StreamSink()
+        self.comp.connect(sink, usesPortName='dataFloat_out')
+        sink.start()
+        try:
+            lowpass = [random.random() for _ in xrange(100)]
+            highpass = [random.random()-0.5 for _ in xrange(37)]
+            self.comp.fftSize = 1024
+            self.comp.filterBank = [{'filterBank::streamIDSuffix':'_lo', 'filterBank::realFilterCoefficients':lowpass},
+                                    {'filterBank::realFilterCoefficients':highpass}]
+            data = [random.random() for _ in xrange(3000)]
+            #pad the input so every real sample makes it out of the last block
+            self.src.push(data[:1000], sampleRate=1e6, streamID='bank')
+            self.src.push(data[1000:]+[0]*self.comp.fftSize, sampleRate=1e6, streamID='bank', EOS=True)
+            for streamID, filter in (('bank_lo', lowpass), ('bank_1', highpass)):
+                output = sink.read(timeout=5.0, streamID=streamID, eos=True)
+                self.assertNotEqual(output, None)
+                expected = scipy.signal.lfilter(filter, 1, data)
+                self.cmpList(list(expected), output.data[:len(data)])
+        finally:
+            sink.stop()
+            sink.releaseObject()
+
     def testRealCorrelation(self):
         """Put the filter into correlation mode and ensure that it correlates
         """
@@ -291,6 +433,69 @@ class ComponentTests(ossie.utils.testing.ScaComponentTestCase, ImpulseResponseMi
         self.cmpList(outExpected,self.output[:len(outExpected)])
 
 
+    def testCorrelationPeakDetection(self):
+        """correlate against a template hidden twice in noise and make sure only the two peaks are reported
+        """
+        messages = []
+        msgSink = sb.MessageSink(messageCallback=lambda id, data: messages.append(data))
+        self.comp.connect(msgSink, usesPortName='detections_out')
+        msgSink.start()
+        try:
+            template = [random.choice((-1.0, 1.0)) for _ in xrange(64)]
+            self.comp.correlationMode = True
+            self.comp.fftSize = 1024
+            self.comp.realFilterCoefficients = template
+            self.comp.peakDetection = {'peakDetection::enabled':True,
+                                       'peakDetection::threshold':32.0,
+                                       'peakDetection::minSeparation':64,
+                                       'peakDetection::fullRateOutput':False}
+            data = [0.1*random.gauss(0, 1) for _ in xrange(4000)]
+            for start in (1000, 2500):
+                data[start:start+len(template)] = [x+y for x, y in zip(data[start:start+len(template)], template)]
+            self.src.push(data+[0]*self.comp.fftSize, sampleRate=1e3, streamID='detect', EOS=True)
+            self.assertTrue(self.collector.waitForMessages(messages, 2))
+            #once the eos has been through there are no more detections to come
+            self.assertTrue(self.collector.waitUntil(lambda: self.comp.streamStatistics.liveStreams==0))
+            #the peak is where the end of the template lines up with the data
+            self.assertEqual([detectionField(msg, 'sampleIndex') for msg in messages], [1000+63, 2500+63])
+            for msg in messages:
+                self.assertEqual(detectionField(msg, 'streamID'), 'detect')
+                self.assertTrue(abs(detectionField(msg, 'magnitude')-64) < 5)
+            #the full rate output was turned off
+            self.assertEqual(len(self.collector.data()), 0)
+        finally:
+            msgSink.stop()
+            msgSink.releaseObject()
+
+    def testCorrelatorBank(self):
+        """correlate against several templates at once and make sure each template only finds itself
+        """
+        messages = []
+        msgSink = sb.MessageSink(messageCallback=lambda id, data: messages.append(data))
+        self.comp.connect(msgSink, usesPortName='detections_out')
+        msgSink.start()
+        try:
+            templates = [[random.choice((-1.0, 1.0)) for _ in xrange(64)] for _ in xrange(3)]
+            self.comp.correlationMode = True
+            self.comp.fftSize = 1024
+            self.comp.filterBank = [{'filterBank::realFilterCoefficients':template} for template in templates]
+            self.comp.peakDetection = {'peakDetection::enabled':True,
+                                       'peakDetection::threshold':48.0,
+                                       'peakDetection::minSeparation':64,
+                                       'peakDetection::fullRateOutput':False}
+            starts = (500, 1700, 2900)
+            data = [0.1*random.gauss(0, 1) for _ in xrange(4000)]
+            for start, template in zip(starts, templates):
+                data[start:start+len(template)] = [x+y for x, y in zip(data[start:start+len(template)], template)]
+            self.src.push(data+[0]*self.comp.fftSize, sampleRate=1e3, streamID='templates', EOS=True)
+            self.assertTrue(self.collector.waitForMessages(messages, len(templates)))
+            self.assertTrue(self.collector.waitUntil(lambda: self.comp.streamStatistics.liveStreams==0))
+            found = sorted((detectionField(msg, 'streamID'), detectionField(msg, 'sampleIndex')) for msg in messages)
+            self.assertEqual(found, [('templates_%d' %n, start+63) for n, start in enumerate(starts)])
+        finally:
+            msgSink.stop()
+            msgSink.releaseObject()
+
     def testCxCorrelation(self):
         """Put the filter into correlation mode and ensure that it correlates with cx data and coeficients
         """
@@ -333,11 +538,225 @@ class ComponentTests(ossie.utils.testing.ScaComponentTestCase, ImpulseResponseMi
         outExpected = scipyCorl(filter,data)
         data.extend([0]*(self.comp.fftSize))
         self.comp.disconnect(self.sink)
-        self.comp.connect(self.sink)
+        self.comp.connect(self.sink, usesPortName='dataFloat_out')
         self.main([data],False,1e6)
         self.validateSRIPushing(sampleRate=1e6)
         self.cmpList(outExpected,self.output[:len(outExpected)])
-    
+
+    def testReconfigureMidStream(self):
+        """change the taps while a stream is running and make sure the stream picks them up
+        """
+        self.comp.fftSize = 1024
+        self.comp.realFilterCoefficients = [1.0]
+        data = [random.random() for _ in xrange(2048)]
+        self.main([data])
+        self.cmpList(data,self.output[:len(data)])
+
+        before = self.comp.configureStatistics.configureCount
+        self.comp.realFilterCoefficients = [2.0]
+        stats = self.comp.configureStatistics
+        self.assertEqual(stats.configureCount, before+1)
+        self.assertTrue(stats.lastBlockTime <= stats.maxBlockTime)
+
+        self.output=[]
+        self.main([data])
+        self.cmpList([2*x for x in data],self.output[:len(data)])
+
+    def testFftwWisdom(self):
+        """plan a new fftSize on configure, save the wisdom when stopping and load it again when starting
+        """
+        wisdomDir = tempfile.mkdtemp()
+        wisdomFile = os.path.join(wisdomDir, 'fastfilter.wisdom')
+        try:
+            self.comp.fftwWisdomFile = wisdomFile
+            self.assertFalse(self.comp.planStatistics.wisdomLoaded)
+            before = self.comp.planStatistics.planCount
+            self.comp.fftSize = 3000
+            self.comp.realFilterCoefficients = [random.random() for _ in xrange(1001)]
+            stats = self.comp.planStatistics
+            self.assertTrue(stats.planCount > before)
+            self.assertTrue(stats.planningTime >= stats.lastPlanningTime)
+
+            #the plans are already made so the stream does not have to make them
+            planCount = stats.planCount
+            self.main([[random.random() for _ in xrange(5000)]])
+            self.assertEqual(self.comp.planStatistics.planCount, planCount)
+
+            self.comp.stop()
+            self.assertTrue(os.path.exists(wisdomFile))
+            self.comp.start()
+            self.assertTrue(self.comp.planStatistics.wisdomLoaded)
+        finally:
+            if os.path.exists(wisdomFile):
+                os.remove(wisdomFile)
+            os.rmdir(wisdomDir)
+
+    def testMaxLatency(self):
+        """bound the samples a long filter holds back and check each stream's reported latency
+        """
+        self.comp.fftSize = 0
+        self.comp.maxLatencySamples = 100
+        taps = [random.random() for _ in xrange(1000)]
+        self.comp.realFilterCoefficients = taps
+        data = [0]*5000
+        data[0] = 1.0
+        self.main([data[i:i+37] for i in xrange(0, len(data), 37)], streamID='bounded')
+        #everything but the samples held back has come out
+        self.assertTrue(len(self.output) >= len(data)-100)
+        self.cmpList(taps, self.output[:len(taps)])
+        latency = self.comp.streamLatency
+        self.assertEqual(len(latency), 1)
+        self.assertEqual(latency[0].streamID, 'bounded')
+        self.assertEqual(len(data)-len(self.output), latency[0].latencySamples)
+        self.assertTrue(latency[0].peakLatencySamples <= 100)
+
+    def testLongStream(self):
+        """check a million samples against the streaming reference filter
+        """
+        self.comp.fftSize = 4096
+        taps = numpy.random.uniform(-1, 1, 500)
+        self.comp.realFilterCoefficients = list(taps)
+        data = numpy.random.uniform(-1, 1, 1000000)
+        self.main([packet.tolist() for packet in toPackets(data, 10000)])
+        reference = OverlapAddReference(taps)
+        expected = numpy.concatenate([reference.filter(packet) for packet in toPackets(data, 10000)])
+        output = numpy.asarray(self.output)
+        self.assertTrue(len(output) > len(data)-self.comp.fftSize)
+        self.cmpList(expected[:len(output)], output)
+
+    def testOfflineFile(self):
+        """filter a complex file with fastfilter_offline and check it matches the component
+        """
+        program = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cpp', 'fastfilter_offline')
+        if not os.path.exists(program):
+            self.skipTest('fastfilter_offline has not been built')
+        self.comp.fftSize = 1024
+        self.comp.correlationMode = True
+        taps = numpy.random.uniform(-1, 1, 300)
+        self.comp.realFilterCoefficients = list(taps)
+        data = numpy.random.uniform(-1, 1, 2*50000).astype(numpy.float32)
+        self.main([packet.tolist() for packet in toPackets(data, 20000)], dataCx=True)
+
+        tempDir = tempfile.mkdtemp()
+        inFile = os.path.join(tempDir, 'in.cf')
+        outFile = os.path.join(tempDir, 'out.cf')
+        tapsFile = os.path.join(tempDir, 'taps.txt')
+        try:
+            data.tofile(inFile)
+            with open(tapsFile, 'w') as f:
+                f.write(','.join(repr(float(tap)) for tap in taps))
+            #small chunks so the file is filtered in pieces across several seams
+            status = subprocess.call([program, '--fftSize', '1024', '--correlationMode', '--format', 'CF',
+                                      '--realFilterCoefficients', tapsFile, '--chunkSize', '7000', '--threads', '3',
+                                      inFile, outFile])
+            self.assertEqual(status, 0)
+            offline = numpy.fromfile(outFile, numpy.complex64)
+        finally:
+            for filename in (inFile, outFile, tapsFile):
+                if os.path.exists(filename):
+                    os.remove(filename)
+            os.rmdir(tempDir)
+        self.assertEqual(len(offline), len(data)/2)
+        self.cmpList(self.output, offline[:len(self.output)])
+
+    def testStatistics(self):
+        """check the per stream statistics add up and go away when they are turned off
+        """
+        #long enough that the fft beats the direct method and both fft times get counted
+        taps = [random.random() for _ in xrange(300)]
+        self.comp.fftSize = 1024
+        self.comp.realFilterCoefficients = taps
+        data = [random.random() for _ in xrange(5000)]
+        self.main([data[i:i+500] for i in xrange(0, len(data), 500)], streamID='timed')
+        stats = self.comp.statistics
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0].streamID, 'timed')
+        self.assertEqual(stats[0].samplesIn, len(data))
+        self.assertEqual(stats[0].samplesOut, len(self.output))
+        self.assertEqual(stats[0].blocks, len(self.output)/(self.comp.fftSize-len(taps)+1))
+        self.assertTrue(stats[0].forwardFftTime > 0)
+        self.assertTrue(stats[0].inverseFftTime > 0)
+        self.assertTrue(stats[0].redesigns >= 1)
+        histogram = [stats[0].latencyUnder10us, stats[0].latencyUnder100us, stats[0].latencyUnder1ms,
+                     stats[0].latencyUnder10ms, stats[0].latencyUnder100ms, stats[0].latencyOver100ms]
+        self.assertEqual(sum(histogram), 10)
+        self.comp.statisticsEnabled = False
+        self.assertEqual(len(self.comp.statistics), 0)
+
+    def testBatching(self):
+        """push lots of small packets with batching on and make sure the stream comes out the same
+        """
+        self.comp.fftSize = 1024
+        self.comp.realFilterCoefficients = [0.5, 0.5]
+        self.comp.batchMaxSamples = 2048
+        self.comp.batchMaxLatency = 1.0
+        data = [random.random() for _ in xrange(5000)]
+        padded = data+[0]*self.comp.fftSize
+        self.main([padded[i:i+50] for i in xrange(0, len(padded), 50)], sampleRate=1e4, eos=True)
+        expected = [0.5*data[0]]+[0.5*(x+y) for x,y in zip(data[:-1],data[1:])]
+        self.cmpList(expected, self.output[:len(expected)])
+        self.assertTrue(self.sink.eos())
+        self.validateSRIPushing(sampleRate=1e4)
+
+    def testIdleStreamEviction(self):
+        """end a stream which stops sending data and flush the rest of its output
+        """
+        self.comp.fftSize = 1024
+        self.comp.realFilterCoefficients = [0.5, 0.5]
+        self.comp.streamIdleTimeout = 0.5
+        self.comp.flushEvictedStreams = True
+        data = [random.random() for _ in xrange(1000)]
+        self.main([data], streamID='idle')
+        #main() only waits for the input to be filtered - the eos comes once the stream has sat idle
+        self.assertTrue(self.collector.waitForEOS())
+        self.output = numpy.concatenate((self.output, self.collector.data()))
+        #the overlap tail comes out with the eos
+        self.assertEqual(len(self.output), len(data)+1)
+        stats = self.comp.streamStatistics
+        self.assertEqual(stats.liveStreams, 0)
+        self.assertEqual(stats.evictedStreams, 1)
+
+        #data for the stream after it was dropped starts it over
+        self.main([data], streamID='idle')
+        self.assertTrue(self.collector.waitUntil(lambda: self.comp.streamStatistics.evictedStreams==2))
+        stats = self.comp.streamStatistics
+        self.assertEqual(stats.evictedStreams, 2)
+        self.assertEqual(stats.recreatedStreams, 1)
+
+    def testMaxStreamsAcrossThreads(self):
+        """keep to maxStreams over all of the filter threads, ending streams on the other threads
+        """
+        self.comp.stop()
+        self.comp.numThreads = 4
+        self.comp.start()
+        self.comp.fftSize = 1024
+        self.comp.realFilterCoefficients = [0.5, 0.5]
+        self.comp.maxStreams = 1
+        data = [random.random() for _ in xrange(1000)]
+        for n in xrange(4):
+            self.src.push(data, streamID='stream%d' %n)
+        self.assertTrue(self.collector.waitUntil(lambda: self.comp.streamStatistics.evictedStreams==3))
+        stats = self.comp.streamStatistics
+        self.assertEqual(stats.liveStreams, 1)
+        self.assertEqual(stats.evictedStreams, 3)
+
+    def testTapCacheCountsDesigns(self):
+        """two streams at the same sample rate starting together design the filter once
+        """
+        self.comp.stop()
+        self.comp.numThreads = 2
+        self.comp.start()
+        self.setFilterProps()
+        before = self.comp.tapCacheStatistics
+        hits, misses = before.hits, before.misses
+        data = [random.random() for _ in xrange(1000)]
+        self.src.push(data, sampleRate=10000, streamID='first')
+        self.src.push(data, sampleRate=10000, streamID='second')
+        self.assertTrue(self.collector.waitUntil(lambda: self.comp.streamStatistics.liveStreams==2))
+        stats = self.comp.tapCacheStatistics
+        self.assertEqual(stats.misses-misses, 1)
+        self.assertEqual(stats.hits-hits, 1)
+
     def makeCxCoefProps(self):
         return ossie.cf.CF.DataType(id='complexFilterCoefficients', value=CORBA.Any(CORBA.TypeCode("IDL:CF/complexFloatSeq:1.0"), []))
 
@@ -353,26 +772,29 @@ class ComponentTests(ossie.utils.testing.ScaComponentTestCase, ImpulseResponseMi
         self.assertTrue(diffSR < tolerance, "Component not pushing samplerate properly")
 
     def main(self, inData, dataCx=False, sampleRate=1.0, eos=False,streamID='test_stream'):    
-        count=0
         lastPktIndex = len(inData)-1
+        numSamples = filteredSamples(self.comp, streamID)
         for i, data in enumerate(inData):
             #just to mix things up I'm going to push through in two stages
             #to ensure the filter is working properly with its state
             EOS = eos and i == lastPktIndex
             self.src.push(data,complexData=dataCx, sampleRate=sampleRate, EOS=EOS,streamID=streamID)
-        while True:
-            newData = self.sink.getData()
-            if newData:
-                count = 0
-                self.output.extend(newData)
-            elif count==200:
-                break
-            time.sleep(.01)
-            count+=1
+            numSamples += len(data)/2 if dataCx else len(data)
+        #an eos ends the stream's statistics along with the stream, so wait for it instead.
+        #Without one only the statistics say when all of the input has been filtered
+        if eos:
+            self.assertTrue(self.collector.waitForEOS(), "no eos for stream %s" %streamID)
+        else:
+            self.assertTrue(self.comp.statisticsEnabled, "main() needs statisticsEnabled to know when the output is complete")
+            self.assertTrue(self.collector.waitForInput(self.comp, streamID, numSamples),
+                            "only %d of %d samples of stream %s were filtered - a stream with no filter has no statistics"
+                            %(filteredSamples(self.comp, streamID), numSamples, streamID))
+        output = self.collector.data()
         #convert the output to complex if necessary    
         self.outputCmplx = self.sink.sri().mode==1
         if self.outputCmplx:
-            self.output = toCx(self.output)
+            output = deinterleave(output)
+        self.output = numpy.concatenate((self.output, output)) if len(self.output) else output
         
     # TODO Add additional tests here
     #
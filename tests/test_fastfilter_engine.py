@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+#
+# This file is protected by Copyright. Please refer to the COPYRIGHT file distributed with this 
+# source distribution.
+# 
+# This file is part of REDHAWK Basic Components fastfilter.
+# 
+# REDHAWK Basic Components fastfilter is free software: you can redistribute it and/or modify it under the terms of 
+# the GNU General Public License as published by the Free Software Foundation, either 
+# version 3 of the License, or (at your option) any later version.
+# 
+# REDHAWK Basic Components fastfilter is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; 
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR 
+# PURPOSE.  See the GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along with this 
+# program.  If not, see http://www.gnu.org/licenses/.
+#
+
+"""Tests for the fastfilter_engine python module, which runs the component's filter engine
+directly without launching the component.
+
+The module is looked for where the build leaves it (cpp/.libs), then where it is installed
+with the component, then on the python path.  The tests are skipped if it isn't found.
+"""
+
+import os
+import sys
+import threading
+import unittest
+import numpy
+
+from filter_test_helpers import *
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SDRROOT = os.environ.get('SDRROOT', '/var/redhawk/sdr')
+sys.path[:0] = [os.path.join(TESTS_DIR, '..', 'cpp', '.libs'),
+                os.path.join(SDRROOT, 'dom', 'components', 'rh', 'fastfilter', 'python')]
+try:
+    import fastfilter_engine
+except ImportError:
+    fastfilter_engine = None
+
+@unittest.skipIf(fastfilter_engine is None, 'the fastfilter_engine module has not been built')
+class EngineTests(unittest.TestCase):
+
+    def setUp(self):
+        numpy.random.seed(0)
+
+    def randomTaps(self, numTaps, cx=False):
+        taps = numpy.random.uniform(-1, 1, numTaps)
+        if cx:
+            taps = taps+1j*numpy.random.uniform(-1, 1, numTaps)
+            return taps.astype(numpy.complex64)
+        return taps.astype(numpy.float32)
+
+    def randomData(self, numPts, cx=False):
+        return self.randomTaps(numPts, cx)
+
+    def filterStream(self, filt, packets):
+        """filter packets one after another and drain the filter at the end
+        """
+        out = [filt.filter(packet) for packet in packets]
+        out.append(filt.drain())
+        return numpy.concatenate(out)
+
+    def cmpReference(self, taps, packets, out):
+        reference = OverlapAddReference(taps)
+        expected = numpy.concatenate([reference.filter(packet) for packet in packets]+[reference.flush()])
+        self.assertEqual(len(out), len(expected))
+        self.assertTrue(numpy.allclose(out, expected, atol=1e-3))
+
+    def testStreaming(self):
+        """uneven packets through a long filter come out as one convolution
+        """
+        taps = self.randomTaps(513)
+        data = self.randomData(100000)
+        cuts = sorted(numpy.random.randint(0, len(data), 40))
+        packets = numpy.split(data, cuts)
+        filt = fastfilter_engine.Filter(taps, fftSize=2048)
+        out = self.filterStream(filt, packets)
+        self.assertEqual(out.dtype, numpy.float32)
+        self.cmpReference(taps, packets, out)
+
+    def testComplex(self):
+        """complex data or taps give complex output
+        """
+        for dataCx, tapsCx in ((True, False), (False, True), (True, True)):
+            taps = self.randomTaps(200, tapsCx)
+            packets = toPackets(self.randomData(20000, dataCx), 3000)
+            out = self.filterStream(fastfilter_engine.Filter(taps), packets)
+            self.assertEqual(out.dtype, numpy.complex64)
+            self.cmpReference(taps, packets, out)
+
+    def testMethods(self):
+        """short, whole and partitioned filters all give the same convolution
+        """
+        data = self.randomData(30000)
+        for numTaps, fftSize, partitionThreshold, method in ((8, 1024, 4096, 'direct'),
+                                                              (300, 1024, 4096, 'overlap-add'),
+                                                              (3000, 1024, 1000, 'partitioned')):
+            taps = self.randomTaps(numTaps)
+            filt = fastfilter_engine.Filter(taps, fftSize=fftSize, partitionThreshold=partitionThreshold)
+            #the direct filter can only be used for taps shorter than the measured crossover
+            if method != 'direct':
+                self.assertEqual(filt.method, method)
+            self.assertEqual(filt.numTaps, numTaps)
+            packets = toPackets(data, 4096)
+            self.cmpReference(taps, packets, self.filterStream(filt, packets))
+
+    def testCorrelationMode(self):
+        """correlation mode filters with the taps reversed
+        """
+        taps = self.randomTaps(100)
+        data = self.randomData(10000)
+        out = self.filterStream(fastfilter_engine.Filter(taps, correlationMode=True), [data])
+        self.cmpReference(taps[::-1], [data], out)
+
+    def testLatency(self):
+        """output only comes out for whole blocks and the rest is held back
+        """
+        filt = fastfilter_engine.Filter(self.randomTaps(257), fftSize=1024)
+        out = filt.filter(self.randomData(100))
+        self.assertEqual(len(out)+filt.latency, 100)
+        filt.flush()
+        self.assertEqual(filt.latency, 0)
+        self.assertEqual(len(filt.drain()), 0)
+
+    def testBadInput(self):
+        """only float32 and complex64 samples are accepted
+        """
+        self.assertRaises(TypeError, fastfilter_engine.Filter, numpy.ones(10))
+        filt = fastfilter_engine.Filter(self.randomTaps(10))
+        self.assertRaises(TypeError, filt.filter, numpy.ones(10, dtype=numpy.int16))
+        self.assertRaises(ValueError, fastfilter_engine.Filter, self.randomTaps(10), fftSizeObjective='fast')
+        self.assertRaises(ValueError, fastfilter_engine.designTaps, 'notch', 1e6)
+
+    def testDesignTaps(self):
+        """designed lowpass taps pass the passband and stop the stopband
+        """
+        sampleRate = 100e3
+        taps = fastfilter_engine.designTaps('lowpass', sampleRate, freq1=10e3, TransitionWidth=2e3, Ripple=0.01)
+        self.assertEqual(taps.dtype, numpy.float32)
+        fftSize = 8192
+        response = numpy.abs(numpy.fft.fft(taps, fftSize))
+        freqs = numpy.abs(numpy.fft.fftfreq(fftSize, 1/sampleRate))
+        self.assertTrue(numpy.all(numpy.abs(response[bandMask(freqs, [(0, 9e3)])]-1) < 0.05))
+        self.assertTrue(numpy.all(response[bandMask(freqs, [(13e3, sampleRate/2)])] < 0.05))
+
+        cxTaps = fastfilter_engine.designTaps('bandpass', sampleRate, freq1=5e3, freq2=15e3, filterComplex=True)
+        self.assertEqual(cxTaps.dtype, numpy.complex64)
+
+    def testThreads(self):
+        """filters on their own threads give the same output as one after another
+        """
+        taps = self.randomTaps(300)
+        streams = [self.randomData(200000) for _ in xrange(4)]
+        expected = [self.filterStream(fastfilter_engine.Filter(taps), [data]) for data in streams]
+        results = [None]*len(streams)
+        def run(index):
+            results[index] = self.filterStream(fastfilter_engine.Filter(taps), [streams[index]])
+        threads = [threading.Thread(target=run, args=(i,)) for i in xrange(len(streams))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for result, want in zip(results, expected):
+            self.assertTrue(numpy.array_equal(result, want))
+
+if __name__ == "__main__":
+    unittest.main()